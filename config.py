@@ -1 +1,16 @@
-BASE_URI="https://qa-assignment-omega.vercel.app"
\ No newline at end of file
+BASE_URI="https://qa-assignment-omega.vercel.app"
+
+# --env -> base URI; "local" is served by utils.stand_in_server for the session
+ENVIRONMENTS = {
+    "dev": BASE_URI,
+    "ci": BASE_URI,
+    "local": None,
+}
+
+# --env -> client-side limits of the shared transport (utils.limiter): requests/s with a burst, and the
+# bounds of the adaptive concurrency limit; shared by all xdist workers. None sends unthrottled.
+LIMITS = {
+    "dev": {"rate": 50, "burst": 10, "initial_concurrency": 4, "min_concurrency": 1, "max_concurrency": 16},
+    "ci": {"rate": 50, "burst": 10, "initial_concurrency": 4, "min_concurrency": 1, "max_concurrency": 16},
+    "local": None,
+}
@@ -3,9 +3,37 @@ import os
 
 
 @task
-def tests(c, env='ci', tags='smoke', rerun=2):
+def tests(c, env='ci', tags='smoke', retries=2, workers=None):
     """
-    Task to run tests
+    Task to run tests; failed requests that are safe to repeat are retried up to
+    `retries` times. --workers=N (or auto) spreads them over N xdist workers,
+    longest tests first and xdist groups kept together
     """
-    
-    c.run(f'python3 -m pytest ./tests/*_test.py --env={env} -m {tags} --reruns {rerun}')
+    parallel = f' -n {workers} --dist loadgroup' if workers else ''
+    c.run(f'python3 -m pytest ./tests/*_test.py --env={env} -m {tags} --retries {retries}{parallel}')
+
+
+@task
+def soak(c, env='local', rate=20, duration=3600, mix=None, bucket=10):
+    """
+    Task to run the open-loop soak test: `rate` requests/s of mixed list/create/status/history
+    traffic for `duration` seconds, with a throughput/latency series every `bucket` seconds
+    """
+    weights = f' --soak-mix={mix}' if mix else ''
+    c.run(f'python3 -m pytest ./tests/soak_test.py --env={env} -m soak '
+          f'--soak-rate={rate} --soak-duration={duration} --soak-bucket={bucket}{weights}')
+
+
+@task
+def trends(c, endpoint=None, test=None, stat='p95', last=500, env=None):
+    """
+    Task to ingest new archived reports and print a trend: an endpoint's latency
+    statistic, a test's outcomes, or (by default) the tests failing lately
+    """
+    if endpoint:
+        query = f'endpoint "{endpoint}" --stat {stat} --last {last}' + (f' --env {env}' if env else '')
+    elif test:
+        query = f'test "{test}" --last {last}'
+    else:
+        query = f'failures --last {last}'
+    c.run(f'python3 -m utils.archive_store {query}')
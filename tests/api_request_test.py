@@ -0,0 +1,65 @@
+"""
+@Description:  Offline tests for utils.request against the local stand-in server
+"""
+import time
+
+import pytest
+
+from utils.request import ApiRequest, Transport, send_all
+from utils.stand_in_server import StandInServer
+
+DELAY = 0.2
+
+
+@pytest.fixture(scope="module")
+def stand_in():
+    with StandInServer() as server:
+        for i in range(10):
+            server.store.create({"name": f"Item {i}", "status": "Active", "location": "Site A"})
+        server.latency_ms = DELAY * 1000
+        yield server
+
+
+@pytest.fixture
+def base(stand_in):
+    stand_in.stats["peak_in_flight"] = 0
+    return stand_in.url
+
+
+def _history(base, eq_id):
+    return ApiRequest(f"{base}/api/equipment/{eq_id}/history", "GET")
+
+
+@pytest.mark.unit
+class TestApiRequest:
+
+    def test_send_reuses_connection(self, base, stand_in):
+        """
+        @description: Sequential sends through one transport share a keep-alive connection
+        """
+        transport = Transport()
+        before = stand_in.stats["connections"]
+        for eq_id in (1, 2, 3):
+            assert _history(base, eq_id).send(transport).status_code == 200
+        transport.close()
+        assert stand_in.stats["connections"] - before == 1
+
+    def test_send_all_preserves_order_and_overlaps(self, base, transport):
+        """
+        @description: A batch fans out concurrently and returns responses in request order
+        """
+        ids = list(range(10, 0, -1))
+
+        start = time.perf_counter()
+        responses = send_all([_history(base, eq_id) for eq_id in ids], concurrency=10, transport=transport)
+        elapsed = time.perf_counter() - start
+
+        assert [r.as_dict["data"]["equipmentId"] for r in responses] == ids
+        assert elapsed < DELAY * 5, f"Batch ran sequentially: {elapsed:.2f}s"
+
+    def test_send_all_respects_concurrency(self, base, stand_in, transport):
+        """
+        @description: No more than `concurrency` requests are in flight at once
+        """
+        send_all([_history(base, eq_id) for eq_id in range(1, 7)], concurrency=2, transport=transport)
+        assert stand_in.stats["peak_in_flight"] <= 2
@@ -0,0 +1,114 @@
+"""
+@Description:  Offline tests and micro-benchmark for the lazy ApiResponse in utils.request
+"""
+import json
+import time
+import tracemalloc
+
+import pytest
+import requests
+
+from utils import request as request_module
+from utils.request import ApiResponse
+
+ITEM = {"name": "Excavator", "status": "Active", "location": "Site A", "createdAt": "2025-08-10T22:55:27.000Z"}
+
+
+def _response(body, content_type="application/json; charset=utf-8", status=200):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body  # pylint: disable=protected-access
+    response.headers["Content-Type"] = content_type
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+
+@pytest.mark.unit
+class TestApiResponse:
+
+    def test_body_is_decoded_and_parsed_on_first_access_only(self, monkeypatch):
+        """
+        @description: only the raw bytes are kept up front; text and JSON are produced once, when first read
+        """
+        calls = []
+        monkeypatch.setattr(request_module, "loads", lambda body: calls.append(body) or json.loads(body))
+        body = json.dumps({"success": True, "data": [ITEM]}).encode()
+        r = ApiResponse.from_response(_response(body))
+
+        assert r.content is body and not calls
+        assert r.as_dict["data"] == [ITEM] and r.as_dict is r.as_dict
+        assert len(calls) == 1
+        assert r.text == body.decode() and r.text is r.text
+
+    @pytest.mark.parametrize("body", [b"", b"<html>404 Not Found</html>", b"{\"truncated\":"])
+    def test_non_json_body_parses_to_none(self, body):
+        r = ApiResponse.from_response(_response(body, "text/html"))
+        assert r.as_dict is None
+        assert r.text == body.decode()
+
+    def test_text_uses_the_declared_charset(self):
+        r = ApiResponse.from_response(_response("Gerät".encode("latin-1"), "text/plain; charset=latin-1"))
+        assert r.text == "Gerät"
+
+    def test_slotted(self):
+        r = ApiResponse(200, b"{}")
+        assert not hasattr(r, "__dict__")
+        with pytest.raises(AttributeError):
+            r.body = b"{}"
+
+    def test_json_backends_agree(self):
+        """
+        @description: the fast backend (orjson, when installed) parses exactly like the json module
+        """
+        body = json.dumps({"success": True, "count": 2, "data": [dict(ITEM, id=1, ratio=0.5), dict(ITEM, id=2)],
+                           "unicode": "Gerät ✓", "none": None}).encode()
+        assert request_module.loads(body) == json.loads(body)
+
+
+def _eager(response):
+    """
+    What send() used to keep of every response: decoded text, parsed JSON and headers
+    """
+    text = response.text
+    try:
+        as_dict = response.json()
+    except ValueError:
+        as_dict = None
+    return text, as_dict, response.headers
+
+
+def _measure(fn, repeat=3):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best, peak
+
+
+@pytest.mark.benchmark
+def test_large_listing_allocation_and_time(request):
+    """
+    @description: Eager text + JSON of a large GET /api/equipment listing vs. the lazy ApiResponse,
+    both when only the status is checked and when the body is parsed
+    """
+    n = request.config.getoption("--benchmark-items")
+    body = json.dumps({"success": True, "count": n,
+                       "data": [dict(ITEM, id=i + 1) for i in range(n)]}).encode()
+    response = _response(body)
+
+    eager_s, eager_peak = _measure(lambda: _eager(response))
+    status_s, status_peak = _measure(lambda: ApiResponse.from_response(response).status_code)
+    parsed_s, parsed_peak = _measure(lambda: ApiResponse.from_response(response).as_dict)
+
+    backend = "orjson" if request_module.orjson is not None else "json"
+    print(f"\n{n} items ({len(body) / 1e6:.1f} MB): eager {eager_s * 1000:.1f} ms / {eager_peak / 1e6:.1f} MB peak; "
+          f"lazy status-only {status_s * 1000:.3f} ms / {status_peak / 1e6:.3f} MB; "
+          f"lazy as_dict ({backend}) {parsed_s * 1000:.1f} ms / {parsed_peak / 1e6:.1f} MB")
+    assert status_peak < eager_peak / 100
+    assert parsed_peak < eager_peak
+    assert parsed_s < eager_s
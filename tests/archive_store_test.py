@@ -0,0 +1,83 @@
+"""
+@Description:  Offline tests for the utils.archive_store trend index
+"""
+import json
+
+import pytest
+
+from utils.archive_store import ArchiveStore, main
+from utils.metrics import LatencyHistogram
+
+TEST_ID = "tests/get_all_equipment_test.py::TestGetAllEquipment::test_equipment_schema"
+
+
+def _report(path, created_at, outcome, p95_ms, env="dev", duration=0.25):
+    hist = LatencyHistogram()
+    for _ in range(100):
+        hist.record(p95_ms)
+    path.write_text(json.dumps({
+        "data": [{"type": "report", "attributes": {
+            "created_at": created_at,
+            "env": env,
+            "summary": {"num_tests": 1, "duration": 1.5},
+            "load_latency": {"GET /api/equipment": hist.to_dict()},
+        }}],
+        "included": [{"type": "test", "attributes": {"name": TEST_ID, "outcome": outcome, "duration": duration}}],
+    }))
+
+
+@pytest.mark.unit
+class TestArchiveStore:
+
+    def test_ingestion_is_incremental(self, tmp_path):
+        """
+        @description: unchanged files are skipped, new and rewritten ones are (re)loaded, foreign JSON is ignored
+        """
+        _report(tmp_path / "report_1.json", "2025-08-11 21:00:00", "passed", 100)
+        (tmp_path / "output_1.json").write_text(json.dumps({"content": {"suites": {}}}))
+        store = ArchiveStore(str(tmp_path / "index.sqlite"))
+
+        assert store.ingest(tmp_path) == 1
+        assert store.ingest(tmp_path) == 0
+
+        _report(tmp_path / "report_2.json", "2025-08-11 22:00:00", "failed", 200)
+        _report(tmp_path / "report_1.json", "2025-08-11 21:00:00", "failed", 150, env="ci")
+        assert store.ingest(tmp_path) == 2
+        assert store.db.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 2
+        store.close()
+
+    def test_trend_queries(self, tmp_path, capsys):
+        """
+        @description: endpoint and test trends come back oldest first, limited to the last N runs
+        """
+        (tmp_path / "json").mkdir()
+        for hour, (outcome, p95_ms, env) in enumerate([("passed", 100, "dev"), ("failed", 200, "ci"),
+                                                      ("passed", 300, "dev")]):
+            _report(tmp_path / "json" / f"report_{hour}.json", f"2025-08-11 1{hour}:00:00", outcome, p95_ms, env)
+        store = ArchiveStore(str(tmp_path / "index.sqlite"))
+        store.ingest(tmp_path)
+
+        trend = [round(value, -1) for _, value in store.endpoint_trend("GET /api/equipment", "p95")]
+        assert trend == [100, 200, 300]
+        assert len(store.endpoint_trend("GET /api/equipment", "p95", last=2)) == 2
+        assert len(store.endpoint_trend("GET /api/equipment", "p95", env="dev")) == 2
+        assert [outcome for _, outcome, _ in store.test_trend(TEST_ID)] == ["passed", "failed", "passed"]
+        assert store.failures(last=3) == [(TEST_ID, 1, 3)]
+        assert store.failures(last=1) == []
+        with pytest.raises(ValueError):
+            store.endpoint_trend("GET /api/equipment", "p95; DROP TABLE runs")
+        store.close()
+
+        main(["--db", str(tmp_path / "index.sqlite"), "--archive", str(tmp_path), "failures"])
+        assert TEST_ID in capsys.readouterr().out
+
+    def test_cli_lists_tests_without_a_duration(self, tmp_path, capsys):
+        """
+        @description: a run whose report has no duration for the test is listed with "-"
+        """
+        _report(tmp_path / "report_1.json", "2025-08-11 21:00:00", "passed", 100, duration=None)
+        _report(tmp_path / "report_2.json", "2025-08-11 22:00:00", "passed", 100)
+        main(["--db", str(tmp_path / "index.sqlite"), "--archive", str(tmp_path), "test", TEST_ID])
+
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0].split()[-2:] == ["passed", "-"] and lines[1].split()[-1] == "0.250s"
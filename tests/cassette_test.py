@@ -0,0 +1,95 @@
+"""
+@Description:  Offline tests for the utils.cassette record/replay transport
+"""
+import pytest
+
+from utils.cassette import CassetteMiss, RecordingTransport, ReplayTransport
+from utils.request import ApiRequest
+from utils.stand_in_server import StandInServer
+from utils.streaming import JsonArrayStream
+
+HEADERS = {"Content-Type": "application/json"}
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    """
+    Records one create/update/list session against a stand-in server, which is gone before replay
+    """
+    path = str(tmp_path / "api.cassette")
+    with StandInServer() as server:
+        recorder = RecordingTransport(path)
+        created = ApiRequest(f"{server.url}/api/equipment", "POST", headers=HEADERS,
+                             json={"name": "Loader #111111", "status": "Idle", "location": "Site A"}).send(recorder)
+        eq_id = created.as_dict["data"]["id"]
+        ApiRequest(f"{server.url}/api/equipment/{eq_id}/status", "POST", headers=HEADERS,
+                   json={"status": "Active"}).send(recorder)
+        ApiRequest(f"{server.url}/api/equipment", "GET").send(recorder)
+        recorder.close()
+    return server.url, eq_id, path
+
+
+@pytest.mark.unit
+class TestCassette:
+
+    def test_replays_without_the_api(self, cassette):
+        """
+        @description: replayed responses match the recording and echo the new unique name
+        """
+        url, eq_id, path = cassette
+        replay = ReplayTransport(path)
+        try:
+            created = ApiRequest(f"{url}/api/equipment", "POST", headers=HEADERS,
+                                 json={"name": "Loader #222222", "status": "Idle", "location": "Site A"}).send(replay)
+            assert created.status_code == 201
+            assert created.as_dict["data"] == dict(created.as_dict["data"], id=eq_id, name="Loader #222222")
+
+            updated = ApiRequest(f"{url}/api/equipment/{eq_id}/status", "POST", headers=HEADERS,
+                                 json={"status": "Active"}).send(replay)
+            assert updated.as_dict["data"]["historyEntry"]["newStatus"] == "Active"
+
+            with ApiRequest(f"{url}/api/equipment", "GET").stream(replay) as r:
+                listing = list(JsonArrayStream(r.iter_content(16)))
+            assert [item["name"] for item in listing] == ["Loader #222222"]
+        finally:
+            replay.close()
+
+    def test_unrecorded_request_is_a_miss(self, cassette):
+        """
+        @description: a request with no recorded counterpart fails loudly instead of reaching the network
+        """
+        url, eq_id, path = cassette
+        replay = ReplayTransport(path)
+        try:
+            with pytest.raises(CassetteMiss):
+                ApiRequest(f"{url}/api/equipment/{eq_id}/history", "GET").send(replay)
+            with pytest.raises(CassetteMiss):
+                ApiRequest(f"{url}/api/equipment", "POST", headers=HEADERS,
+                           json={"name": "Loader", "status": "Active", "location": "Site A"}).send(replay)
+        finally:
+            replay.close()
+
+    def test_streamed_responses_are_recorded_as_read(self, tmp_path):
+        """
+        @description: a streamed listing is recorded without buffering it, also when the test stops reading early
+        """
+        path = str(tmp_path / "streamed.cassette")
+        with StandInServer() as server:
+            recorder = RecordingTransport(path)
+            for i in range(3):
+                ApiRequest(f"{server.url}/api/equipment", "POST", headers=HEADERS,
+                           json={"name": f"Loader {i}", "status": "Idle", "location": "Site A"}).send(recorder)
+            with ApiRequest(f"{server.url}/api/equipment", "GET").stream(recorder) as r:
+                recorded = list(JsonArrayStream(r.iter_content(16)))
+                assert r._content is False
+            with ApiRequest(f"{server.url}/api/equipment", "GET", params={"page": 1}).stream(recorder) as r:
+                next(r.iter_content(16))
+            recorder.close()
+
+        replay = ReplayTransport(path)
+        try:
+            for params in (None, {"page": 1}):
+                with ApiRequest(f"{server.url}/api/equipment", "GET", params=params).stream(replay) as r:
+                    assert list(JsonArrayStream(r.iter_content(16))) == recorded
+        finally:
+            replay.close()
@@ -2,12 +2,36 @@
 @Author:       Prashanth Sams
 @Created:      Fri Aug  10 22:55:27 2025 (-0400)
 """
+import json
 import logging
+import os
+from logging.handlers import RotatingFileHandler
 import random
 import sys
 import pytest
 
+from config import BASE_URI, ENVIRONMENTS, LIMITS
+from tests.helpers.equipment_pool import EquipmentPool
+from tests.helpers.payload_cases import create_equipment_cases
+from utils.cassette import RecordingTransport, ReplayTransport
+from utils.datagen import parse_shard
 from utils.file_reader import read_json_file
+from utils.limiter import Limiter, parse_limits
+from utils.load import LoadProfile, LoadRunner
+from utils.log import configure as configure_body_logging, start_queue_logging
+from utils.metrics import REPORTED
+from utils.regression import RegressionGate, load_baseline
+from utils.report import add_report_attributes, archive_report
+from utils.request import Transport, set_default_transport
+from utils.results_stream import ResultStream, ResultStreamPlugin, build_report, read_events, stream_paths, worker_path
+from utils.retry import RetryBudget, RetryPolicy
+from utils.scheduling import DurationScheduling, load_durations
+from utils.soak import OpenLoopRunner, SoakProfile, parse_mix
+from utils.stand_in_server import StandInServer
+
+REPORT_DIR = "report"
+# archived pytest-json reports; kept out of report/archive/*.json, which pytest-html-reporter owns
+ARCHIVE_DIR = "report/archive/json"
 
 
 @pytest.fixture
@@ -24,26 +48,35 @@ def payload():
 
 
 @pytest.fixture(scope='session')
-def logger():
+def logger(request):
     """
     This fixture is used to set up the logger for the tests.
+    Records are queued and written by a background listener thread, so a test
+    never waits on terminal or file I/O; call sites use lazy %-style arguments.
     """
+    configure_body_logging(request.config.getoption("--log-bodies"),
+                           request.config.getoption("--log-body-limit"),
+                           request.config.getoption("--log-sample-rate"))
+
     logger = logging.getLogger(__name__)
     logger.setLevel(logging.DEBUG)
 
     # show logs terminal
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.DEBUG)
-    logger.addHandler(console_handler)
 
-    # store logs in file
-    file_handler = logging.FileHandler(r'test.log', mode='w')
+    # store logs in file, starting fresh each session and capped in size
+    open(r'test.log', 'w').close()
+    file_handler = RotatingFileHandler(r'test.log', maxBytes=request.config.getoption("--log-max-bytes"),
+                                       backupCount=2)
     file_handler.setLevel(logging.DEBUG)
     formatter = logging.Formatter('%(asctime)s - %(levelname)s: %(message)s', '%m/%d/%Y %I:%M:%S %p')
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
 
-    return logger
+    listener = start_queue_logging(logger, console_handler, file_handler)
+    yield logger
+    listener.stop()
+    logger.handlers.clear()
 
 
 @pytest.hookimpl
@@ -52,6 +85,144 @@ def pytest_addoption(parser):
     This function adds a new command line option to pytest.
     """
     parser.addoption("--env", action="store", default="dev", help="run dev env tests")
+    parser.addoption("--stand-in-latency", action="store", type=float, default=0.0,
+                     help="--env=local: latency in ms injected into every stand-in response")
+    parser.addoption("--stand-in-jitter", action="store", type=float, default=0.0,
+                     help="--env=local: extra uniform random latency in ms")
+    parser.addoption("--stand-in-error-rate", action="store", type=float, default=0.0,
+                     help="--env=local: probability of an injected 500 response")
+    parser.addoption("--stand-in-seed", action="store", type=int, default=None,
+                     help="--env=local: seed for injected latency/errors")
+    parser.addoption("--equipment-pool-size", action="store", type=int, default=2,
+                     help="pre-created equipment items per status in the session equipment pool")
+    parser.addoption("--benchmark-items", action="store", type=int, default=100_000,
+                     help="size of the synthetic listing used by benchmark tests")
+    parser.addoption("--pool-maxsize", action="store", type=int, default=32,
+                     help="max keep-alive connections per host in the shared transport")
+    parser.addoption("--datadriven-cases", action="store", type=int, default=0,
+                     help="seeded random payload combinations generated on top of the single-field variants")
+    parser.addoption("--datadriven-seed", action="store", type=int, default=0,
+                     help="seed of the generated payload combinations; case ids depend on it")
+    parser.addoption("--datadriven-shard", action="store", default=None,
+                     help="i/n: run only the generated cases whose id hashes to shard i of n")
+    parser.addoption("--limits", action="store", default=None,
+                     help="client-side limits overriding config.LIMITS for --env, e.g. "
+                          "'rate=20,burst=5,max_concurrency=8', or 'off'")
+    parser.addoption("--retries", action="store", type=int, default=2,
+                     help="extra attempts for a failed request that is safe to repeat; 0 disables retries")
+    parser.addoption("--retry-backoff", action="store", type=float, default=0.1,
+                     help="seconds of the first retry's backoff ceiling; doubles per retry, full jitter")
+    parser.addoption("--retry-max-wait", action="store", type=float, default=5.0,
+                     help="longest backoff or Retry-After in seconds; a longer Retry-After is not waited for")
+    parser.addoption("--retry-budget", action="store", type=float, default=0.1,
+                     help="session-wide retries allowed per request sent, on top of a reserve of 10")
+    parser.addoption("--load-users", action="store", type=int, default=4, help="virtual users for performance tests")
+    parser.addoption("--load-duration", action="store", type=float, default=5.0,
+                     help="measured seconds per performance test")
+    parser.addoption("--load-warmup", action="store", type=float, default=1.0,
+                     help="warm-up seconds discarded before measuring")
+    parser.addoption("--load-ramp", action="store", type=float, default=1.0,
+                     help="seconds over which virtual users are started")
+    parser.addoption("--contention-levels", action="store", default="1,4,16",
+                     help="concurrent writer counts (K) the status contention tests step through")
+    parser.addoption("--contention-updates", action="store", type=int, default=10,
+                     help="status updates sent by each contention writer")
+    parser.addoption("--contention-hot-set", action="store", type=int, default=4,
+                     help="equipment ids shared by the writers of the hot-set contention test")
+    parser.addoption("--soak-duration", action="store", type=float, default=0.0,
+                     help="seconds of open-loop soak traffic; the soak test is skipped while this is 0")
+    parser.addoption("--soak-rate", action="store", type=float, default=20.0,
+                     help="soak requests started per second, all scenarios together")
+    parser.addoption("--soak-mix", action="store", default="list=4,create=1,status=3,history=2",
+                     help="soak scenario weights as name=weight,...")
+    parser.addoption("--soak-bucket", action="store", type=float, default=10.0,
+                     help="seconds per point of the soak throughput/latency series")
+    parser.addoption("--soak-max-in-flight", action="store", type=int, default=32,
+                     help="concurrent soak requests; later ones wait (and their latency counts it)")
+    parser.addoption("--soak-series", action="store", default="report/soak/series.jsonl",
+                     help="JSONL file the soak series is appended to as each bucket closes")
+    parser.addoption("--log-bodies", action="store", default="truncated", choices=("off", "truncated", "full"),
+                     help="how request/response bodies are logged")
+    parser.addoption("--log-body-limit", action="store", type=int, default=2048,
+                     help="characters kept per body with --log-bodies=truncated")
+    parser.addoption("--log-sample-rate", action="store", type=float, default=1.0,
+                     help="fraction of bodies that are logged at all")
+    parser.addoption("--log-max-bytes", action="store", type=int, default=10 * 1024 * 1024,
+                     help="size at which test.log rolls over (two backups are kept)")
+    parser.addoption("--cassette-mode", action="store", default="off", choices=("off", "record", "replay"),
+                     help="record API traffic to --cassette, or replay it instead of calling the API")
+    parser.addoption("--cassette", action="store", default="tests/data/cassettes/api.cassette",
+                     help="cassette file for --cassette-mode")
+    parser.addoption("--perf-baseline-runs", action="store", type=int, default=10,
+                     help="archived runs against the same --env merged into the latency baseline")
+    parser.addoption("--perf-alpha", action="store", type=float, default=0.01,
+                     help="significance level of the latency regression test")
+    parser.addoption("--perf-min-effect", action="store", type=float, default=0.2,
+                     help="smallest rank-biserial effect size counted as a regression")
+    parser.addoption("--perf-min-delta-ms", action="store", type=float, default=10.0,
+                     help="smallest p95 shift in ms counted as a regression")
+    parser.addoption("--result-stream", action="store", default="report/stream/results.jsonl",
+                     help="JSONL file every test and latency observation is appended to as it happens; "
+                          "empty to disable")
+    parser.addoption("--result-stream-flush", action="store", type=float, default=1.0,
+                     help="seconds between flushes of the result stream to disk")
+    parser.addoption("--perf-min-ratio", action="store", type=float, default=0.1,
+                     help="smallest p95 shift, relative to the baseline p95, counted as a regression")
+
+
+@pytest.hookimpl
+def pytest_configure(config):
+    """
+    Opens this process's result stream; the controller first removes the
+    per-worker files of an earlier run.
+    """
+    path = config.getoption("--result-stream")
+    if not path:
+        return
+    if not hasattr(config, "workerinput"):
+        for stale in stream_paths(path):
+            os.remove(stale)
+    stream = ResultStream(worker_path(path), config.getoption("--result-stream-flush"))
+    config.pluginmanager.register(ResultStreamPlugin(stream, config.getoption("--env")), "result-stream")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
+    """
+    Performance and soak tests share one xdist group so load runs never overlap each other,
+    and are skipped with --cassette-mode, which neither records nor replays latency. They are
+    the only group: other tests write only equipment leased to them from their worker's pool.
+    """
+    skip = pytest.mark.skip(reason="performance tests do not run with --cassette-mode")
+    for item in items:
+        if "performance" in item.keywords or "soak" in item.keywords:
+            item.add_marker(pytest.mark.xdist_group("performance"))
+            if config.getoption("--cassette-mode") != "off":
+                item.add_marker(skip)
+
+
+def pytest_generate_tests(metafunc):
+    """
+    Tests taking `payload_case` run once per single-field POST /api/equipment variant from
+    tests.helpers.payload_cases. Every case becomes a collected item, so the --datadriven-cases
+    combinations are not parametrized: `payload_combinations` hands them to one test instead.
+    Case ids are stable, so --datadriven-shard splits both the same way on every machine.
+    """
+    if "payload_case" not in metafunc.fixturenames:
+        return
+    cases = create_equipment_cases(shard=parse_shard(metafunc.config.getoption("--datadriven-shard")))
+    metafunc.parametrize("payload_case", cases, ids=str)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    """
+    --dist=loadgroup: keep xdist groups together and start the longest units first,
+    using the per-test durations archived by previous runs.
+    """
+    if config.getvalue("dist") != "loadgroup":
+        return None
+    return DurationScheduling(config, log, load_durations(config.rootpath / REPORT_DIR))
 
 
 @pytest.fixture(scope="session")
@@ -60,3 +231,197 @@ def env(request):
     This function returns the environment.
     """
     return request.config.getoption("--env")
+
+
+@pytest.fixture(scope="session")
+def base_uri(request, env):
+    """
+    Base URI of the API under test; --env=local starts the in-process stand-in server.
+    """
+    if env != "local" or request.config.getoption("--cassette-mode") == "replay":
+        yield ENVIRONMENTS.get(env) or BASE_URI
+        return
+
+    config = request.config
+    server = StandInServer(
+        latency_ms=config.getoption("--stand-in-latency"),
+        jitter_ms=config.getoption("--stand-in-jitter"),
+        error_rate=config.getoption("--stand-in-error-rate"),
+        seed=config.getoption("--stand-in-seed"),
+    )
+    with server:
+        yield server.url
+
+
+def _cassette_path(config):
+    """
+    xdist workers each record their own file; replay picks all of them up
+    """
+    return worker_path(config.getoption("--cassette"))
+
+
+def _limiter(config):
+    """
+    The --env's client-side limits (or --limits), split evenly over the xdist workers
+    """
+    option = config.getoption("--limits")
+    limits = parse_limits(option) if option is not None else LIMITS.get(config.getoption("--env"))
+    workers = getattr(config, "workerinput", {}).get("workercount", 1)
+    if limits and workers > 1:
+        limits = dict(limits)
+        for key in ("rate", "burst", "initial_concurrency", "max_concurrency"):
+            if limits.get(key):
+                limits[key] = max(limits[key] / workers, 1)
+    return Limiter.from_limits(limits)
+
+
+@pytest.fixture(scope="session")
+def transport(request):
+    """
+    Session-wide keep-alive transport; every ApiRequest reuses its connection pool,
+    retries under one policy and retry budget, and waits for the --env's limiter.
+    """
+    config = request.config
+    mode = config.getoption("--cassette-mode")
+    retry = RetryPolicy(retries=config.getoption("--retries"),
+                        backoff=config.getoption("--retry-backoff"),
+                        max_wait=config.getoption("--retry-max-wait"),
+                        budget=RetryBudget(ratio=config.getoption("--retry-budget")))
+    if mode == "record":
+        transport = RecordingTransport(_cassette_path(config), pool_maxsize=config.getoption("--pool-maxsize"),
+                                       retry=retry, limiter=_limiter(config))
+    elif mode == "replay":
+        transport = ReplayTransport(config.getoption("--cassette"))
+    else:
+        transport = Transport(pool_maxsize=config.getoption("--pool-maxsize"), retry=retry,
+                              limiter=_limiter(config))
+    set_default_transport(transport)
+    yield transport
+    set_default_transport(None)
+    transport.close()
+
+
+@pytest.fixture(scope="session")
+def load_runner(request, transport):
+    """
+    Load engine shared by the performance tests, shaped by the --load-* options.
+    """
+    profile = LoadProfile(
+        users=request.config.getoption("--load-users"),
+        duration=request.config.getoption("--load-duration"),
+        warmup=request.config.getoption("--load-warmup"),
+        ramp_up=request.config.getoption("--load-ramp"),
+    )
+    return LoadRunner(profile, transport)
+
+
+@pytest.fixture(scope="session")
+def contention(request):
+    """
+    Shape of the status-update contention tests, from the --contention-* options.
+    """
+    config = request.config
+    return {
+        "levels": [int(k) for k in config.getoption("--contention-levels").split(",") if k.strip()],
+        "updates": config.getoption("--contention-updates"),
+        "hot_set": config.getoption("--contention-hot-set"),
+    }
+
+
+@pytest.fixture
+def soak_runner(request, transport):
+    """
+    Open-loop soak engine shaped by the --soak-* options; skips the test while --soak-duration is 0.
+    """
+    config = request.config
+    if config.getoption("--soak-duration") <= 0:
+        pytest.skip("soak runs only with --soak-duration (see `invoke soak`)")
+    profile = SoakProfile(
+        rate=config.getoption("--soak-rate"),
+        duration=config.getoption("--soak-duration"),
+        mix=parse_mix(config.getoption("--soak-mix")),
+        bucket=config.getoption("--soak-bucket"),
+        max_in_flight=config.getoption("--soak-max-in-flight"),
+    )
+    return OpenLoopRunner(profile, transport)
+
+
+@pytest.fixture(scope="session")
+def payload_combinations(request):
+    """
+    The --datadriven-cases seeded POST /api/equipment combinations in this --datadriven-shard,
+    as a lazy utils.datagen.CaseSet to be read in slices.
+    """
+    config = request.config
+    return create_equipment_cases(extra=config.getoption("--datadriven-cases"),
+                                  seed=config.getoption("--datadriven-seed"),
+                                  shard=parse_shard(config.getoption("--datadriven-shard")), singles=False)
+
+
+@pytest.fixture(scope="session")
+def perf_gate(request, env):
+    """
+    Compares load results with the latency baseline of earlier runs against the same --env.
+    """
+    config = request.config
+    baseline = load_baseline(config.rootpath / ARCHIVE_DIR, env, runs=config.getoption("--perf-baseline-runs"))
+    return RegressionGate(baseline, alpha=config.getoption("--perf-alpha"),
+                          min_effect=config.getoption("--perf-min-effect"),
+                          min_delta_ms=config.getoption("--perf-min-delta-ms"),
+                          min_ratio=config.getoption("--perf-min-ratio"))
+
+
+@pytest.fixture(scope="session")
+def equipment_pool(request, base_uri, transport, logger):
+    """
+    Session stock of freshly created equipment; filled concurrently on first use.
+    """
+    pool = EquipmentPool(base_uri, transport, per_status=request.config.getoption("--equipment-pool-size"), log=logger)
+    pool.fill()
+    yield pool
+    pool.close()
+    logger.info("Equipment pool: %s leased / %s created", pool.leased, pool.created)
+
+
+@pytest.fixture
+def lease_equipment(equipment_pool):
+    """
+    Leases fresh equipment from the session pool: lease_equipment(status="Idle") -> item dict.
+    """
+    return equipment_pool.lease
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """
+    xdist controller: fold each worker's histograms into the session registries.
+    """
+    worker_metrics = getattr(node, "workeroutput", {}).get("metrics", {})
+    for name, metrics in REPORTED.items():
+        metrics.merge(worker_metrics.get(name, {}))
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_sessionfinish(session):
+    """
+    Workers hand their histograms to the controller; the controller (or a
+    non-distributed run) writes them into the JSON report's attributes and
+    archives the report as a future latency baseline. With pytest-json
+    disabled (-p no:json) the report is built from the result stream instead.
+    """
+    config = session.config
+    serialized = {name: metrics.to_dict() for name, metrics in REPORTED.items()}
+    if hasattr(config, "workeroutput"):
+        config.workeroutput["metrics"] = serialized
+        return
+    if hasattr(config, "_json"):
+        json_path = config._json.json_path
+    elif config.pluginmanager.has_plugin("result-stream"):
+        json_path = os.path.join(os.path.dirname(config.getoption("--result-stream")), "report.json")
+        config.pluginmanager.get_plugin("result-stream").stream.flush()
+        with open(json_path, "w", encoding="utf-8") as json_file:
+            json.dump(build_report(read_events(config.getoption("--result-stream"))), json_file)
+    else:
+        return
+    add_report_attributes(json_path, env=config.getoption("--env"), **serialized)
+    archive_report(json_path, config.rootpath / ARCHIVE_DIR)
@@ -5,27 +5,24 @@
 import json
 import uuid
 import pytest
-import requests
 import time
 import jsonpath as jp
 
 from jsonpath_ng import parse as rw_parse
-from config import BASE_URI
 from tests.data.schema.create_new_equipment import _ok_schema, _err_schema
 from tests.helpers.hooks import Api
-from datetime import datetime, timezone
+from tests.helpers.naming import unique_name
+from utils.log import LazyBody
+from utils.request import ApiRequest, send_all
+from utils.schema import validator_for
+from utils.waiter import wait_until
 
 from requests.structures import CaseInsensitiveDict
 from assertpy import assert_that
-from cerberus import Validator
 
 
 ALLOWED_STATUS = {"Active", "Idle", "Under Maintenance"}
 
-def _unique_name(base: str) -> str:
-    suffix = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f")[-6:]
-    return f"{base} #{suffix}"
-
 
 # ============================================================
 # POST /api/equipment suite
@@ -52,17 +49,17 @@ class TestCreateNewEquipment(Api):
         """
         base = base_payloads[idx]
         payload = dict(base)
-        payload["name"] = _unique_name(base["name"])
+        payload["name"] = unique_name(base["name"])
 
-        self.log.info(f"Request\n\turl: {BASE_URI}/api/equipment\n\theaders: {get_headers}\n\tpayload: {payload}")
-        r = requests.post(
-            f"{BASE_URI}/api/equipment",
+        self.log.info("Request\n\turl: %s/api/equipment\n\theaders: %s\n\tpayload: %s", self.base_uri, get_headers, LazyBody(payload))
+        r = ApiRequest(
+            f"{self.base_uri}/api/equipment",
+            "POST",
             headers=get_headers,
             json=payload,
-            verify=True,
-        )
-        body = r.json()
-        self.log.info(f"Response\n\t{body}")
+        ).send(self.transport)
+        body = r.as_dict
+        self.log.info("Response\n\t%s", LazyBody(body))
 
         assert r.status_code == 201, f"Unexpected status: {r.status_code}"
         assert r.headers["Content-Type"].startswith("application/json")
@@ -80,16 +77,15 @@ class TestCreateNewEquipment(Api):
         assert isinstance(item["id"], int)
 
         created_id = item["id"]
-        found = False
-        for _ in range(10):  # Retry up to 10 times
-            get_r = requests.get(f"{BASE_URI}/api/equipment", headers=get_headers, verify=True)
-            get_body = get_r.json()
-            created_ids = [i["id"] for i in get_body.get("data", [])]
-            if created_id in created_ids:
-                found = True
-                break
-            time.sleep(0.5)  # Wait 0.5 seconds before retrying
-        assert found, "Created equipment not found via GET"
+        listing = ApiRequest(f"{self.base_uri}/api/equipment", "GET", headers=get_headers)
+        result = wait_until(
+            lambda: listing.send(self.transport),
+            lambda get_r: created_id in [i["id"] for i in get_r.as_dict.get("data", [])],
+            timeout=5,
+            name="POST /api/equipment -> GET /api/equipment",
+        )
+        self.log.info("Visible via GET after %.1f ms (%s attempts)", result.elapsed_ms, result.attempts)
+        assert result.ok, "Created equipment not found via GET"
 
     @pytest.mark.schema
     def test_create_equipment_schema(self, get_headers):
@@ -97,17 +93,17 @@ class TestCreateNewEquipment(Api):
         @description: Validate response schema for POST /api/equipment
         """
         payload = {
-            "name": _unique_name("Loader JCB 3DX"),
+            "name": unique_name("Loader JCB 3DX"),
             "status": "Active",
             "location": "Site D",
         }
-        self.log.info(f"Request\n\turl: {BASE_URI}/api/equipment\n\theaders: {get_headers}\n\tpayload: {payload}")
-        r = requests.post(f"{BASE_URI}/api/equipment", headers=get_headers, json=payload, verify=True)
-        body = r.json()
-        self.log.info(f"Response\n\t{body}")
+        self.log.info("Request\n\turl: %s/api/equipment\n\theaders: %s\n\tpayload: %s", self.base_uri, get_headers, LazyBody(payload))
+        r = ApiRequest(f"{self.base_uri}/api/equipment", "POST", headers=get_headers, json=payload).send(self.transport)
+        body = r.as_dict
+        self.log.info("Response\n\t%s", LazyBody(body))
 
         ## Validate response schema
-        v = Validator(_ok_schema, require_all=True)
+        v = validator_for(_ok_schema)
         assert v.validate(body), f"Schema errors: {v.errors}"
     
     @pytest.mark.schema
@@ -124,17 +120,17 @@ class TestCreateNewEquipment(Api):
         """
         # Make names unique when present
         if "name" in payload and payload["name"]:
-            payload = dict(payload, name=_unique_name(payload["name"]))
+            payload = dict(payload, name=unique_name(payload["name"]))
 
-        self.log.info(f"Request\n\turl: {BASE_URI}/api/equipment\n\theaders: {get_headers}\n\tpayload: {payload}")
-        r = requests.post(f"{BASE_URI}/api/equipment", headers=get_headers, json=payload, verify=True)
-        self.log.info(f"POST 400 payload={payload} status={r.status_code} body={r.text}")
+        self.log.info("Request\n\turl: %s/api/equipment\n\theaders: %s\n\tpayload: %s", self.base_uri, get_headers, LazyBody(payload))
+        r = ApiRequest(f"{self.base_uri}/api/equipment", "POST", headers=get_headers, json=payload).send(self.transport)
+        self.log.info("POST 400 payload=%s status=%s body=%s", LazyBody(payload), r.status_code, LazyBody(r.content))
 
         assert r.status_code == 400
         assert r.headers["Content-Type"].startswith("application/json")
 
-        body = r.json()
-        v = Validator(_err_schema, require_all=True)
+        body = r.as_dict
+        v = validator_for(_err_schema)
         assert v.validate(body), f"Schema errors: {v.errors}"
 
     @pytest.mark.datadriven
@@ -142,23 +138,26 @@ class TestCreateNewEquipment(Api):
         """
         @description: Create multiple items and assert count increases accordingly
         """
-        self.log.info(f"Request\n\turl: {BASE_URI}/api/equipment\n\theaders: {get_headers}")
-        start_r = requests.get(f"{BASE_URI}/api/equipment", headers=get_headers, verify=True)
-        start_body = start_r.json()
+        self.log.info("Request\n\turl: %s/api/equipment\n\theaders: %s", self.base_uri, get_headers)
+        start_r = ApiRequest(f"{self.base_uri}/api/equipment", "GET", headers=get_headers).send(self.transport)
+        start_body = start_r.as_dict
         start_count = start_body.get("count", len(start_body.get("data", [])))
 
+        payloads = [dict(base, name=unique_name(base["name"])) for base in base_payloads]
+        batch = [
+            ApiRequest(f"{self.base_uri}/api/equipment", "POST", headers=get_headers, json=payload)
+            for payload in payloads
+        ]
+
         created = []
-        for base in base_payloads:
-            payload = dict(base)
-            payload["name"] = _unique_name(base["name"])
-            r = requests.post(f"{BASE_URI}/api/equipment", headers=get_headers, json=payload, verify=True)
-            self.log.info(f"POST payload: {payload} -> status {r.status_code}")
+        for payload, r in zip(payloads, send_all(batch, transport=self.transport)):
+            self.log.info("POST payload: %s -> status %s", LazyBody(payload), r.status_code)
 
             assert r.status_code == 201, f"Unexpected status: {r.status_code}"
-            created.append(r.json()["data"]["id"])
+            created.append(r.as_dict["data"]["id"])
 
-        end_r = requests.get(f"{BASE_URI}/api/equipment", headers=get_headers, verify=True)
-        end_body = end_r.json()
+        end_r = ApiRequest(f"{self.base_uri}/api/equipment", "GET", headers=get_headers).send(self.transport)
+        end_body = end_r.as_dict
         end_count = end_body.get("count", len(end_body.get("data", [])))
 
         assert end_count >= start_count + len(created), (
@@ -170,15 +169,97 @@ class TestCreateNewEquipment(Api):
             assert cid in end_ids, f"Created id {cid} not found in listing"
 
     @pytest.mark.performance
-    def test_create_equipment_response_time(self, get_headers):
+    def test_create_equipment_response_time(self, get_headers, load_runner, perf_gate):
         """
         @description: Test performance for POST /api/equipment
         """
-        payload = {"name": _unique_name("Skid Steer S70"), "status": "Idle", "location": "Site Z"}
-        self.log.info(f"Request\n\turl: {BASE_URI}/api/equipment\n\theaders: {get_headers}\n\tpayload: {payload}")
-        r = requests.post(f"{BASE_URI}/api/equipment", headers=get_headers, json=payload, verify=True)
-        elapsed_ms = r.elapsed.total_seconds() * 1000
-        self.log.info(f"POST time: {elapsed_ms:.1f} ms, status={r.status_code}")
+        def _create():
+            payload = {"name": unique_name("Skid Steer S70"), "status": "Idle", "location": "Site Z"}
+            return ApiRequest(f"{self.base_uri}/api/equipment", "POST", headers=get_headers, json=payload)
+
+        self.log.info("Load\n\turl: %s/api/equipment\n\tprofile: %s", self.base_uri, load_runner.profile)
+        stats = load_runner.run({"POST /api/equipment": _create})["POST /api/equipment"]
+        self.log.info(stats.summary())
+
+        assert stats.count > 0, "No samples collected"
+        assert stats.errors == 0, f"{stats.errors} failed requests, first: {stats.failures}"
+        verdict = perf_gate.check(stats, budget_ms=700)
+        self.log.info(verdict.summary())
+        assert not verdict.failed, verdict.summary()
+
+
+# ============================================================
+# POST /api/equipment generated payloads
+# ============================================================
+COMBINATION_CHUNK = 500
+
+
+def _generated_payload(case):
+    """
+    The payload to send for `case`; known-good ones get a unique name, like the rest of the suite
+    """
+    payload = case.payload
+    if case.expected and isinstance(payload.get("name"), str):
+        payload["name"] = unique_name(payload["name"])
+    return payload
+
+
+def _generated_case_problem(case, payload, r):
+    """
+    What is wrong with the response `r` to the generated `case` (sent as `payload`), or None.
+    Known-good cases must be created and echoed back, known-bad ones rejected; for the other
+    (boundary) cases the API may do either, but must answer 201 or 400 with a well-formed body.
+    """
+    allowed = {True: (201,), False: (400,), None: (201, 400)}[case.expected]
+    if r.status_code not in allowed:
+        return f"{case}: unexpected status {r.status_code}, expected {' or '.join(map(str, allowed))}"
+    v = validator_for(_ok_schema if r.status_code == 201 else _err_schema)
+    if not v.validate(r.as_dict):
+        return f"{case}: schema errors {v.errors}"
+    if case.expected:
+        created = r.as_dict["data"]
+        if {key: created.get(key) for key in payload} != payload:
+            return f"{case}: created {LazyBody(created)} does not echo {LazyBody(payload)}"
+    return None
+
+
+@pytest.mark.datadriven
+class TestCreateEquipmentGenerated(Api):
+    """
+    POST /api/equipment with payloads generated from tests/data/payload.json and the request schema;
+    --datadriven-cases adds random combinations, --datadriven-shard splits them over runs
+    """
+
+    def test_create_equipment_generated_payload(self, def_headers, payload_case):
+        """
+        @description: Known-good variants are created and echoed back (201), known-bad ones get a 400 error
+        body; boundary variants get either, with a well-formed body
+        """
+        payload = _generated_payload(payload_case)
+        r = ApiRequest(f"{self.base_uri}/api/equipment", "POST", headers=def_headers, json=payload).send(self.transport)
+        self.log.info("POST %s payload=%s -> %s %s", payload_case, LazyBody(payload), r.status_code, LazyBody(r.content))
+
+        problem = _generated_case_problem(payload_case, payload, r)
+        assert problem is None, problem
+
+    def test_create_equipment_generated_combinations(self, def_headers, payload_combinations):
+        """
+        @description: The --datadriven-cases random combinations, sent in chunks; only one chunk of cases
+        and responses is held at a time
+        """
+        if not payload_combinations:
+            pytest.skip("no --datadriven-cases combinations in this shard")
+        problems, total = [], len(payload_combinations)
+        for start in range(0, total, COMBINATION_CHUNK):
+            cases = payload_combinations[start:start + COMBINATION_CHUNK]
+            payloads = [_generated_payload(case) for case in cases]
+            batch = [ApiRequest(f"{self.base_uri}/api/equipment", "POST", headers=def_headers, json=payload)
+                     for payload in payloads]
+            for case, payload, r in zip(cases, payloads, send_all(batch, transport=self.transport)):
+                problem = _generated_case_problem(case, payload, r)
+                if problem is not None:
+                    problems.append(problem)
+            self.log.info("combinations %s-%s of %s: %s problems so far", start + 1,
+                          min(start + COMBINATION_CHUNK, total), total, len(problems))
 
-        assert elapsed_ms <= 700, f"Slow POST: {elapsed_ms:.1f} ms"
-        
\ No newline at end of file
+        assert not problems, f"{len(problems)} of {total} combinations failed, e.g. {problems[:10]}"
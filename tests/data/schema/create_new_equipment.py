@@ -17,4 +17,11 @@ _ok_schema = {
 _err_schema = {
     "success": {"type": "boolean", "allowed": [False], "required": True},
     "error": {"type": "string", "required": True},
-}
\ No newline at end of file
+}
+
+# request body of POST /api/equipment; the generated data-driven cases (tests.helpers.payload_cases) probe it
+_request_schema = {
+    "name": {"type": "string", "minlength": 1, "regex": r"(?s).*\S.*"},
+    "status": {"type": "string", "allowed": sorted(ALLOWED_STATUS)},
+    "location": {"type": "string", "minlength": 1, "regex": r"(?s).*\S.*"},
+}
@@ -0,0 +1,125 @@
+"""
+@Description:  Offline tests for the generated data-driven cases in utils.datagen
+"""
+import tracemalloc
+
+import pytest
+
+from tests.helpers.payload_cases import create_equipment_cases
+from utils import schema as schema_module
+from utils.datagen import MISSING, CaseSet, field_variants, parse_shard
+
+
+@pytest.mark.unit
+class TestDataGen:
+
+    def test_variants_follow_the_rules(self):
+        """
+        @description: allowed values and their near misses, length boundaries, wrong type, null and missing
+        """
+        status = dict(field_variants({"type": "string", "allowed": ["Active", "Idle"]}))
+        assert status["active"] == "Active" and status["idle"] == "Idle"
+        assert status["lower"] == "active" and status["padded"] == " Active " and status["missing"] is MISSING
+
+        name = dict(field_variants({"type": "string", "minlength": 2, "maxlength": 5}))
+        assert (name["min"], name["below-min"], name["max"], name["above-max"]) == ("AA", "A", "AAAAA", "AAAAAA")
+        assert name["number"] == 42 and name["null"] is None
+
+        count = dict(field_variants({"type": "integer", "min": 0, "max": 10}))
+        assert (count["min"], count["below-min"], count["max"], count["above-max"]) == (0, -1, 10, 11)
+
+    def test_template_is_completed_with_valid_values(self):
+        """
+        @description: template fields that are missing or invalid under the schema start from a valid variant
+        """
+        template = CaseSet({"name": "", "location": "Yard 7"}, {
+            "name": {"type": "string", "minlength": 1},
+            "status": {"type": "string", "allowed": ["Idle", "Active"]},
+            "location": {"type": "string", "minlength": 1},
+        }).template
+        assert template == {"name": "A", "status": "Active", "location": "Yard 7"}
+
+    def test_expected_outcome_is_the_schema_verdict(self):
+        """
+        @description: single-field variants are judged by the request schema; missing drops the key
+        """
+        cases = {case.id: case for case in create_equipment_cases()}
+        assert cases["name-min"].valid and cases["status-under-maintenance"].valid and cases["location-unicode"].valid
+        for invalid in ("name-blank", "name-below-min", "status-lower", "status-padded", "location-null"):
+            assert not cases[invalid].valid, invalid
+        assert "location" not in cases["location-missing"].payload
+        assert cases["status-idle"].payload == {"name": "Excavator CAT 320", "status": "Idle",
+                                                "location": "Site A"}
+
+    def test_only_established_variants_have_an_expected_outcome(self):
+        """
+        @description: variants the hand-written suite covers expect 201 or 400; boundary probes expect neither
+        """
+        cases = {case.id: case for case in create_equipment_cases(extra=200)}
+        assert cases["status-idle"].expected is True and cases["status-under-maintenance"].expected is True
+        assert cases["status-unknown"].expected is False and cases["name-missing"].expected is False
+        for probe in ("name-padded", "name-long", "name-unicode", "status-lower", "location-missing"):
+            assert cases[probe].expected is None, probe
+        mixes = [case for case in cases.values() if case.id.startswith("mix-")]
+        assert all(case.expected is None for case in mixes if "name.missing" not in case.id
+                   and "status.unknown" not in case.id)
+        assert all(case.expected is False for case in mixes if "status.unknown" in case.id)
+
+    def test_ids_are_stable_and_unique(self):
+        """
+        @description: the same seed always yields the same ids and payloads; another seed other combinations
+        """
+        first = create_equipment_cases(extra=500, seed=7)
+        second = create_equipment_cases(extra=500, seed=7)
+        ids = [case.id for case in first]
+        assert ids == [case.id for case in second]
+        assert first[-1].payload == second[-1].payload
+        assert len(set(ids)) == len(ids) == 529
+        assert ids[29:] != [case.id for case in create_equipment_cases(extra=500, seed=8)][29:]
+
+    def test_shards_partition_the_cases(self):
+        """
+        @description: every case falls in exactly one shard of n, the same one on every run
+        """
+        all_ids = {case.id for case in create_equipment_cases(extra=2000)}
+        shards = [{case.id for case in create_equipment_cases(extra=2000, shard=parse_shard(f"{i}/4"))}
+                  for i in range(1, 5)]
+        assert set().union(*shards) == all_ids
+        assert sum(len(shard) for shard in shards) == len(all_ids)
+        assert all(len(shard) > len(all_ids) / 8 for shard in shards)
+        with pytest.raises(ValueError):
+            parse_shard("5/4")
+
+    def test_large_case_sets_are_lazy(self):
+        """
+        @description: 100k cases cost next to nothing until they are read; each is built on access
+        """
+        tracemalloc.start()
+        cases = CaseSet({"name": "x"}, {"name": {"type": "string", "minlength": 1}}, extra=100_000)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert len(cases) == 100_000 + len(field_variants({"type": "string", "minlength": 1}))
+        assert peak < 100_000
+        assert cases[-1].id.startswith("mix-099999-") and cases[-1].id == cases[len(cases) - 1].id
+
+    def test_case_sets_do_not_grow_the_validator_cache(self):
+        """
+        @description: per-field template checks are not cached by validator_for, so repeated CaseSets stay flat
+        """
+        schema = {"name": {"type": "string", "minlength": 1}, "status": {"type": "string", "allowed": ["Idle"]}}
+        CaseSet({}, schema)
+        size = len(schema_module._compiled)  # pylint: disable=protected-access
+        for _ in range(20):
+            CaseSet({}, schema)
+        assert len(schema_module._compiled) == size  # pylint: disable=protected-access
+
+    def test_combinations_only(self):
+        """
+        @description: singles=False keeps the same combination ids, without the single-field variants
+        """
+        everything = create_equipment_cases(extra=50, seed=3)
+        combinations = create_equipment_cases(extra=50, seed=3, singles=False)
+        assert [case.id for case in combinations] == [case.id for case in everything][-50:]
+        sharded = create_equipment_cases(extra=50, seed=3, shard=(0, 2), singles=False)
+        assert all(case.id.startswith("mix-") for case in sharded) and 0 < len(sharded) < 50
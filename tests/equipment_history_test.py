@@ -5,35 +5,28 @@
 import json
 import uuid
 import pytest
-import requests
 import time
 import jsonpath as jp
 
 from jsonpath_ng import parse as rw_parse
-from config import BASE_URI
 from tests.data.schema.equipment_history import _ok_schema, _err_schema
+from tests.helpers.history_crawler import crawl_history
+from tests.helpers.history_seeder import seed_history
 from tests.helpers.hooks import Api
+from utils.log import LazyBody
+from utils.request import ApiRequest
+from utils.schema import validator_for
 from datetime import datetime, timezone
 
 from requests.structures import CaseInsensitiveDict
 from assertpy import assert_that
-from cerberus import Validator
 
 
 ALLOWED_STATUS = {"Active", "Idle", "Under Maintenance"}
 
-def _unique_name(base: str) -> str:
-    suffix = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f")[-6:]
-    return f"{base} #{suffix}"
-
 def _parse_iso(ts: str) -> datetime:
     return datetime.fromisoformat(ts.replace("Z", "+00:00"))
 
-def _cycle_status(cur: str) -> str:
-    order = ["Active", "Idle", "Under Maintenance"]
-    i = order.index(cur) if cur in order else -1
-    return order[(i + 1) % len(order)]
-
 
 # ============================================================
 # GET /api/equipment/{id}/history suite
@@ -44,18 +37,6 @@ class TestGetEquipmentHistory(Api):
     def get_headers(self, def_headers):
         return def_headers
 
-    def _create_equipment(self, headers, *, name="Excavator CAT 320", status="Active", location="Site A"):
-        """
-        @description: Create a new piece of equipment.
-        """
-        payload = {"name": _unique_name(name), "status": status, "location": location}
-        self.log.info(f"CREATE equipment -> {payload}")
-        self.log.info(f"Request\n\turl: {BASE_URI}/api/equipment\n\theaders: {headers}\n\tbody: {payload}")
-        r = requests.post(f"{BASE_URI}/api/equipment", headers=headers, json=payload, verify=True)
-        assert r.status_code == 201, f"Create failed ({r.status_code}): {r.text}"
-        self.log.info(f"Response {r.status_code}: {r.text}")
-        return r.json()["data"]
-
     def _get_history(self, headers, eq_id: int, *, limit=None, offset=None):
         """
         @description: Fetch equipment history
@@ -63,51 +44,38 @@ class TestGetEquipmentHistory(Api):
         params = {}
         if limit is not None: params["limit"] = limit
         if offset is not None: params["offset"] = offset
-        self.log.info(f"Request\n\turl: {BASE_URI}/api/equipment/{eq_id}/history\n\theaders: {headers}\n\tparams: {params}")
-        url = f"{BASE_URI}/api/equipment/{eq_id}/history"
-        self.log.info(f"GET history {url} params={params}")
-        r = requests.get(url, headers=headers, params=params, verify=True)
+        self.log.info("Request\n\turl: %s/api/equipment/%s/history\n\theaders: %s\n\tparams: %s", self.base_uri, eq_id, headers, params)
+        url = f"{self.base_uri}/api/equipment/{eq_id}/history"
+        self.log.info("GET history %s params=%s", url, params)
+        r = ApiRequest(url, "GET", headers=headers, params=params).send(self.transport)
         return r
 
-    def _seed_history(self, headers, eq_id: int, start_status: str):
+    def _seed_history(self, eq_id: int, start_status: str, steps=2):
         """
         @description: Perform N transitions to ensure there is history to page over
         """
-        cur = start_status
-        actors = ["Operator John", "Technician Mike"]
-        last_response = None
-        for i in range(len(actors)):
-            cur = _cycle_status(cur)
-            self.log.info(f"Transitioning equipment {eq_id} from {cur} by {actors[i % len(actors)]}")
-
-            payload = {"status": cur, "changedBy": actors[i % len(actors)]}
-            self.log.info(f"Request\n\turl: {BASE_URI}/api/equipment/{eq_id}/status\n\theaders: {headers}\n\tbody: {payload}")
-            r = requests.post(f"{BASE_URI}/api/equipment/{eq_id}/status", headers=headers, json=payload, verify=True)
-            assert r.status_code == 200, f"Update failed ({r.status_code}): {r.text}"
-            self.log.info(f"Status updated to {cur} by {actors[i % len(actors)]}")
-            self.log.info(f"Response {r.status_code}: {r.text}")
-            last_response = r.json()["data"]
-        return last_response
+        return seed_history(self.base_uri, {eq_id: start_status}, steps=steps,
+                            transport=self.transport, log=self.log)[eq_id]
 
     @pytest.mark.status
     @pytest.mark.schema
     @pytest.mark.datavalidation
-    def test_equipment_history(self, get_headers):
+    def test_equipment_history(self, get_headers, lease_equipment):
         """
         @description: Test fetching equipment history with valid parameters
         """
-        created = self._create_equipment(get_headers, status="Active")
+        created = lease_equipment(status="Active")
         eq_id = created["id"]
 
-        self._seed_history(get_headers, eq_id, created["status"])
+        seeded = self._seed_history(eq_id, created["status"])
 
         r = self._get_history(get_headers, eq_id, limit=5, offset=0)
-        self.log.info(f"Response {r.status_code}: {r.text}")
+        self.log.info("Response %s: %s", r.status_code, LazyBody(r.content))
         assert r.status_code == 200
         assert r.headers["Content-Type"].startswith("application/json")
 
-        body = r.json()
-        v = Validator(_ok_schema, require_all=True)
+        body = r.as_dict
+        v = validator_for(_ok_schema)
         assert v.validate(body), f"Schema errors: {v.errors}"
 
         data = body["data"]
@@ -124,17 +92,64 @@ class TestGetEquipmentHistory(Api):
             assert h["newStatus"] in ALLOWED_STATUS
             _ = _parse_iso(h["timestamp"])
 
+        # Seeded transitions are all reported
+        fetched_ids = {h["id"] for h in data["history"]}
+        assert {e["id"] for e in seeded} <= fetched_ids, "Seeded history entries missing"
+
+    @pytest.mark.datavalidation
+    def test_equipment_history_deep_paging(self, get_headers, lease_equipment):
+        """
+        @description: Page through deep, concurrently seeded histories and check each status chain
+        """
+        leased = [lease_equipment(status=status) for status in ("Active", "Idle", "Under Maintenance")]
+        seeded = seed_history(self.base_uri, {it["id"]: it["status"] for it in leased}, steps=12,
+                              transport=self.transport, log=self.log)
+
+        for eq_id, expected in seeded.items():
+            report = crawl_history(self.base_uri, eq_id, limit=5, transport=self.transport)
+            self.log.info(report.summary())
+            assert not report.problems, f"Pagination problems: {report.problems}"
+
+            assert sorted(h["id"] for h in report.entries) == sorted(e["id"] for e in expected)
+            chain = sorted(report.entries, key=lambda h: h["id"])
+            for prev, nxt in zip(chain, chain[1:]):
+                assert prev["newStatus"] == nxt["previousStatus"], f"Broken status chain for {eq_id}: {prev} -> {nxt}"
+
     @pytest.mark.performance
-    def test_history_response_time(self, get_headers):
+    def test_history_response_time(self, get_headers, lease_equipment, load_runner, perf_gate):
         """
         @description: Measure the response time for fetching equipment history.
         """
-        created = self._create_equipment(get_headers, status="Active")
+        created = lease_equipment(status="Active")
         eq_id = created["id"]
-        self._seed_history(get_headers, eq_id, created["status"])
+        self._seed_history(eq_id, created["status"])
+
+        url = f"{self.base_uri}/api/equipment/{eq_id}/history"
+        self.log.info("Load\n\turl: %s\n\tprofile: %s", url, load_runner.profile)
+        stats = load_runner.run({
+            "GET /api/equipment/{id}/history": lambda: ApiRequest(url, "GET", headers=get_headers,
+                                                                  params={"limit": 5, "offset": 0}),
+        })["GET /api/equipment/{id}/history"]
+        self.log.info(stats.summary())
+
+        assert stats.count > 0, "No samples collected"
+        assert stats.errors == 0, f"{stats.errors} failed requests, first: {stats.failures}"
+        verdict = perf_gate.check(stats, budget_ms=500)
+        self.log.info(verdict.summary())
+        assert not verdict.failed, verdict.summary()
 
-        r = self._get_history(get_headers, eq_id, limit=5, offset=0)
-        elapsed_ms = r.elapsed.total_seconds() * 1000
-        self.log.info(f"HISTORY time: {elapsed_ms:.1f} ms (status={r.status_code})")
-        assert r.status_code == 200
-        assert elapsed_ms <= 500, f"Slow history retrieval: {elapsed_ms:.1f} ms"
+    @pytest.mark.performance
+    def test_history_pagination_throughput(self, get_headers, lease_equipment):
+        """
+        @description: Crawl a deep history page by page and report throughput and latency vs. offset.
+        """
+        created = lease_equipment(status="Idle")
+        eq_id = created["id"]
+        self._seed_history(eq_id, created["status"], steps=40)
+
+        report = crawl_history(self.base_uri, eq_id, limit=2, transport=self.transport)
+        self.log.info(report.summary())
+
+        assert not report.problems, f"Pagination problems: {report.problems}"
+        worst = max(ms for _, ms in report.latency_by_offset)
+        assert worst <= 500, f"Slow history page: {worst:.1f} ms"
@@ -0,0 +1,28 @@
+"""
+@Description:  Offline tests for the session equipment pool (tests/helpers/equipment_pool.py)
+"""
+import pytest
+
+from tests.helpers.equipment_pool import STATUSES, EquipmentPool
+from utils.stand_in_server import StandInServer
+
+
+@pytest.mark.unit
+class TestEquipmentPool:
+
+    def test_leases_are_unique_and_refilled(self, transport):
+        """
+        @description: Every lease is a distinct item with the requested initial status; the pool refills itself
+        """
+        with StandInServer() as server:
+            pool = EquipmentPool(server.url, transport, per_status=2, low_water=1)
+            pool.fill()
+            assert len(server.store.items) == 2 * len(STATUSES)
+
+            leased = [pool.lease(status="Idle", timeout=5) for _ in range(5)]
+            pool.close()
+
+        assert [it["status"] for it in leased] == ["Idle"] * 5
+        assert len({it["id"] for it in leased}) == 5
+        assert pool.leased == 5
+        assert pool.created > 2 * len(STATUSES)
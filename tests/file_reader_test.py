@@ -0,0 +1,58 @@
+"""
+@Description:  Offline tests for the cached fixture-data loader in utils.file_reader
+"""
+import json
+import os
+
+import pytest
+
+from utils import file_reader
+from utils.file_reader import read_json_file
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    file_reader.clear_cache()
+    yield
+    file_reader.clear_cache()
+
+
+@pytest.mark.unit
+class TestReadJsonFile:
+
+    def test_payload_resolves_independent_of_cwd(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        assert read_json_file('payload') == {"name": ""}
+
+    def test_copies_are_isolated_from_cache(self):
+        """
+        @description: Mutating a returned payload never leaks into later reads
+        """
+        first = read_json_file('payload')
+        first['name'] += 'Excavator 42'
+        assert read_json_file('payload') == {"name": ""}
+
+        frozen = read_json_file('payload', frozen=True)
+        assert frozen is read_json_file('payload', frozen=True)
+        with pytest.raises(TypeError):
+            frozen['name'] = 'x'
+
+    def test_reloads_when_file_changes(self, tmp_path):
+        """
+        @description: A cached entry is invalidated when the file's mtime/size changes
+        """
+        path = tmp_path / 'data.json'
+        path.write_text(json.dumps({"items": [1]}))
+        assert read_json_file(str(path)) == {"items": [1]}
+
+        path.write_text(json.dumps({"items": [1, 2]}))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert read_json_file(str(path)) == {"items": [1, 2]}
+
+    def test_cache_is_bounded(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(file_reader, 'CACHE_SIZE', 3)
+        for i in range(5):
+            (tmp_path / f'{i}.json').write_text(json.dumps({"i": i}))
+            read_json_file(str(tmp_path / f'{i}.json'))
+        assert len(file_reader._cache) == 3
@@ -6,14 +6,17 @@ import json
 from datetime import datetime, timezone
 
 import pytest
-import requests
 from assertpy import assert_that
-from cerberus import Validator
 import jsonpath as jp
 
-from config import BASE_URI
 from tests.data.schema.get_all_equipment import _ok_schema
 from tests.helpers.hooks import Api
+from utils.log import LazyBody
+from utils.request import ApiRequest
+from utils.schema import validator_for
+from utils.streaming import IdSet, JsonArrayStream
+
+STREAM_CHUNK = 64 * 1024
 
 
 # ============================================================
@@ -37,10 +40,10 @@ class TestGetAllEquipment(Api):
         """
         @description: Test status code for GET /api/equipment
         """
-        self.log.info(f'Request\n\turl: {BASE_URI}/api/equipment\n\theaders: {get_headers}')
-        r = requests.get(f'{BASE_URI}/api/equipment', headers=get_headers, verify=True)
+        self.log.info("Request\n\turl: %s/api/equipment\n\theaders: %s", self.base_uri, get_headers)
+        r = ApiRequest(f'{self.base_uri}/api/equipment', "GET", headers=get_headers).send(self.transport)
         body = json.loads(r.text)
-        self.log.info(f'Response\n\t{body}')
+        self.log.info("Response\n\t%s", LazyBody(body))
         
         ## Validate response code & headers
         assert r.status_code == 200
@@ -56,64 +59,73 @@ class TestGetAllEquipment(Api):
         """
         @description: Test status code for GET /api/equipment/234
         """
-        self.log.info(f'Request\n\turl: {BASE_URI}/api/equipment/234\n\theaders: {get_headers}')
-        r = requests.get(f"{BASE_URI}/api/equipment/234", headers=get_headers, verify=True)
+        self.log.info("Request\n\turl: %s/api/equipment/234\n\theaders: %s", self.base_uri, get_headers)
+        r = ApiRequest(f"{self.base_uri}/api/equipment/234", "GET", headers=get_headers).send(self.transport)
         assert r.status_code == 404
 
     @pytest.mark.datavalidation
     def test_get_all_equipment_data_validation(self, get_headers):
         """
-        @description: Test data validation for GET /api/equipment
+        @description: Test data validation for GET /api/equipment, streaming the listing item by item
         """
-        self.log.info(f'Request\n\turl: {BASE_URI}/api/equipment\n\theaders: {get_headers}')
-        r = requests.get(f"{BASE_URI}/api/equipment", headers=get_headers, verify=True)
-        body = json.loads(r.text)
-        self.log.info(f'Response\n\t{body}')
-        items = body.get("data", [])
+        ALLOWED_STATUS = {"Active", "Idle", "Under Maintenance"}
 
-        ## IDs unique
-        ids = [it["id"] for it in items] 
-        assert len(ids) == len(set(ids)), "Duplicate IDs found"
+        self.log.info("Request\n\turl: %s/api/equipment\n\theaders: %s", self.base_uri, get_headers)
+        item_validator = validator_for(_ok_schema["data"]["schema"]["schema"])
+        seen = IdSet()
 
-        ## Count matches
-        assert body["count"] == len(items)
+        with ApiRequest(f"{self.base_uri}/api/equipment", "GET", headers=get_headers).stream(self.transport) as r:
+            assert r.status_code == 200
+            listing = JsonArrayStream(r.iter_content(STREAM_CHUNK), "data")
+            for it in listing:
+                ## Schema, IDs unique
+                assert item_validator.validate(it), f"Schema errors for id={it.get('id')}: {item_validator.errors}"
+                assert seen.add(it["id"]), f"Duplicate ID found: {it['id']}"
 
-        ## Field-level checks
-        ALLOWED_STATUS = {"Active", "Idle", "Under Maintenance"}
+                ## Field-level checks
+                assert it["status"] in ALLOWED_STATUS, f"Bad status for id={it['id']}"
+                assert isinstance(it["location"], str) and it["location"].strip() != ""
+
+                ## Datetime format & not future
+                dt = datetime.fromisoformat(it["lastUpdated"].replace("Z", "+00:00"))
+                assert dt.tzinfo is not None
+                assert dt <= datetime.now(timezone.utc), f"lastUpdated is in the future for id={it['id']}"
 
-        for it in items:
-            assert it["status"] in ALLOWED_STATUS, f"Bad status for id={it['id']}"
-            assert isinstance(it["location"], str) and it["location"].strip() != ""
-            
-            ## Datetime format & not future
-            dt = datetime.fromisoformat(it["lastUpdated"].replace("Z", "+00:00"))
-            assert dt.tzinfo is not None
-            assert dt <= datetime.now(timezone.utc) + (0 * (dt - dt)), "lastUpdated is in the future?"
+        self.log.info("Response\n\tstreamed %s items, envelope: %s", listing.count, listing.envelope)
+
+        ## Count matches
+        assert listing.envelope["success"] is True
+        assert listing.envelope["count"] == listing.count
 
     @pytest.mark.schema
     def test_get_all_equipment_schema(self, get_headers):
         """
         @description: Test schema validation for GET /api/equipment
         """
-        self.log.info(f'Request\n\turl: {BASE_URI}/api/equipment\n\theaders: {get_headers}')
-        r = requests.get(f"{BASE_URI}/api/equipment", headers=get_headers, verify=True)
+        self.log.info("Request\n\turl: %s/api/equipment\n\theaders: %s", self.base_uri, get_headers)
+        r = ApiRequest(f"{self.base_uri}/api/equipment", "GET", headers=get_headers).send(self.transport)
         body = json.loads(r.text)
-        self.log.info(f'Response\n\t{body}')
+        self.log.info("Response\n\t%s", LazyBody(body))
 
         ## Validate response schema
-        validator = Validator(_ok_schema, require_all=True)
+        validator = validator_for(_ok_schema)
         is_valid = validator.validate(body)
         assert_that(is_valid, description=validator.errors).is_true()
 
     @pytest.mark.performance
-    def test_equipment_response_time(self, get_headers):
+    def test_equipment_response_time(self, get_headers, load_runner, perf_gate):
         """
         @description: Test performance for GET /api/equipment
         """
-        self.log.info(f'Request\n\turl: {BASE_URI}/api/equipment\n\theaders: {get_headers}')
-        r = requests.get(f"{BASE_URI}/api/equipment", headers=get_headers, verify=True)
-        elapsed_ms = r.elapsed.total_seconds() * 1000
-        self.log.info(f'Response time: {elapsed_ms:.1f} ms')
+        self.log.info("Load\n\turl: %s/api/equipment\n\tprofile: %s", self.base_uri, load_runner.profile)
+        stats = load_runner.run({
+            "GET /api/equipment": lambda: ApiRequest(f"{self.base_uri}/api/equipment", "GET", headers=get_headers),
+        })["GET /api/equipment"]
+        self.log.info(stats.summary())
 
         ## Performance check
-        assert elapsed_ms <= 500, f"Slow response: {elapsed_ms:.1f} ms"
+        assert stats.count > 0, "No samples collected"
+        assert stats.errors == 0, f"{stats.errors} failed requests, first: {stats.failures}"
+        verdict = perf_gate.check(stats, budget_ms=500)
+        self.log.info(verdict.summary())
+        assert not verdict.failed, verdict.summary()
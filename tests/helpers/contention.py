@@ -0,0 +1,140 @@
+"""
+@Description:  Concurrent status writers on a few equipment ids, and a serializability check of the result
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+
+from tests.helpers.history_crawler import crawl_history
+from tests.helpers.naming import unique_name
+from utils.metrics import LatencyHistogram
+from utils.request import ApiRequest
+from utils.streaming import JsonArrayStream
+
+STATUSES = ("Active", "Idle", "Under Maintenance")
+HEADERS = {"Accept": "*/*", "Content-Type": "application/json"}
+STREAM_CHUNK = 64 * 1024
+
+
+@dataclass
+class ContentionResult:
+    writers: int
+    ids: list
+    tag: str
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    errors: list = field(default_factory=list)
+    # eq_id -> [{"historyEntry": ..., "equipment": ...}] of every acknowledged update
+    acked: dict = field(default_factory=dict)
+    elapsed_s: float = 0.0
+    # total ms the writers waited in the client-side limiter; throughput is capped by it when non-zero
+    queued_ms: float = 0.0
+
+    @property
+    def completed(self):
+        return sum(len(acks) for acks in self.acked.values())
+
+    @property
+    def throughput(self):
+        return self.completed / self.elapsed_s if self.elapsed_s else 0.0
+
+    def summary(self):
+        p = {pct: self.latency.value_at_percentile(pct) for pct in (50, 95, 99)}
+        return (f"K={self.writers:<3} ids={len(self.ids)} updates={self.completed} errors={len(self.errors)} "
+                f"rps={self.throughput:.1f} p50={p[50]:.1f} p95={p[95]:.1f} p99={p[99]:.1f} "
+                f"max={self.latency.max:.1f} ms queued={self.queued_ms:.0f} ms")
+
+
+def contend(base_uri, ids, writers, updates_per_writer=10, transport=None, metrics=None, key=None):
+    """
+    @Description: Starts `writers` threads at once; writer w sends `updates_per_writer` status
+    transitions, round-robin over `ids` starting at ids[w % len(ids)]. Every update carries a unique
+    changedBy, so each acknowledgement can be found again in the history. Latencies leave out the
+    time queued in the transport's limiter and are also observed under `key` in `metrics` (a
+    utils.metrics registry) when given.
+    """
+    result = ContentionResult(writers, list(ids), unique_name("contention"))
+    result.acked = {eq_id: [] for eq_id in ids}
+    lock = threading.Lock()
+    barrier = threading.Barrier(writers + 1)
+
+    def _writer(w):
+        barrier.wait()
+        for i in range(updates_per_writer):
+            eq_id = ids[(w + i) % len(ids)]
+            payload = {"status": STATUSES[(w + i) % len(STATUSES)], "changedBy": f"{result.tag} w{w}-{i}"}
+            start = time.perf_counter()
+            r = ApiRequest(f"{base_uri}/api/equipment/{eq_id}/status", "POST", headers=HEADERS,
+                           json=payload).send(transport)
+            # time queued in the client-side limiter (utils.limiter) is ours, not the server's
+            queued = r.timing.queued if r.timing else 0.0
+            elapsed_ms = (time.perf_counter() - start) * 1000 - queued
+            with lock:
+                result.queued_ms += queued
+                result.latency.record(elapsed_ms)
+                if r.status_code == 200:
+                    result.acked[eq_id].append(r.as_dict["data"])
+                else:
+                    result.errors.append(f"{eq_id} -> {payload['status']}: {r.status_code} {r.text[:200]}")
+            if metrics is not None:
+                metrics.observe(key, elapsed_ms)
+
+    threads = [threading.Thread(target=_writer, args=(w,), daemon=True) for w in range(writers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    result.elapsed_s = time.perf_counter() - start
+    return result
+
+
+def check_serializable(base_uri, eq_id, initial_status, acks, tag, transport=None):
+    """
+    @Description: Reads the full history of `eq_id` and returns the problems found:
+    - an acknowledged update missing from the history, or recorded differently (lost update)
+    - history entries of this run that nobody was told about
+    - a break in the previousStatus -> newStatus chain, in history-id order (non-serializable)
+    - a current equipment status, read back with a GET, other than the last newStatus in the history
+    """
+    report = crawl_history(base_uri, eq_id, limit=50, transport=transport)
+    problems = list(report.problems)
+    ours = sorted((h for h in report.entries if str(h.get("changedBy", "")).startswith(f"{tag} ")),
+                  key=lambda h: h["id"])
+    by_id = {h["id"]: h for h in ours}
+
+    acked = {ack["historyEntry"]["id"]: ack for ack in acks}
+    for entry_id, ack in acked.items():
+        stored = by_id.get(entry_id)
+        sent = ack["historyEntry"]
+        if stored is None:
+            problems.append(f"lost update: acknowledged history entry {entry_id} ({sent['changedBy']}) is missing")
+        elif (stored["previousStatus"], stored["newStatus"]) != (sent["previousStatus"], sent["newStatus"]):
+            problems.append(f"entry {entry_id} acknowledged as {sent['previousStatus']} -> {sent['newStatus']} "
+                            f"but stored as {stored['previousStatus']} -> {stored['newStatus']}")
+    for entry_id in by_id.keys() - acked.keys():
+        problems.append(f"history entry {entry_id} was never acknowledged")
+
+    expected = initial_status
+    for entry in ours:
+        if entry["previousStatus"] != expected:
+            problems.append(f"chain break at entry {entry['id']}: previousStatus {entry['previousStatus']} "
+                            f"after {expected}")
+        expected = entry["newStatus"]
+
+    current = current_status(base_uri, eq_id, transport=transport)
+    if current != expected:
+        problems.append(f"equipment status is {current} after the run, history says {expected}")
+    return problems
+
+
+def current_status(base_uri, eq_id, transport=None):
+    """
+    @Description: The status GET /api/equipment lists for `eq_id` now, None if it is not listed;
+    the API has no GET /api/equipment/{id}, so the listing is streamed until the item turns up
+    """
+    with ApiRequest(f"{base_uri}/api/equipment", "GET", headers=HEADERS).stream(transport) as r:
+        for item in JsonArrayStream(r.iter_content(STREAM_CHUNK), "data"):
+            if item["id"] == eq_id:
+                return item["status"]
+    return None
@@ -0,0 +1,124 @@
+"""
+@Description:  Session-wide stock of freshly created equipment, leased one item per test
+"""
+import threading
+import time
+from collections import deque
+
+from tests.helpers.naming import unique_name
+from utils.request import ApiRequest, send_all
+
+STATUSES = ("Active", "Idle", "Under Maintenance")
+HEADERS = {"Accept": "*/*", "Content-Type": "application/json"}
+
+
+class EquipmentPool:
+    """
+    @Description: Creates `per_status` items for every status up front with one
+    concurrent batch of POST /api/equipment, then hands each one out exactly
+    once. When a status drops below `low_water` the pool tops itself up on a
+    background thread so tests rarely wait on a setup write.
+    """
+
+    def __init__(self, base_uri, transport=None, per_status=2, low_water=1, concurrency=8,
+                 name="Excavator CAT 320", location="Site A", log=None):
+        self.base_uri = base_uri
+        self.transport = transport
+        self.per_status = per_status
+        self.low_water = low_water
+        self.concurrency = concurrency
+        self.name = name
+        self.location = location
+        self.log = log
+        self.leased = 0
+        self.created = 0
+        self._available = {status: deque() for status in STATUSES}
+        self._cond = threading.Condition()
+        self._refill = None
+        self._error = None
+
+    def _create(self, statuses):
+        batch = [
+            ApiRequest(f"{self.base_uri}/api/equipment", "POST", headers=HEADERS, json={
+                "name": unique_name(f"{self.name} pool"),
+                "status": status,
+                "location": self.location,
+            })
+            for status in statuses
+        ]
+        items = []
+        for r in send_all(batch, concurrency=self.concurrency, transport=self.transport):
+            assert r.status_code == 201, f"Create failed ({r.status_code}): {r.text}"
+            items.append(r.as_dict["data"])
+        return items
+
+    def fill(self):
+        """
+        @Description: Tops every status up to `per_status` available items
+        """
+        with self._cond:
+            needed = [s for s in STATUSES for _ in range(self.per_status - len(self._available[s]))]
+        if not needed:
+            return
+        start = time.perf_counter()
+        items = self._create(needed)
+        with self._cond:
+            for item in items:
+                self._available[item["status"]].append(item)
+            self.created += len(items)
+            self._cond.notify_all()
+        if self.log:
+            self.log.info("Equipment pool: created %s items in %.1f ms", len(items), (time.perf_counter() - start) * 1000)
+
+    def _refill_in_background(self):
+        with self._cond:
+            if self._refill is not None:
+                return
+
+            def _run():
+                try:
+                    self.fill()
+                except Exception as e:  # pylint: disable=broad-except
+                    self._error = e
+                finally:
+                    with self._cond:
+                        self._refill = None
+                        self._cond.notify_all()
+
+            self._refill = threading.Thread(target=_run, name="equipment-pool-refill", daemon=True)
+            self._refill.start()
+
+    def lease(self, status="Active", timeout=30):
+        """
+        @Description: Returns a never-before-leased item whose current (initial) status is `status`
+        """
+        if status not in self._available:
+            raise ValueError(f"Unknown status {status!r}")
+
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self._available[status]:
+                if self._error is not None:
+                    error, self._error = self._error, None
+                    raise error
+                self._refill_in_background()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No '{status}' equipment available after {timeout}s")
+                self._cond.wait(remaining)
+            item = self._available[status].popleft()
+            self.leased += 1
+            running_low = len(self._available[status]) < self.low_water
+
+        if running_low:
+            self._refill_in_background()
+        return dict(item)
+
+    def close(self):
+        """
+        @Description: Waits for an in-flight refill so it never outlives the session transport
+        """
+        with self._cond:
+            refill = self._refill
+        if refill is not None:
+            refill.join()
@@ -0,0 +1,109 @@
+"""
+@Description:  Parallel crawler for GET /api/equipment/{id}/history with page-consistency checks
+"""
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from utils.request import ApiRequest, send_all
+
+HEADERS = {"Accept": "*/*", "Content-Type": "application/json"}
+
+
+@dataclass
+class CrawlReport:
+    equipment_id: int
+    total: int
+    entries: list = field(default_factory=list)
+    latency_by_offset: list = field(default_factory=list)
+    problems: list = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+    @property
+    def pages(self):
+        return len(self.latency_by_offset)
+
+    @property
+    def pages_per_second(self):
+        return self.pages / self.elapsed_s if self.elapsed_s else 0.0
+
+    def latency_slope(self):
+        """
+        @Description: Least-squares ms of extra latency per 1000 rows of offset; ~0 unless the server scans
+        """
+        points = self.latency_by_offset
+        if len(points) < 2:
+            return 0.0
+        n = len(points)
+        mean_x = sum(x for x, _ in points) / n
+        mean_y = sum(y for _, y in points) / n
+        var_x = sum((x - mean_x) ** 2 for x, _ in points)
+        if not var_x:
+            return 0.0
+        cov = sum((x - mean_x) * (y - mean_y) for x, y in points)
+        return cov / var_x * 1000
+
+    def summary(self):
+        return (f"history {self.equipment_id}: {self.pages} pages / {len(self.entries)} entries "
+                f"in {self.elapsed_s * 1000:.1f} ms ({self.pages_per_second:.1f} pages/s), "
+                f"latency slope {self.latency_slope():.2f} ms per 1000 offset, {len(self.problems)} problems")
+
+
+def _check_page(report, r, limit, offset):
+    if r.status_code != 200:
+        report.problems.append(f"offset={offset}: status {r.status_code}")
+        return []
+    page = r.as_dict["data"]
+    history = page["history"]
+    expected_len = max(0, min(limit, report.total - offset))
+    if page["limit"] != limit:
+        report.problems.append(f"offset={offset}: limit {page['limit']} != {limit}")
+    if page["offset"] != offset:
+        report.problems.append(f"offset={offset}: echoed offset {page['offset']}")
+    if page["total"] != report.total:
+        report.problems.append(f"offset={offset}: total changed {report.total} -> {page['total']}")
+    if len(history) != expected_len:
+        report.problems.append(f"offset={offset}: {len(history)} entries, expected {expected_len} (gap)")
+    if page["hasMore"] != (offset + len(history) < page["total"]):
+        report.problems.append(f"offset={offset}: hasMore={page['hasMore']} inconsistent")
+    return history
+
+
+def crawl_history(base_uri, eq_id, limit=10, concurrency=8, transport=None):
+    """
+    @Description: Reads `total` from the first page, then fetches every remaining page concurrently.
+
+    The page size is the `limit` the first page echoes, since the server may
+    cap the requested one. Each page is checked for limit/offset/total/hasMore
+    consistency and for short pages; across pages duplicate or missing entry
+    ids are reported. Problems are collected in the returned CrawlReport
+    rather than raised.
+    """
+    if limit < 1:
+        raise ValueError(f"limit must be >= 1, got {limit}")
+    url = f"{base_uri}/api/equipment/{eq_id}/history"
+    start = time.perf_counter()
+
+    first = ApiRequest(url, "GET", headers=HEADERS, params={"limit": limit, "offset": 0}).send(transport)
+    assert first.status_code == 200, f"History fetch failed ({first.status_code}): {first.text}"
+    report = CrawlReport(eq_id, first.as_dict["data"]["total"])
+    page_size = first.as_dict["data"]["limit"]
+    if not isinstance(page_size, int) or not 1 <= page_size <= limit:
+        report.problems.append(f"offset=0: limit {page_size!r} for a requested limit of {limit}")
+        page_size = limit
+
+    offsets = list(range(page_size, report.total, page_size))
+    batch = [ApiRequest(url, "GET", headers=HEADERS, params={"limit": limit, "offset": o}) for o in offsets]
+    responses = [first] + send_all(batch, concurrency=concurrency, transport=transport)
+    report.elapsed_s = time.perf_counter() - start
+
+    for offset, r in zip([0] + offsets, responses):
+        report.latency_by_offset.append((offset, r.elapsed.total_seconds() * 1000))
+        report.entries += _check_page(report, r, page_size, offset)
+
+    duplicates = sorted(i for i, n in Counter(e["id"] for e in report.entries).items() if n > 1)
+    if duplicates:
+        report.problems.append(f"duplicate ids across pages: {duplicates}")
+    if len(report.entries) != report.total:
+        report.problems.append(f"crawled {len(report.entries)} entries, total is {report.total}")
+    return report
@@ -0,0 +1,53 @@
+"""
+@Description:  Concurrent status-history seeding with strict per-equipment ordering
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.request import ApiRequest
+
+ORDER = ["Active", "Idle", "Under Maintenance"]
+ACTORS = ("Operator John", "Technician Mike")
+HEADERS = {"Accept": "*/*", "Content-Type": "application/json"}
+
+
+def cycle_status(cur: str) -> str:
+    i = ORDER.index(cur) if cur in ORDER else -1
+    return ORDER[(i + 1) % len(ORDER)]
+
+
+def _seed_one(base_uri, eq_id, start_status, steps, actors, transport):
+    """
+    @Description: Runs one equipment's transitions strictly in order; returns the history entries it created
+    """
+    cur = start_status
+    entries = []
+    for i in range(steps):
+        cur = cycle_status(cur)
+        payload = {"status": cur, "changedBy": actors[i % len(actors)]}
+        r = ApiRequest(f"{base_uri}/api/equipment/{eq_id}/status", "POST", headers=HEADERS, json=payload).send(transport)
+        assert r.status_code == 200, f"Update of {eq_id} to {cur} failed ({r.status_code}): {r.text}"
+        entries.append(r.as_dict["data"]["historyEntry"])
+    return entries
+
+
+def seed_history(base_uri, plan, steps=2, actors=ACTORS, transport=None, concurrency=8, log=None):
+    """
+    @Description: Seeds `steps` status transitions for every {eq_id: current_status} in `plan`.
+
+    Each equipment's chain runs on a single worker, so its previousStatus ->
+    newStatus sequence stays valid, while different equipment run in parallel
+    on up to `concurrency` workers. Returns {eq_id: [historyEntry, ...]} in
+    the order the transitions were applied (oldest first), which is the
+    history the API is expected to report.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(plan)))) as executor:
+        futures = {
+            eq_id: executor.submit(_seed_one, base_uri, eq_id, status, steps, actors, transport)
+            for eq_id, status in plan.items()
+        }
+        seeded = {eq_id: future.result() for eq_id, future in futures.items()}
+    if log:
+        log.info("Seeded %s transitions x %s equipment in %.1f ms", steps, len(plan), (time.perf_counter() - start) * 1000)
+    return seeded
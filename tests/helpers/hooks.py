@@ -11,12 +11,14 @@ class Api:
     """
 
     @pytest.fixture(autouse=True)
-    def setup(self, logger, payload):
+    def setup(self, logger, payload, transport, base_uri):
         """
         @Description: This method will be called before each test method runs
         """
         self.log = logger
         self.payload = payload
+        self.transport = transport
+        self.base_uri = base_uri
         yield
         self.log.info("End of test")
     
@@ -0,0 +1,21 @@
+"""
+@Description:  Collision-free names for equipment created by tests
+"""
+import itertools
+import os
+import time
+
+# xdist worker number ("gw3" -> 3); 0 when not distributed
+WORKER = int(os.environ.get("PYTEST_XDIST_WORKER", "gw0").lstrip("gw") or 0)
+# distinguishes this process from earlier runs against the same API
+RUN = time.time_ns() // 1000 % 10**10
+
+_serial = itertools.count(1)
+
+
+def unique_name(base: str) -> str:
+    """
+    @Description: `base` plus a "#<worker>-<run>-<n>" suffix that is unique per worker,
+    per run and per call, so parallel workers never create clashing names
+    """
+    return f"{base} #{WORKER}-{RUN}-{next(_serial)}"
@@ -0,0 +1,27 @@
+"""
+@Description:  Generated POST /api/equipment payload cases, from tests/data/payload.json and the request schema
+"""
+from tests.data.schema.create_new_equipment import _request_schema
+from utils.datagen import CaseSet
+from utils.file_reader import read_json_file
+
+# a payload the hand-written suite creates (tests.helpers.hooks.Api.base_payloads); fills the template
+KNOWN_GOOD = {"name": "Excavator CAT 320", "status": "Active", "location": "Site A"}
+
+# variants whose outcome against the live API the hand-written suite already shows: the allowed
+# statuses are created, an unknown status and a missing name are rejected. Every other variant
+# probes an undocumented boundary and may be either accepted or rejected.
+ESTABLISHED = {
+    "name": {"missing": False},
+    "status": {"active": True, "idle": True, "under-maintenance": True, "unknown": False},
+}
+
+
+def create_equipment_cases(extra=0, seed=0, shard=None, singles=True):
+    """
+    @Description: Lazy utils.datagen.CaseSet for POST /api/equipment: every valid, boundary
+    and invalid variant of name/status/location, then `extra` seeded random combinations;
+    singles=False keeps only the combinations
+    """
+    return CaseSet(read_json_file("payload", frozen=True), _request_schema, extra=extra, seed=seed, shard=shard,
+                   singles=singles, defaults=KNOWN_GOOD, established=ESTABLISHED)
@@ -0,0 +1,49 @@
+"""
+@Description:  Offline tests for the history pagination crawler (tests/helpers/history_crawler.py)
+"""
+import pytest
+
+from tests.helpers.history_crawler import crawl_history
+from utils.stand_in_server import StandInServer
+
+
+@pytest.mark.unit
+class TestHistoryCrawler:
+
+    @pytest.fixture
+    def server(self):
+        with StandInServer() as server:
+            eq_id = server.store.create({"name": "Crane", "status": "Idle", "location": "Site C"})["id"]
+            for status in ["Active", "Idle"] * 6:
+                server.store.update_status(eq_id, {"status": status, "changedBy": "Operator John"})
+            server.eq_id = eq_id
+            yield server
+
+    def test_clean_crawl(self, server, transport):
+        report = crawl_history(server.url, server.eq_id, limit=5, transport=transport)
+        assert report.problems == []
+        assert (report.total, report.pages, len(report.entries)) == (12, 3, 12)
+
+    def test_server_capped_limit_sets_the_page_size(self, server, transport, monkeypatch):
+        """
+        @description: A limit above the server's cap pages by the echoed limit without false problems
+        """
+        get_history = server.store.get_history
+        monkeypatch.setattr(server.store, "get_history",
+                            lambda eq_id, limit, offset: get_history(eq_id, min(limit, 4), offset))
+        report = crawl_history(server.url, server.eq_id, limit=50, transport=transport)
+        assert report.problems == []
+        assert (report.pages, len(report.entries)) == (3, 12)
+        with pytest.raises(ValueError):
+            crawl_history(server.url, server.eq_id, limit=0, transport=transport)
+
+    def test_detects_overlapping_pages(self, server, transport, monkeypatch):
+        """
+        @description: A server that pages from offset-1 yields duplicates and a missing tail
+        """
+        get_history = server.store.get_history
+        monkeypatch.setattr(server.store, "get_history",
+                            lambda eq_id, limit, offset: dict(get_history(eq_id, limit, max(0, offset - 1)), offset=offset))
+
+        report = crawl_history(server.url, server.eq_id, limit=5, transport=transport)
+        assert any("duplicate ids" in p for p in report.problems)
@@ -0,0 +1,118 @@
+"""
+@Description:  Offline tests for the client-side rate limit and adaptive concurrency (utils.limiter)
+"""
+import threading
+import time
+
+import pytest
+
+from utils.limiter import AdaptiveConcurrency, Limiter, TokenBucket, parse_limits
+from utils.metrics import MetricsRegistry
+from utils.request import ApiRequest, Transport, send_all
+from utils.retry import RetryPolicy
+from utils.stand_in_server import StandInServer
+
+
+def _transport(limiter):
+    return Transport(metrics=MetricsRegistry(), phase_metrics=MetricsRegistry(), retry=RetryPolicy(retries=0),
+                     retry_metrics=MetricsRegistry(), limiter=limiter)
+
+
+@pytest.mark.unit
+class TestLimiter:
+
+    def test_parse_limits(self):
+        assert parse_limits("rate=20, burst=5,max_concurrency=8") == {"rate": 20.0, "burst": 5.0,
+                                                                       "max_concurrency": 8.0}
+        assert parse_limits("off") is None and parse_limits("") is None
+        assert Limiter.from_limits(None) is None
+
+    def test_token_bucket_holds_the_rate_after_the_burst(self):
+        """
+        @description: `burst` requests go at once, the rest are spaced 1/rate apart
+        """
+        bucket = TokenBucket(rate=100, burst=5)
+        start = time.monotonic()
+        waits = [bucket.acquire() for _ in range(25)]
+        elapsed = time.monotonic() - start
+        assert waits[:5] == [0.0] * 5
+        assert 0.18 <= elapsed < 0.4
+
+    def test_additive_increase_multiplicative_decrease(self):
+        """
+        @description: a full window of healthy responses adds one; an overload halves the limit, once per round trip
+        """
+        aimd = AdaptiveConcurrency(initial=4, minimum=1, maximum=6)
+        for _ in range(4):
+            aimd.release(aimd.acquire(), overloaded=False, latency_ms=10)
+        assert aimd.limit == pytest.approx(5, abs=0.1)
+
+        early = [aimd.acquire() for _ in range(3)]
+        assert aimd.release(early[0], overloaded=True) == pytest.approx(aimd.limit)
+        limit = aimd.limit
+        assert aimd.release(early[1], overloaded=True) is None
+        assert aimd.limit == limit
+
+        for _ in range(200):
+            aimd.release(aimd.acquire(), overloaded=False, latency_ms=10)
+        assert aimd.limit == 6
+        aimd.release(early[2], overloaded=False, latency_ms=10)
+        assert aimd.in_flight == 0
+
+    def test_rising_latency_backs_off(self):
+        """
+        @description: a response far slower than the running average counts as an overload signal
+        """
+        aimd = AdaptiveConcurrency(initial=8, latency_tolerance=3.0)
+        for _ in range(20):
+            aimd.release(aimd.acquire(), overloaded=False, latency_ms=10)
+        limit = aimd.limit
+        assert aimd.release(aimd.acquire(), overloaded=False, latency_ms=100) == pytest.approx(limit / 2)
+
+    def test_acquire_waits_for_a_free_place(self):
+        aimd = AdaptiveConcurrency(initial=1, maximum=1)
+        first = aimd.acquire()
+        acquired = threading.Event()
+        thread = threading.Thread(target=lambda: (aimd.acquire(), acquired.set()), daemon=True)
+        thread.start()
+        assert not acquired.wait(0.1)
+        aimd.release(first, overloaded=False)
+        assert acquired.wait(1)
+
+
+@pytest.mark.unit
+class TestTransportLimiter:
+
+    def test_concurrency_cap_reaches_the_server(self):
+        """
+        @description: the server never sees more requests in flight than the limit; the queueing is ours and reported
+        """
+        metrics = MetricsRegistry()
+        limiter = Limiter.from_limits({"initial_concurrency": 2, "max_concurrency": 2}, metrics)
+        transport = _transport(limiter)
+        with StandInServer(latency_ms=20) as server:
+            responses = send_all([ApiRequest(f"{server.url}/api/equipment", "GET") for _ in range(12)],
+                                 concurrency=6, transport=transport)
+            peak = server.stats["peak_in_flight"]
+        transport.close()
+
+        assert all(r.status_code == 200 for r in responses)
+        assert peak <= 2
+        queued = max(r.timing.queued for r in responses)
+        assert queued >= 20 and max(r.timing.total for r in responses) < queued
+        assert metrics.histograms["wait"].count == 12 and metrics.histograms["limit"].max == 2
+
+    def test_errors_shrink_the_limit(self):
+        """
+        @description: 5xx responses drive the concurrency limit down to its minimum
+        """
+        metrics = MetricsRegistry()
+        limiter = Limiter.from_limits({"initial_concurrency": 8, "min_concurrency": 1, "max_concurrency": 8}, metrics)
+        transport = _transport(limiter)
+        with StandInServer(error_rate=1.0) as server:
+            for _ in range(6):
+                assert ApiRequest(f"{server.url}/api/equipment", "GET").send(transport).status_code == 500
+        transport.close()
+
+        assert limiter.state()["limit"] == 1
+        assert metrics.histograms["decrease"].count == 3
@@ -0,0 +1,48 @@
+"""
+@Description:  Offline tests for the utils.load closed-loop LoadRunner
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from utils.load import MAX_FAILURES, LoadProfile, LoadRunner
+from utils.metrics import MetricsRegistry
+
+
+class _Request:
+    """
+    Stands in for an ApiRequest: answers at once with `status_code`
+    """
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def send(self, transport):
+        return SimpleNamespace(status_code=self.status_code, text="Service Unavailable", timing=None)
+
+
+def _broken_factory():
+    raise ValueError("no status left to send")
+
+
+@pytest.mark.unit
+class TestLoadRunner:
+
+    def test_failures_keep_their_cause(self, caplog):
+        """
+        @description: failed requests are counted and the first few causes, errors and exceptions, are kept and logged
+        """
+        runner = LoadRunner(LoadProfile(users=2, duration=0.2, warmup=0.0, ramp_up=0.0), transport=object(),
+                            metrics=MetricsRegistry())
+        with caplog.at_level("WARNING", logger="utils.load"):
+            stats = runner.run({"bad status": lambda: _Request(503), "bad factory": _broken_factory,
+                                "good": lambda: _Request(200)})
+
+        assert stats["good"].errors == 0 and not stats["good"].failures
+        assert stats["bad status"].errors == stats["bad status"].count > MAX_FAILURES
+        assert len(stats["bad status"].failures) == MAX_FAILURES
+        assert stats["bad status"].failures[0] == "503 Service Unavailable"
+        assert stats["bad factory"].failures[0] == "ValueError: no status left to send"
+        assert "ValueError: no status left to send" in stats["bad factory"].summary()
+        assert any(record.exc_info and record.exc_info[0] is ValueError for record in caplog.records)
+        assert len(caplog.records) == 2 * MAX_FAILURES
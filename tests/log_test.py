@@ -0,0 +1,96 @@
+"""
+@Description:  Offline tests for the utils.log queue logging and body policy
+"""
+import logging
+
+import pytest
+
+from utils import log
+from utils.log import LazyBody, start_queue_logging
+
+
+class _Spy:
+    renders = 0
+
+    def __str__(self):
+        _Spy.renders += 1
+        return "x" * 5000
+
+
+@pytest.fixture
+def policy():
+    saved = (log.policy.mode, log.policy.limit, log.policy.sample_rate)
+    yield log.policy
+    log.configure(*saved)
+
+
+@pytest.mark.unit
+class TestBodyLogging:
+
+    def test_truncates_and_omits_bodies(self, policy):
+        """
+        @description: bodies are cut at the limit in 'truncated' mode and dropped in 'off' mode
+        """
+        log.configure("truncated", limit=10)
+        assert str(LazyBody("a" * 25)) == "a" * 10 + "... [+15 chars]"
+        assert str(LazyBody("short")) == "short"
+        assert str(LazyBody(b"short")) == "short"
+
+        log.configure("off")
+        assert str(LazyBody("a" * 25)) == "<body omitted>"
+
+        log.configure("full", sample_rate=0.0)
+        assert str(LazyBody("a" * 25)) == "<body not sampled>"
+
+    def test_bodies_render_only_when_emitted(self, policy):
+        """
+        @description: a body below the logger level is never stringified, an emitted one is rendered once
+        """
+        log.configure("truncated", limit=100, sample_rate=1.0)
+        records = []
+        collector = logging.Handler()
+        collector.emit = lambda record: records.append(record.getMessage())
+
+        logger = logging.getLogger("tests.log_test.render")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        listener = start_queue_logging(logger, collector)
+        try:
+            _Spy.renders = 0
+            logger.debug("Response %s", LazyBody(_Spy()))
+            body = LazyBody(_Spy())
+            logger.info("Response %s", body)
+            logger.info("Again %s", body)
+        finally:
+            listener.stop()
+            logger.handlers.clear()
+
+        assert _Spy.renders == 1
+        assert records[0] == "Response " + "x" * 100 + "... [+4900 chars]"
+        assert len(records) == 2
+
+    def test_arguments_are_logged_as_they_were_at_the_call(self, policy):
+        """
+        @description: a payload changed right after the call is logged with its values at the call
+        """
+        log.configure("full", sample_rate=1.0)
+        records = []
+        collector = logging.Handler()
+        collector.emit = lambda record: records.append(record.getMessage())
+
+        logger = logging.getLogger("tests.log_test.freeze")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        listener = start_queue_logging(logger, collector)
+        try:
+            payload = {"status": "Active"}
+            headers = {"Idempotency-Key": "first"}
+            logger.info("Request %s %s", headers, LazyBody(payload))
+            logger.info("Payload %(status)s", payload)
+            payload["status"] = "Idle"
+            headers["Idempotency-Key"] = "second"
+        finally:
+            listener.stop()
+            logger.handlers.clear()
+
+        assert records == ["Request {'Idempotency-Key': 'first'} {'status': 'Active'}", "Payload Active"]
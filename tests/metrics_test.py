@@ -0,0 +1,57 @@
+"""
+@Description:  Offline tests for the latency histograms in utils.metrics
+"""
+import random
+
+import pytest
+
+from utils.load import percentile
+from utils.metrics import LatencyHistogram, MetricsRegistry, route_template
+
+
+@pytest.mark.unit
+class TestLatencyHistogram:
+
+    @pytest.mark.parametrize("url, expected", [
+        ("https://host/api/equipment", "/api/equipment"),
+        ("https://host/api/equipment/42/status", "/api/equipment/{id}/status"),
+        ("https://host/api/equipment/42/history?limit=5", "/api/equipment/{id}/history"),
+    ])
+    def test_route_template(self, url, expected):
+        assert route_template(url) == expected
+
+    def test_percentiles_within_relative_error(self):
+        """
+        @description: Histogram percentiles stay within the advertised relative error
+        """
+        rnd = random.Random(7)
+        samples = [rnd.lognormvariate(4, 0.8) for _ in range(20000)]
+        hist = LatencyHistogram()
+        for s in samples:
+            hist.record(s)
+
+        ordered = sorted(samples)
+        for pct in (50, 90, 99):
+            exact = percentile(ordered, pct)
+            assert abs(hist.value_at_percentile(pct) - exact) <= exact * LatencyHistogram.RELATIVE_ERROR * 1.01
+        assert hist.max == ordered[-1]
+
+    def test_merge_equals_single_histogram(self):
+        """
+        @description: Merging serialized per-worker histograms equals recording everything in one
+        """
+        rnd = random.Random(11)
+        samples = [rnd.uniform(5, 900) for _ in range(3000)]
+        whole = MetricsRegistry()
+        workers = [MetricsRegistry() for _ in range(3)]
+        for i, s in enumerate(samples):
+            whole.record("POST", "https://host/api/equipment/7/status", s)
+            workers[i % 3].record("POST", "https://host/api/equipment/9/status", s)
+
+        merged = MetricsRegistry()
+        for worker in workers:
+            merged.merge(worker.to_dict())
+
+        key = "POST /api/equipment/{id}/status"
+        assert merged.to_dict()[key]["buckets"] == whole.to_dict()[key]["buckets"]
+        assert merged.to_dict()[key]["percentiles"] == whole.to_dict()[key]["percentiles"]
@@ -0,0 +1,80 @@
+"""
+@Description:  Offline tests for the utils.soak open-loop runner
+"""
+import itertools
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils.metrics import MetricsRegistry
+from utils.soak import ALL, OpenLoopRunner, SoakProfile, parse_mix, weighted_cycle
+
+
+class _Request:
+    """
+    Stands in for an ApiRequest: answers after `delay` seconds
+    """
+
+    def __init__(self, delay=0.0, status_code=200):
+        self.delay = delay
+        self.status_code = status_code
+
+    def send(self, transport):
+        time.sleep(self.delay)
+        return SimpleNamespace(status_code=self.status_code)
+
+
+def _runner(rows=None, **profile):
+    return OpenLoopRunner(SoakProfile(**profile), transport=object(), metrics=MetricsRegistry(),
+                          on_bucket=rows.extend if rows is not None else None)
+
+
+@pytest.mark.unit
+class TestOpenLoopRunner:
+
+    def test_mix_is_spread_in_proportion(self):
+        """
+        @description: smooth weighted round-robin keeps the mix proportions in every window
+        """
+        mix = parse_mix("list=4, create=1,status=3,history=2")
+        picks = list(itertools.islice(weighted_cycle(mix), 100))
+        assert {name: picks.count(name) for name in mix} == {"list": 40, "create": 10, "status": 30, "history": 20}
+        assert max(len(list(g)) for _, g in itertools.groupby(picks)) <= 2
+
+    def test_stall_is_charged_to_the_requests_queued_behind_it(self):
+        """
+        @description: one 300 ms stall on a single connection delays ~15 scheduled requests; the corrected
+        latency shows it, the service time does not
+        """
+        stalls = iter([0.3])
+        result = _runner(rate=50, duration=1.0, max_in_flight=1, bucket=0.5).run({
+            "get": lambda: _Request(next(stalls, 0.001)),
+        })
+        corrected, service = result.corrected["get"], result.service["get"]
+        assert result.completed == result.scheduled == 50
+        assert corrected.value_at_percentile(50) < 50
+        assert corrected.value_at_percentile(90) > 100, corrected.to_dict()["percentiles"]
+        assert service.value_at_percentile(90) < 50
+
+    def test_series_and_backlog(self):
+        """
+        @description: buckets close in order with per-scenario rows; requests beyond the backlog are dropped
+        """
+        rows = []
+        result = _runner(rows, rate=100, duration=1.0, bucket=0.25, max_in_flight=2, max_backlog=4).run({
+            "ok": lambda: _Request(0.05),
+            "bad": lambda: _Request(0.05, status_code=500),
+        })
+        totals = [row for row in rows if row["scenario"] == ALL]
+        assert [row["t"] for row in totals] == sorted(row["t"] for row in totals)
+        assert sum(row["completed"] for row in totals) == result.completed
+        assert result.dropped > 0 and sum(row["dropped"] for row in totals) == result.dropped
+        assert result.errors == sum(row["completed"] for row in rows if row["scenario"] == "bad")
+
+    def test_unknown_scenario_in_mix(self):
+        """
+        @description: a mix naming a scenario that does not exist is rejected up front
+        """
+        with pytest.raises(ValueError):
+            _runner(mix={"nope": 1}).run({"get": _Request})
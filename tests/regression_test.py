@@ -0,0 +1,76 @@
+"""
+@Description:  Offline tests for the utils.regression latency gate
+"""
+import json
+import os
+import random
+
+import pytest
+
+from utils.load import EndpointStats
+from utils.metrics import LatencyHistogram
+from utils.regression import RegressionGate, compare, load_baseline
+
+
+def _histogram(median_ms, n=2000, seed=1):
+    rng = random.Random(seed)
+    hist = LatencyHistogram()
+    for _ in range(n):
+        hist.record(rng.lognormvariate(0, 0.3) * median_ms)
+    return hist
+
+
+@pytest.mark.unit
+class TestRegressionGate:
+
+    def test_same_distribution_is_no_change(self):
+        """
+        @description: two samples of one latency distribution are never flagged
+        """
+        result = compare("GET /x", _histogram(200, seed=1), _histogram(200, seed=2))
+        assert result.verdict == "no change", result.summary()
+        assert not result.failed
+
+    def test_slowdown_is_a_regression_and_speedup_an_improvement(self):
+        """
+        @description: a 30% shift is significant with a large effect size, in either direction
+        """
+        slower = compare("GET /x", _histogram(200, seed=1), _histogram(260, seed=2))
+        faster = compare("GET /x", _histogram(260, seed=1), _histogram(200, seed=2))
+
+        assert (slower.verdict, slower.failed) == ("regression", True), slower.summary()
+        assert slower.effect_size > 0.3 and slower.p_value < 1e-6
+        assert (faster.verdict, faster.failed) == ("improvement", False), faster.summary()
+        assert faster.effect_size < -0.3
+
+    def test_tiny_shift_is_not_a_regression(self):
+        """
+        @description: a significant but sub-threshold p95 shift (2 ms on 20 ms) does not fail the gate
+        """
+        result = compare("GET /x", _histogram(20, n=20000, seed=1), _histogram(21, n=20000, seed=2))
+        assert result.p_value < 0.01
+        assert result.verdict == "no change", result.summary()
+
+    def test_baseline_from_archived_reports(self, tmp_path):
+        """
+        @description: only archived runs against the same env, newest first, make up the baseline
+        """
+        def archive(name, env, median_ms, age):
+            attributes = {"env": env, "load_latency": {"GET /x": _histogram(median_ms, n=100).to_dict()}}
+            path = tmp_path / name
+            path.write_text(json.dumps({"data": [{"type": "report", "attributes": attributes}]}))
+            os.utime(path, (age, age))
+
+        archive("report_1.json", "dev", 100, 1)
+        archive("report_2.json", "dev", 100, 2)
+        archive("report_3.json", "ci", 900, 3)
+        (tmp_path / "report_4.json").write_text("{not json")
+
+        baseline = load_baseline(tmp_path, "dev", runs=1)
+        assert baseline["GET /x"].count == 100
+        assert load_baseline(tmp_path, "dev")["GET /x"].count == 200
+
+        gate = RegressionGate(load_baseline(tmp_path, "dev"))
+        assert gate.check(EndpointStats("GET /x", samples=[100.0] * 200), budget_ms=50).verdict == "no change"
+        fallback = gate.check(EndpointStats("GET /y", samples=[100.0] * 200), budget_ms=50)
+        assert (fallback.verdict, fallback.failed) == ("no baseline", True)
@@ -0,0 +1,71 @@
+"""
+@Description:  Offline tests for the utils.results_stream JSONL writer and report builder
+"""
+import json
+import time
+
+import pytest
+from pytest_html_reporter.shards import read_bundle
+
+from utils.metrics import MetricsRegistry
+from utils.results_stream import ResultStream, ResultStreamPlugin, build_report, html_bundle, read_events
+
+
+def _phases(stream, nodeid, call="passed", duration=0.1):
+    stream.phase(nodeid, "setup", "passed", 0.01)
+    stream.phase(nodeid, "call", call, duration, "AssertionError" if call == "failed" else None)
+    stream.phase(nodeid, "teardown", "passed", 0.01)
+
+
+@pytest.mark.unit
+class TestResultStream:
+
+    def test_lines_reach_disk_before_close(self, tmp_path):
+        """
+        @description: events are flushed on the interval, and a line cut short by a crash is skipped on read
+        """
+        path = tmp_path / "results.jsonl"
+        stream = ResultStream(str(path), flush_interval=0.05)
+        _phases(stream, "tests/a_test.py::test_a")
+        stream.metric("latency", "GET /api/equipment", 12.5)
+        deadline = time.monotonic() + 5
+        while len(path.read_text().splitlines()) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"type":"test","na')
+        events = list(read_events(str(path)))
+        assert [e["type"] for e in events] == ["test", "metric"]
+        assert events[0]["outcome"] == "passed" and set(events[0]) >= {"setup", "call", "teardown"}
+        stream.close()
+
+    def test_report_from_stream(self, tmp_path):
+        """
+        @description: per-worker files merge into one pytest-json report; reruns count, the last attempt wins
+        """
+        controller = ResultStream(str(tmp_path / "results.jsonl"))
+        worker = ResultStream(str(tmp_path / "results.gw0.jsonl"))
+        latency = MetricsRegistry()
+        plugin = ResultStreamPlugin(worker, env="local", registries={"latency": latency})
+        _phases(worker, "tests/a_test.py::test_a", call="rerun")
+        _phases(worker, "tests/a_test.py::test_a")
+        _phases(worker, "tests/a_test.py::TestB::test_b", call="failed")
+        for ms in (10, 20, 30):
+            latency.observe("GET /api/equipment", ms)
+        plugin.pytest_unconfigure(None)
+        controller.close()
+
+        report = build_report(read_events(str(tmp_path / "results.jsonl")))
+        attributes = report["data"][0]["attributes"]
+        tests = {t["attributes"]["name"]: t["attributes"] for t in report["included"]}
+        assert attributes["summary"]["num_tests"] == 2
+        assert attributes["summary"]["rerun"] == 1 and attributes["summary"]["failed"] == 1
+        assert tests["tests/a_test.py::test_a"]["outcome"] == "passed"
+        assert attributes["latency"]["GET /api/equipment"]["count"] == 3
+
+        bundle_path = tmp_path / "shards" / "stream" / "records.json"
+        bundle_path.parent.mkdir(parents=True)
+        bundle_path.write_text(json.dumps(html_bundle(report)))
+        bundle = read_bundle(str(bundle_path))
+        statuses = {r["nodeid"]: (r["suite_name"], r["test_name"], r["status"]) for r in bundle.records}
+        assert statuses["tests/a_test.py::TestB::test_b"] == ("tests/a_test.py", "test_b", "FAIL")
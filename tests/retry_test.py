@@ -0,0 +1,188 @@
+"""
+@Description:  Offline tests for the request-level retries of the shared Transport (utils.retry)
+"""
+import random
+import socket
+import threading
+
+import pytest
+import requests
+
+from utils.metrics import MetricsRegistry
+from utils.request import ApiRequest, Transport
+from utils.retry import RetryBudget, RetryPolicy, retry_after_seconds
+from utils.stand_in_server import StandInServer
+
+
+def _transport(retry):
+    return Transport(metrics=MetricsRegistry(), phase_metrics=MetricsRegistry(), retry=retry,
+                     retry_metrics=MetricsRegistry())
+
+
+def _policy(retries=3, budget=None):
+    return RetryPolicy(retries=retries, backoff=0.001, budget=budget or RetryBudget(), rng=random.Random(1))
+
+
+class _Response:
+
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def flaky():
+    with StandInServer(error_rate=0.5, seed=3) as server:
+        server.store.create({"name": "Item", "status": "Active", "location": "Site A"})
+        yield server
+
+
+@pytest.mark.unit
+class TestRetryPolicy:
+
+    @pytest.mark.parametrize("method, headers, status, expected", [
+        ("GET", None, 503, "503"),
+        ("DELETE", None, 500, "500"),
+        ("POST", None, 503, None),
+        ("POST", {"Idempotency-Key": "k1"}, 503, "503"),
+        ("POST", {"idempotency-key": "k1"}, 503, "503"),
+        ("POST", None, 429, "429"),
+        ("GET", None, 404, None),
+    ])
+    def test_only_safe_attempts_are_repeated(self, method, headers, status, expected):
+        """
+        @description: 5xx is retried for idempotent requests only; 429 for any method; 4xx never
+        """
+        assert RetryPolicy().reason(method, headers, _Response(status)) == expected
+
+    @pytest.mark.parametrize("error, expected", [
+        (requests.ReadTimeout(), "ReadTimeout"),
+        (requests.ConnectionError(), "ConnectionError"),
+        (requests.exceptions.SSLError(), None),
+        (requests.exceptions.ProxyError(), None),
+        (requests.exceptions.InvalidURL(), None),
+    ])
+    def test_permanent_errors_are_not_repeated(self, error, expected):
+        """
+        @description: transport errors are retried for idempotent requests, unless another attempt cannot fix them
+        """
+        assert RetryPolicy().reason("GET", None, error=error) == expected
+
+    def test_backoff_has_full_jitter_and_a_ceiling(self):
+        """
+        @description: the wait before retry n is uniform in [0, min(max_wait, backoff * 2^n)]
+        """
+        policy = RetryPolicy(backoff=0.1, max_wait=0.3, rng=random.Random(5))
+        waits = [[policy.delay(n) for _ in range(200)] for n in range(4)]
+        assert all(0 <= w <= 0.1 for w in waits[0]) and all(0 <= w <= 0.2 for w in waits[1])
+        assert all(w <= 0.3 for w in waits[3]) and max(waits[3]) > 0.25
+        assert len(set(waits[0])) > 100
+
+    def test_retry_after_is_honored(self):
+        """
+        @description: Retry-After (seconds or HTTP date) replaces the backoff; one beyond max_wait ends retrying
+        """
+        policy = RetryPolicy(max_wait=5.0)
+        assert policy.delay(0, _Response(503, {"Retry-After": "2"})) == 2.0
+        assert policy.delay(0, _Response(503, {"Retry-After": "60"})) is None
+        assert retry_after_seconds("Wed, 21 Oct 2015 07:28:03 GMT", now=1445412480.0) == pytest.approx(3.0)
+        assert retry_after_seconds("soon") is None and retry_after_seconds(None) is None
+
+    def test_budget_caps_retries_at_a_fraction_of_traffic(self):
+        """
+        @description: the reserve is spent first; after that each request buys `ratio` of a retry
+        """
+        budget = RetryBudget(ratio=0.25, reserve=2, capacity=5)
+        assert budget.withdraw() and budget.withdraw() and not budget.withdraw()
+        for _ in range(4):
+            budget.deposit()
+        assert budget.withdraw() and not budget.withdraw()
+        for _ in range(1000):
+            budget.deposit()
+        assert budget.tokens == 5
+
+
+@pytest.mark.unit
+class TestTransportRetries:
+
+    def test_idempotent_requests_ride_out_injected_failures(self, flaky):
+        """
+        @description: GETs against a server failing half the time succeed, and every retry is counted
+        """
+        transport = _transport(_policy(retries=6, budget=RetryBudget(reserve=100)))
+        responses = [ApiRequest(f"{flaky.url}/api/equipment", "GET").send(transport) for _ in range(20)]
+        transport.close()
+
+        assert all(r.status_code == 200 for r in responses)
+        retried = sum(r.attempts - 1 for r in responses)
+        assert retried > 0
+        assert transport.retry_metrics.histograms["GET /api/equipment 500"].count == retried
+
+    def test_non_idempotent_request_is_not_repeated(self, flaky):
+        """
+        @description: a POST answered with 500 is returned as is; it may have been applied
+        """
+        transport = _transport(_policy())
+        responses = [ApiRequest(f"{flaky.url}/api/equipment/1/status", "POST",
+                                json={"status": "Idle", "changedBy": "retry test"}).send(transport)
+                     for _ in range(10)]
+        transport.close()
+
+        assert {r.status_code for r in responses} == {200, 500}
+        assert all(r.attempts == 1 for r in responses)
+        assert not transport.retry_metrics.histograms
+
+    def test_exhausted_budget_fails_fast(self, flaky):
+        """
+        @description: once the budget is spent, failures come back without retrying and are counted as denied
+        """
+        transport = _transport(_policy(budget=RetryBudget(ratio=0.0, reserve=2)))
+        responses = [ApiRequest(f"{flaky.url}/api/equipment", "GET").send(transport) for _ in range(20)]
+        transport.close()
+
+        assert sum(r.attempts - 1 for r in responses) == 2
+        assert transport.retry_metrics.histograms["GET /api/equipment 500 denied"].count >= 1
+        assert any(r.status_code == 500 for r in responses)
+
+    def test_unsent_request_is_retried_for_any_method(self):
+        """
+        @description: a refused connection means nothing was sent, so even a POST is tried again
+        """
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        transport = _transport(_policy(retries=2))
+        with pytest.raises(requests.ConnectionError):
+            ApiRequest(f"http://127.0.0.1:{port}/api/equipment", "POST", json={}).send(transport)
+        transport.close()
+
+        assert transport.retry_metrics.histograms["POST /api/equipment ConnectionError"].count == 2
+
+    def test_tls_failure_surfaces_at_once(self):
+        """
+        @description: a failed TLS handshake is raised on the first attempt, without backoff
+        """
+        accepted = []
+
+        def _plain_http(listener):
+            # answers every TLS ClientHello in plain HTTP, which fails the handshake
+            for _ in range(4):
+                try:
+                    conn, _ = listener.accept()
+                except OSError:
+                    return
+                accepted.append(conn)
+                conn.sendall(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+                conn.close()
+
+        with socket.socket() as listener:
+            listener.bind(("127.0.0.1", 0))
+            listener.listen()
+            threading.Thread(target=_plain_http, args=(listener,), daemon=True).start()
+            transport = _transport(_policy(retries=3))
+            with pytest.raises(requests.exceptions.SSLError):
+                ApiRequest(f"https://127.0.0.1:{listener.getsockname()[1]}/api/equipment", "GET").send(transport)
+            transport.close()
+
+        assert len(accepted) == 1
+        assert not transport.retry_metrics.histograms
@@ -0,0 +1,90 @@
+"""
+@Description:  Offline tests for the utils.scheduling duration-aware xdist scheduler
+"""
+import json
+import os
+import statistics
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from tests.helpers.naming import unique_name
+from utils.scheduling import DurationScheduling, duration_key, load_durations
+
+COLLECTION = ["a_test.py::test_fast", "a_test.py::test_slow", "b_test.py::test_one@shared",
+              "b_test.py::test_two@shared", "c_test.py::test_mid"]
+DURATIONS = {"a_test.py::test_fast": 0.1, "a_test.py::test_slow": 5.0, "b_test.py::test_one": 2.0,
+             "b_test.py::test_two": 2.0, "c_test.py::test_mid": 3.0}
+
+
+class _Config:
+    option = SimpleNamespace(loadscopereorder=False)
+
+    @staticmethod
+    def getvalue(name):
+        return ["2*popen"] if name == "tx" else None
+
+
+class _Node:
+    shutting_down = False
+
+    def __init__(self, name):
+        self.gateway = SimpleNamespace(id=name)
+        self.sent = []
+
+    def send_runtest_some(self, indices):
+        self.sent.append([COLLECTION[i] for i in indices])
+
+    def shutdown(self):
+        self.shutting_down = True
+
+
+@pytest.mark.unit
+class TestDurationScheduling:
+
+    def test_longest_units_first_and_groups_together(self):
+        """
+        @description: units are handed out longest first and an xdist group never splits across workers
+        """
+        sched = DurationScheduling(_Config(), durations=DURATIONS)
+        first, second = _Node("gw0"), _Node("gw1")
+        for node in (first, second):
+            sched.add_node(node)
+            sched.add_node_collection(node, COLLECTION)
+        sched.schedule()
+
+        assert first.sent == [["a_test.py::test_slow"], ["c_test.py::test_mid"]]
+        assert second.sent == [["b_test.py::test_one@shared", "b_test.py::test_two@shared"],
+                               ["a_test.py::test_fast"]]
+
+    def test_durations_from_json_reports(self, tmp_path):
+        """
+        @description: per-nodeid medians come from real pytest-json reports, current and archived; a report
+        and its archived copy count once
+        """
+        real = json.loads((Path(__file__).parent / "data" / "pytest_json_report.json").read_text())
+        name = real["included"][0]["attributes"]["name"]
+        (tmp_path / "json").mkdir()
+        (tmp_path / "archive" / "json").mkdir(parents=True)
+        for i, seconds in enumerate((1.0, 3.0)):
+            older = json.loads(json.dumps(real))
+            older["data"][0]["attributes"]["created_at"] = f"2025-08-0{i + 1} 10:00:00"
+            older["included"][0]["attributes"]["duration"] = seconds
+            path = tmp_path / "archive" / "json" / f"report_{i}.json"
+            path.write_text(json.dumps(older))
+            os.utime(path, (i, i))
+        (tmp_path / "json" / "report.json").write_text(json.dumps(real))
+        (tmp_path / "archive" / "json" / "report_2.json").write_text(json.dumps(real))
+
+        durations = load_durations(tmp_path)
+        assert len(durations) == len(real["included"])
+        assert durations[name] == statistics.median([1.0, 3.0, real["included"][0]["attributes"]["duration"]])
+        assert duration_key(f"{name}@shared") == name
+
+    def test_unique_names_never_repeat(self):
+        """
+        @description: names carry a worker, run and call counter so they never collide
+        """
+        names = {unique_name("Loader") for _ in range(10_000)}
+        assert len(names) == 10_000
@@ -0,0 +1,100 @@
+"""
+@Description:  Offline tests and micro-benchmark for the compiled validators in utils.schema
+"""
+import copy
+import time
+
+import pytest
+from cerberus import Validator
+
+from tests.data.schema import create_new_equipment, equipment_history, get_all_equipment, update_equipment_status
+from utils.schema import validator_for
+
+ITEM = {"id": 1, "name": "Excavator CAT 320", "status": "Active", "location": "Site A",
+        "lastUpdated": "2025-08-11T10:00:00.123Z"}
+ENTRY = {"id": 1, "equipmentId": 1, "previousStatus": "Active", "newStatus": "Idle",
+         "timestamp": "2025-08-11T10:00:00.123Z", "changedBy": "Operator John"}
+
+VALID = [
+    (create_new_equipment._ok_schema, {"success": True, "data": dict(ITEM)}),
+    (create_new_equipment._err_schema, {"success": False, "error": "Field 'name' is required"}),
+    (update_equipment_status._ok_schema, {"success": True, "data": {"equipment": dict(ITEM), "historyEntry": dict(ENTRY)}}),
+    (equipment_history._ok_schema, {"success": True, "data": {"equipmentId": 1, "history": [dict(ENTRY)],
+                                                              "total": 1, "limit": 5, "offset": 0, "hasMore": False}}),
+    (get_all_equipment._ok_schema, {"success": True, "count": 2, "data": [dict(ITEM), dict(ITEM, id=2)]}),
+]
+
+BAD_VALUES = [None, "", "BROKEN", 0, -1, True, 1.5, [], {}, "2025-08-11 10:00", ["Active"]]
+
+
+def _paths(doc, prefix=()):
+    yield prefix
+    if isinstance(doc, dict):
+        for key, value in doc.items():
+            yield from _paths(value, prefix + (key,))
+    elif isinstance(doc, list):
+        for i, value in enumerate(doc):
+            yield from _paths(value, prefix + (i,))
+
+
+def _mutations(doc):
+    """
+    Every document obtained by dropping a key, adding an unknown key, or
+    replacing one value anywhere in `doc`
+    """
+    for path in _paths(doc):
+        if not path:
+            continue
+        *parent_path, last = path
+        for mutate in ("drop", "unknown", *range(len(BAD_VALUES))):
+            mutated = copy.deepcopy(doc)
+            parent = mutated
+            for key in parent_path:
+                parent = parent[key]
+            if mutate == "drop":
+                if isinstance(parent, list):
+                    continue
+                del parent[last]
+            elif mutate == "unknown":
+                if not isinstance(parent, dict):
+                    continue
+                parent["unexpected"] = 1
+            else:
+                parent[last] = BAD_VALUES[mutate]
+            yield mutated
+
+
+@pytest.mark.unit
+class TestCompiledValidator:
+
+    @pytest.mark.parametrize("schema, doc", VALID)
+    def test_agrees_with_cerberus(self, schema, doc):
+        """
+        @description: Compiled validators give cerberus' verdict and errors on valid and mutated documents
+        """
+        for candidate in [doc, *_mutations(doc)]:
+            expected = Validator(schema, require_all=True)
+            v = validator_for(schema)
+            assert v.validate(candidate) == expected.validate(candidate), candidate
+            assert v.errors == expected.errors
+
+
+@pytest.mark.benchmark
+def test_listing_validation_speedup(request):
+    """
+    @description: Compiled validation of a large GET /api/equipment listing vs. a fresh cerberus Validator
+    """
+    n = request.config.getoption("--benchmark-items")
+    body = {"success": True, "count": n, "data": [dict(ITEM, id=i + 1) for i in range(n)]}
+
+    start = time.perf_counter()
+    assert validator_for(get_all_equipment._ok_schema).validate(body)
+    compiled_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assert Validator(get_all_equipment._ok_schema, require_all=True).validate(body)
+    cerberus_s = time.perf_counter() - start
+
+    print(f"\n{n} items: cerberus {cerberus_s:.3f}s, compiled {compiled_s:.3f}s, "
+          f"speedup x{cerberus_s / compiled_s:.1f}")
+    assert compiled_s < cerberus_s
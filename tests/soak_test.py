@@ -0,0 +1,74 @@
+"""
+@Description:  Open-loop soak run over the equipment API: list, create, status update and history
+"""
+import itertools
+import json
+import os
+
+import pytest
+
+from tests.helpers.hooks import Api
+from tests.helpers.naming import unique_name
+from utils.request import ApiRequest
+
+STATUSES = ("Idle", "Under Maintenance", "Active")
+MAX_ERROR_RATE = 0.01
+
+
+# ============================================================
+# Soak suite
+# ============================================================
+@pytest.mark.soak
+class TestSoak(Api):
+    @pytest.fixture
+    def get_headers(self, def_headers):
+        return def_headers
+
+    @pytest.fixture
+    def series(self, request):
+        """
+        @Description: Appends every closed bucket of the soak series to --soak-series as JSON lines
+        """
+        path = request.config.getoption("--soak-series")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            def _write(rows):
+                f.writelines(json.dumps(row, separators=(",", ":")) + "\n" for row in rows)
+                f.flush()
+                overall = rows[0]
+                self.log.info("soak t=%.0fs rps=%.1f p50=%.1f p99=%.1f max=%.1f errors=%s dropped=%s",
+                              overall["t"], overall["throughput"], overall["p50"], overall["p99"],
+                              overall["max"], overall["errors"], overall["dropped"])
+            yield _write
+
+    def test_soak_mixed_traffic(self, get_headers, lease_equipment, soak_runner, series):
+        """
+        @description: Sustain --soak-rate requests/s of mixed traffic for --soak-duration seconds on an
+        open-loop clock; latencies are corrected for coordinated omission.
+        """
+        equipment = [lease_equipment(status="Active") for _ in range(4)]
+        targets = itertools.cycle(item["id"] for item in equipment)
+        statuses = {item["id"]: itertools.cycle(STATUSES) for item in equipment}
+
+        def _status():
+            eq_id = next(targets)
+            return ApiRequest(f"{self.base_uri}/api/equipment/{eq_id}/status", "POST", headers=get_headers,
+                              json={"status": next(statuses[eq_id]), "changedBy": "Soak Operator"})
+
+        scenarios = {
+            "list": lambda: ApiRequest(f"{self.base_uri}/api/equipment", "GET", headers=get_headers),
+            "create": lambda: ApiRequest(f"{self.base_uri}/api/equipment", "POST", headers=get_headers, json={
+                "name": unique_name("Soak Excavator"), "status": "Active", "location": "Site S"}),
+            "status": _status,
+            "history": lambda: ApiRequest(f"{self.base_uri}/api/equipment/{next(targets)}/history", "GET",
+                                          headers=get_headers, params={"limit": 5, "offset": 0}),
+        }
+
+        soak_runner.on_bucket = series
+        self.log.info("Soak\n\turl: %s\n\tprofile: %s", self.base_uri, soak_runner.profile)
+        result = soak_runner.run(scenarios)
+        self.log.info(result.summary())
+
+        assert result.completed > 0, "No soak requests completed"
+        assert result.dropped == 0, f"{result.dropped} requests dropped: the target rate was not sustainable"
+        assert result.error_rate <= MAX_ERROR_RATE, f"Error rate {result.error_rate:.2%} over {MAX_ERROR_RATE:.0%}"
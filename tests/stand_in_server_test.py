@@ -0,0 +1,63 @@
+"""
+@Description:  Offline tests for the stand-in Equipment API (utils.stand_in_server)
+"""
+import pytest
+from cerberus import Validator
+
+from tests.data.schema.equipment_history import _ok_schema as _history_schema
+from tests.data.schema.get_all_equipment import _ok_schema as _listing_schema
+from utils.request import ApiRequest, Transport
+from utils.retry import RetryPolicy
+from utils.stand_in_server import StandInServer
+
+
+@pytest.mark.unit
+class TestStandInServer:
+
+    def test_history_paging_matches_schema(self, transport):
+        """
+        @description: History pages carry total/limit/offset/hasMore and validate against the schema
+        """
+        with StandInServer() as server:
+            eq_id = server.store.create({"name": "Crane", "status": "Idle", "location": "Site C"})["id"]
+            for status in ("Active", "Idle", "Active"):
+                server.store.update_status(eq_id, {"status": status, "changedBy": "Operator John"})
+
+            url = f"{server.url}/api/equipment/{eq_id}/history"
+            first = ApiRequest(url, "GET", params={"limit": 2, "offset": 0}).send(transport).as_dict
+            last = ApiRequest(url, "GET", params={"limit": 2, "offset": 2}).send(transport).as_dict
+            listing = ApiRequest(f"{server.url}/api/equipment", "GET").send(transport).as_dict
+
+        v = Validator(_history_schema, require_all=True)
+        assert v.validate(first), v.errors
+        assert (first["data"]["total"], first["data"]["hasMore"]) == (3, True)
+        assert (len(last["data"]["history"]), last["data"]["hasMore"]) == (1, False)
+
+        v = Validator(_listing_schema, require_all=True)
+        assert v.validate(listing), v.errors
+
+    def test_injected_errors_are_deterministic(self):
+        """
+        @description: The same seed yields the same sequence of injected failures
+        """
+        # not the session transport: its --retries would silently repeat the injected 500s
+        transport = Transport(retry=RetryPolicy(retries=0))
+        runs = []
+        for _ in range(2):
+            with StandInServer(error_rate=0.3, seed=42) as server:
+                url = f"{server.url}/api/equipment"
+                runs.append([ApiRequest(url, "GET").send(transport).status_code for _ in range(30)])
+        transport.close()
+
+        assert runs[0] == runs[1]
+        assert set(runs[0]) == {200, 500}
+
+    def test_shutdown_with_open_connections_is_quiet(self, transport, caplog):
+        """
+        @description: Stopping the server cancels its keep-alive connections without asyncio logging errors
+        """
+        with caplog.at_level("ERROR", logger="asyncio"):
+            with StandInServer() as server:
+                assert ApiRequest(f"{server.url}/api/equipment", "GET").send(transport).status_code == 200
+
+        assert not caplog.records
@@ -0,0 +1,87 @@
+"""
+@Description:  Offline tests for the incremental listing parser in utils.streaming
+"""
+import json
+import tracemalloc
+
+import pytest
+
+from utils.streaming import IdSet, JsonArrayStream
+
+ITEM = {"id": 0, "name": "Excavator CAT 320 é", "status": "Active", "location": "Site A",
+        "lastUpdated": "2025-08-11T10:00:00.123Z"}
+
+
+def _chunked(data, size):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def _listing_bytes(n, chunk_size=64 * 1024):
+    """
+    Generates a GET /api/equipment body for n items in ~chunk_size pieces without ever holding it whole
+    """
+    chunk = bytearray(b'{"success": true, "data": [')
+    for i in range(n):
+        chunk += (b',' if i else b'') + json.dumps(dict(ITEM, id=i + 1)).encode()
+        if len(chunk) >= chunk_size:
+            yield bytes(chunk)
+            chunk.clear()
+    yield bytes(chunk) + f'], "count": {n}}}'.encode()
+
+
+@pytest.mark.unit
+class TestJsonArrayStream:
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+    def test_matches_json_loads(self, chunk_size):
+        """
+        @description: Streaming yields the same items and envelope as json.loads for any chunking
+        """
+        body = {"success": True, "count": 12345, "data": [dict(ITEM, id=i) for i in range(1, 6)], "meta": [1, {}]}
+        raw = json.dumps(body, ensure_ascii=False, indent=1).encode()
+
+        stream = JsonArrayStream(_chunked(raw, chunk_size), "data")
+        assert list(stream) == body["data"]
+        assert stream.envelope == {"success": True, "count": 12345, "meta": [1, {}]}
+        assert stream.count == 5
+
+    def test_empty_listing(self):
+        stream = JsonArrayStream([b'{"success":true,"count":0,"data":[]}'], "data")
+        assert list(stream) == []
+        assert stream.envelope == {"success": True, "count": 0}
+
+    def test_truncated_body_raises(self):
+        with pytest.raises(ValueError):
+            list(JsonArrayStream([b'{"data":[{"id":1},{"id":'], "data"))
+
+    def test_memory_stays_bounded(self):
+        """
+        @description: Peak memory does not grow with the size of the listing
+        """
+        n = 50_000
+        tracemalloc.start()
+        stream = JsonArrayStream(_listing_bytes(n), "data")
+        seen = IdSet()
+        for item in stream:
+            assert seen.add(item["id"])
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert stream.envelope["count"] == stream.count == n
+        assert peak < 1024 * 1024, f"peak {peak / 1024:.0f} KiB"
+
+    def test_id_set_detects_duplicates(self):
+        seen = IdSet()
+        assert seen.add(5) and seen.add(100_000)
+        assert not seen.add(5)
+
+    def test_id_set_memory_does_not_follow_the_largest_id(self):
+        """
+        @description: huge, negative or non-integer ids go to a plain set; the bitmap stays capped
+        """
+        seen = IdSet(max_bytes=1024)
+        for value in (2 ** 40, 2 ** 128 + 1, -3, "8f14e45f", 8191):
+            assert seen.add(value)
+            assert not seen.add(value)
+        assert len(seen._bits) <= 1024  # pylint: disable=protected-access
@@ -0,0 +1,51 @@
+"""
+@Description:  Offline tests for the utils.timing per-phase request timings
+"""
+import pytest
+
+from utils.metrics import MetricsRegistry
+from utils.request import ApiRequest, Transport
+from utils.stand_in_server import StandInServer
+
+LATENCY_MS = 50
+
+
+@pytest.fixture(scope="module")
+def stand_in():
+    with StandInServer(latency_ms=LATENCY_MS) as server:
+        server.store.create({"name": "Item", "status": "Active", "location": "Site A"})
+        yield server
+
+
+@pytest.mark.unit
+class TestRequestTiming:
+
+    def test_phases_of_new_and_reused_connections(self, stand_in):
+        """
+        @description: the first request times dns/connect, a keep-alive reuse only ttfb and body; all are reported
+        """
+        phases = MetricsRegistry()
+        transport = Transport(metrics=MetricsRegistry(), phase_metrics=phases)
+        first = ApiRequest(f"{stand_in.url}/api/equipment/1/history", "GET").send(transport)
+        second = ApiRequest(f"{stand_in.url}/api/equipment/1/history", "GET").send(transport)
+        transport.close()
+
+        assert first.status_code == second.status_code == 200
+        assert set(first.timing.phases()) == {"dns", "connect", "ttfb", "body"}
+        assert not first.timing.reused and second.timing.reused
+        assert set(second.timing.phases()) == {"ttfb", "body"}
+        for timing in (first.timing, second.timing):
+            assert timing.ttfb >= LATENCY_MS * 0.9
+            assert sum(timing.phases().values()) <= timing.total
+        assert phases.histograms["GET /api/equipment/{id}/history ttfb"].count == 2
+        assert phases.histograms["GET /api/equipment/{id}/history connect"].count == 1
+
+    def test_streamed_body_is_not_timed(self, stand_in):
+        """
+        @description: with stream=True the body is read by the caller, so only the header phases are known
+        """
+        transport = Transport(metrics=MetricsRegistry(), phase_metrics=MetricsRegistry())
+        with ApiRequest(f"{stand_in.url}/api/equipment", "GET").stream(transport) as response:
+            assert response.timing.ttfb is not None and response.timing.body is None
+            response.content  # pylint: disable=pointless-statement
+        transport.close()
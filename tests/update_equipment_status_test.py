@@ -2,30 +2,31 @@
 @Author:       Prashanth Sams
 @Created:      Fri Aug  10 22:55:27 2025 (-0400)
 """
+import itertools
 import json
+import threading
 import uuid
 import pytest
-import requests
 import time
 import jsonpath as jp
 
 from jsonpath_ng import parse as rw_parse
-from config import BASE_URI
 from tests.data.schema.update_equipment_status import _ok_schema, _err_schema
+from tests.helpers.contention import check_serializable, contend
 from tests.helpers.hooks import Api
+from utils.log import LazyBody
+from utils.metrics import load_latency
+from utils.request import ApiRequest
+from utils.schema import validator_for
+from utils.waiter import wait_until
 from datetime import datetime, timezone
 
 from requests.structures import CaseInsensitiveDict
 from assertpy import assert_that
-from cerberus import Validator
 
 
 ALLOWED_STATUS = {"Active", "Idle", "Under Maintenance"}
 
-def _unique_name(base: str) -> str:
-    suffix = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f")[-6:]
-    return f"{base} #{suffix}"
-
 def _parse_iso(ts: str) -> datetime:
     return datetime.fromisoformat(ts.replace("Z", "+00:00"))
 
@@ -43,15 +44,6 @@ class TestUpdateEquipmentStatus(Api):
     def get_headers(self, def_headers):
         return def_headers
 
-    def _create_equipment(self, headers, *, name="Excavator CAT 320", status="Idle", location="Site A"):
-        payload = {"name": _unique_name(name), "status": status, "location": location}
-        self.log.info(f'Request\n\turl: {BASE_URI}/api/equipment\n\theaders: {headers}\n\tpayload: {payload}')
-        r = requests.post(f"{BASE_URI}/api/equipment", headers=headers, json=payload, verify=True)
-        assert r.status_code == 201, f"Create failed ({r.status_code}): {r.text}"
-        body = r.json()
-        eq = body["data"]
-        return eq  # dict with id, name, status, location, lastUpdated
-
     def _pick_new_status(self, current: str) -> str:
         order = ["Active", "Idle", "Under Maintenance"]
         if current not in order:
@@ -60,37 +52,37 @@ class TestUpdateEquipmentStatus(Api):
         return order[(idx + 1) % len(order)]
 
     def _get_equipment_list(self, headers):
-        self.log.info(f'Request\n\turl: {BASE_URI}/api/equipment\n\theaders: {headers}')
-        r = requests.get(f"{BASE_URI}/api/equipment", headers=headers, verify=True)
+        self.log.info("Request\n\turl: %s/api/equipment\n\theaders: %s", self.base_uri, headers)
+        r = ApiRequest(f"{self.base_uri}/api/equipment", "GET", headers=headers).send(self.transport)
         assert r.status_code == 200
-        return r.json().get("data", [])
+        return r.as_dict.get("data", [])
 
     @pytest.mark.status
     @pytest.mark.datavalidation
-    def test_update_status(self, get_headers):
+    def test_update_status(self, get_headers, lease_equipment):
         """
         @description: Create an equipment, update its status, validate response & side effects.
         """
-        ## Create equipment with known starting status
-        created = self._create_equipment(get_headers, status="Idle")
+        ## Lease equipment with known starting status
+        created = lease_equipment(status="Idle")
         eq_id = created["id"]
         target_status = self._pick_new_status(created["status"])
         payload = {"status": target_status, "changedBy": "Operator John"}
 
-        self.log.info(f"Request\n\turl: {BASE_URI}/api/equipment/{eq_id}/status\n\theaders: {get_headers}\n\tpayload: {payload}")
-        self.log.info(f"UPDATE status -> id={eq_id}, payload={payload} " f"({BASE_URI}/api/equipment/{eq_id}/status)")
-        r = requests.post(
-            f"{BASE_URI}/api/equipment/{eq_id}/status",
+        self.log.info("Request\n\turl: %s/api/equipment/%s/status\n\theaders: %s\n\tpayload: %s", self.base_uri, eq_id, get_headers, LazyBody(payload))
+        self.log.info("UPDATE status -> id=%s, payload=%s (%s/api/equipment/%s/status)", eq_id, LazyBody(payload), self.base_uri, eq_id)
+        r = ApiRequest(
+            f"{self.base_uri}/api/equipment/{eq_id}/status",
+            "POST",
             headers=get_headers,
             json=payload,
-            verify=True,
-        )
-        self.log.info(f"Response {r.status_code}: {r.text}")
+        ).send(self.transport)
+        self.log.info("Response %s: %s", r.status_code, LazyBody(r.content))
         assert r.status_code == 200
         assert r.headers["Content-Type"].startswith("application/json")
 
-        body = r.json()
-        v = Validator(_ok_schema, require_all=True)
+        body = r.as_dict
+        v = validator_for(_ok_schema)
         assert v.validate(body), f"Schema errors: {v.errors}"
 
         # Envelope & entity checks
@@ -111,17 +103,14 @@ class TestUpdateEquipmentStatus(Api):
         _ = _parse_iso(history["timestamp"])
 
         # Eventually visible via GET /api/equipment
-        found_status = None
-        for _ in range(10):
-            items = self._get_equipment_list(get_headers)
-            for it in items:
-                if it["id"] == eq_id:
-                    found_status = it["status"]
-                    break
-            if found_status == equipment["status"]:
-                break
-            time.sleep(0.3)
-        assert found_status == equipment["status"], "Updated status not reflected in listing"
+        result = wait_until(
+            lambda: self._get_equipment_list(get_headers),
+            lambda items: any(it["id"] == eq_id and it["status"] == equipment["status"] for it in items),
+            timeout=3,
+            name="POST /api/equipment/{id}/status -> GET /api/equipment",
+        )
+        self.log.info("Status visible via GET after %.1f ms (%s attempts)", result.elapsed_ms, result.attempts)
+        assert result.ok, "Updated status not reflected in listing"
 
     @pytest.mark.negative
     @pytest.mark.schema
@@ -129,27 +118,27 @@ class TestUpdateEquipmentStatus(Api):
         {"status": "BROKEN", "changedBy": "Operator John"},  # invalid status
         {"changedBy": "Operator John"},                      # missing status
     ])
-    def test_update_status_400_bad_request(self, get_headers, bad_payload):
+    def test_update_status_400_bad_request(self, get_headers, lease_equipment, bad_payload):
         """
         @description: Test updating status with invalid payload.
         """
-        created = self._create_equipment(get_headers, status="Active")
+        created = lease_equipment(status="Active")
         eq_id = created["id"]
 
-        self.log.info(f'Request\n\turl: {BASE_URI}/api/equipment/{eq_id}/status\n\theaders: {get_headers}\n\tpayload: {bad_payload}')
-        r = requests.post(
-            f"{BASE_URI}/api/equipment/{eq_id}/status",
+        self.log.info("Request\n\turl: %s/api/equipment/%s/status\n\theaders: %s\n\tpayload: %s", self.base_uri, eq_id, get_headers, LazyBody(bad_payload))
+        r = ApiRequest(
+            f"{self.base_uri}/api/equipment/{eq_id}/status",
+            "POST",
             headers=get_headers,
             json=bad_payload,
-            verify=True,
-        )
-        self.log.info(f"400 attempt id={eq_id} payload={bad_payload} -> {r.status_code} {r.text}")
+        ).send(self.transport)
+        self.log.info("400 attempt id=%s payload=%s -> %s %s", eq_id, LazyBody(bad_payload), r.status_code, LazyBody(r.content))
 
         assert r.status_code == 400
         assert r.headers["Content-Type"].startswith("application/json")
 
-        v = Validator(_err_schema, require_all=True)
-        assert v.validate(r.json()), f"Schema errors: {v.errors}"
+        v = validator_for(_err_schema)
+        assert v.validate(r.as_dict), f"Schema errors: {v.errors}"
 
     @pytest.mark.negative
     @pytest.mark.schema
@@ -162,37 +151,95 @@ class TestUpdateEquipmentStatus(Api):
         missing_id = max_id + 99999
 
         payload = {"status": "Idle", "changedBy": "Operator John"}
-        r = requests.post(
-            f"{BASE_URI}/api/equipment/{missing_id}/status",
+        r = ApiRequest(
+            f"{self.base_uri}/api/equipment/{missing_id}/status",
+            "POST",
             headers=get_headers,
             json=payload,
-            verify=True,
-        )
-        self.log.info(f"404 attempt id={missing_id} -> {r.status_code} {r.text}")
+        ).send(self.transport)
+        self.log.info("404 attempt id=%s -> %s %s", missing_id, r.status_code, LazyBody(r.content))
 
         assert r.status_code == 404
         assert r.headers["Content-Type"].startswith("application/json")
 
-        v = Validator(_err_schema, require_all=True)
-        assert v.validate(r.json()), f"Schema errors: {v.errors}"
+        v = validator_for(_err_schema)
+        assert v.validate(r.as_dict), f"Schema errors: {v.errors}"
 
     @pytest.mark.performance
-    def test_update_status_response_time(self, get_headers):
+    def test_update_status_response_time(self, get_headers, lease_equipment, load_runner, perf_gate):
         """
-        @description: Measure the response time for updating equipment status.
+        @description: Measure the response time for updating equipment status. Every virtual user updates
+        its own equipment, so this measures plain updates; write contention on one item is benchmarked
+        by the contention tests below.
         """
-        created = self._create_equipment(get_headers, status="Active")
-        eq_id = created["id"]
-        payload = {"status": self._pick_new_status(created["status"]), "changedBy": "Operator John"}
+        leased = iter([lease_equipment(status="Active") for _ in range(load_runner.profile.users)])
+        lock = threading.Lock()
+        user = threading.local()
+
+        def _update():
+            # each virtual user is one thread: it takes its own item and status cycle on its first request
+            if not hasattr(user, "eq_id"):
+                with lock:
+                    user.eq_id = next(leased)["id"]
+                user.statuses = itertools.cycle(["Idle", "Under Maintenance", "Active"])
+            payload = {"status": next(user.statuses), "changedBy": "Operator John"}
+            return ApiRequest(f"{self.base_uri}/api/equipment/{user.eq_id}/status", "POST", headers=get_headers,
+                              json=payload)
+
+        self.log.info("Load\n\turl: %s/api/equipment/{id}/status, one id per user\n\tprofile: %s", self.base_uri,
+                      load_runner.profile)
+        stats = load_runner.run({"POST /api/equipment/{id}/status": _update})["POST /api/equipment/{id}/status"]
+        self.log.info(stats.summary())
+
+        assert stats.count > 0, "No samples collected"
+        assert stats.errors == 0, f"{stats.errors} failed requests, first: {stats.failures}"
+        verdict = perf_gate.check(stats, budget_ms=500)
+        self.log.info(verdict.summary())
+        assert not verdict.failed, verdict.summary()
+
+    def _contend(self, contention, lease_equipment, ids_per_level, label):
+        """
+        Steps through the --contention-levels writer counts on fresh equipment, logs how latency and
+        throughput degrade with K and checks every run's history for lost or non-serializable updates.
+        """
+        results = []
+        for writers in contention["levels"]:
+            leased = [lease_equipment(status="Active") for _ in range(ids_per_level)]
+            result = contend(self.base_uri, [item["id"] for item in leased], writers,
+                             contention["updates"], transport=self.transport, metrics=load_latency,
+                             key=f"POST /api/equipment/{{id}}/status {label} K={writers}")
+            results.append(result)
+            self.log.info("%s %s", label, result.summary())
+            if result.queued_ms:
+                self.log.warning("%s K=%s: the client-side limiter held writers back, so throughput and the writers "
+                                 "in flight are capped by it; run with --limits=off to load the server alone",
+                                 label, writers)
+
+            assert not result.errors, f"K={writers}: {len(result.errors)} failed updates, e.g. {result.errors[:3]}"
+            for item in leased:
+                problems = check_serializable(self.base_uri, item["id"], item["status"], result.acked[item["id"]],
+                                              result.tag, transport=self.transport)
+                assert not problems, f"K={writers}, equipment {item['id']}: {problems}"
+
+        base = results[0]
+        for result in results[1:]:
+            self.log.info("%s K=%s vs K=%s: throughput x%.2f, p95 x%.2f", label, result.writers, base.writers,
+                          result.throughput / base.throughput if base.throughput else 0.0,
+                          result.latency.value_at_percentile(95) / max(base.latency.value_at_percentile(95), 1e-9))
+        return results
 
-        self.log.info(f"Request\n\turl: {BASE_URI}/api/equipment/{eq_id}/status\n\theaders: {get_headers}\n\tpayload: {payload}")
-        r = requests.post(
-            f"{BASE_URI}/api/equipment/{eq_id}/status",
-            headers=get_headers,
-            json=payload,
-            verify=True,
-        )
-        elapsed_ms = r.elapsed.total_seconds() * 1000
-        self.log.info(f"UPDATE time: {elapsed_ms:.1f} ms (status={r.status_code})")
-        assert elapsed_ms <= 500, f"Slow status update: {elapsed_ms:.1f} ms"
-        assert r.status_code == 200
+    @pytest.mark.performance
+    def test_update_status_contention_single_id(self, lease_equipment, contention):
+        """
+        @description: K concurrent writers transition one equipment; latency/throughput per K, and the
+        history stays a single serializable previousStatus -> newStatus chain with no lost updates.
+        """
+        self._contend(contention, lease_equipment, 1, "one id")
+
+    @pytest.mark.performance
+    def test_update_status_contention_hot_set(self, lease_equipment, contention):
+        """
+        @description: K concurrent writers spread over a hot set of equipment; every item's history
+        stays serializable with no lost updates.
+        """
+        self._contend(contention, lease_equipment, contention["hot_set"], "hot set")
@@ -0,0 +1,31 @@
+"""
+@Description:  Offline tests for the utils.waiter eventual-consistency helper
+"""
+import pytest
+
+from utils.metrics import consistency
+from utils.waiter import wait_until
+
+
+@pytest.mark.unit
+class TestWaitUntil:
+
+    def test_converges_and_records_time_to_consistency(self):
+        """
+        @description: wait_until retries with backoff until the predicate holds and records the wait
+        """
+        calls = iter(range(100))
+        result = wait_until(lambda: next(calls), lambda n: n >= 3, timeout=2, initial_delay=0.01,
+                            name="unit -> converge")
+
+        assert (result.ok, result.value, result.attempts) == (True, 3, 4)
+        assert consistency.to_dict()["unit -> converge"]["count"] >= 1
+
+    def test_gives_up_at_deadline(self):
+        """
+        @description: wait_until stops at the overall deadline instead of a fixed attempt count
+        """
+        result = wait_until(lambda: None, lambda _: False, timeout=0.3, initial_delay=0.05, max_delay=0.1)
+
+        assert not result.ok
+        assert 300 <= result.elapsed_ms < 500
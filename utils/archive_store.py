@@ -0,0 +1,206 @@
+"""
+SQLite index over the archived JSON reports, for trend queries.
+
+    python -m utils.archive_store ingest
+    python -m utils.archive_store endpoint "GET /api/equipment/{id}/history" --stat p95 --last 500
+    python -m utils.archive_store test "tests/get_all_equipment_test.py::TestGetAllEquipment::test_equipment_schema"
+    python -m utils.archive_store failures --last 50
+
+Ingestion is incremental: every file is remembered with its mtime and size
+and only new or changed files are parsed. pytest-json reports in either
+layout are read; any other JSON (pytest-html-reporter builds) is recorded
+as seen and skipped.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+from utils.metrics import REPORTED
+from utils.report import report_attributes, report_tests
+
+ARCHIVE_DIR = 'report/archive'
+DB_PATH = 'report/archive/index.sqlite'
+STATS = ('count', 'mean', 'p50', 'p90', 'p95', 'p99', 'max')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, run_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY, created_at REAL, env TEXT, duration REAL, num_tests INTEGER
+);
+CREATE TABLE IF NOT EXISTS tests (
+    run_id INTEGER, created_at REAL, test_id TEXT, outcome TEXT, duration REAL
+);
+CREATE TABLE IF NOT EXISTS endpoints (
+    run_id INTEGER, created_at REAL, metric TEXT, endpoint TEXT,
+    count INTEGER, mean REAL, p50 REAL, p90 REAL, p95 REAL, p99 REAL, max REAL
+);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs (created_at);
+CREATE INDEX IF NOT EXISTS tests_by_id ON tests (test_id, created_at);
+CREATE INDEX IF NOT EXISTS tests_by_outcome ON tests (outcome, created_at);
+CREATE INDEX IF NOT EXISTS endpoints_by_name ON endpoints (endpoint, metric, created_at);
+'''
+
+
+def _timestamp(created_at, fallback):
+    try:
+        return datetime.fromisoformat(str(created_at)).timestamp()
+    except ValueError:
+        return fallback
+
+
+class ArchiveStore:
+    """
+    Runs, per-test outcomes and per-endpoint latency stats of every archived report
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def ingest(self, archive_dir=ARCHIVE_DIR):
+        """
+        Loads new or changed reports under `archive_dir`; returns the number of runs added
+        """
+        archive_dir = Path(archive_dir)
+        known = {path: (mtime_ns, size, run_id)
+                 for path, mtime_ns, size, run_id in self.db.execute('SELECT * FROM files')}
+        added = 0
+        with self.db:
+            for path in sorted([*archive_dir.glob('*.json'), *archive_dir.glob('json/*.json')]):
+                stat = path.stat()
+                seen = known.get(str(path))
+                if seen is not None and seen[:2] == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                if seen is not None and seen[2] is not None:
+                    self._forget(seen[2])
+                run_id = self._ingest_file(path, stat.st_mtime)
+                added += run_id is not None
+                self.db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)',
+                                (str(path), stat.st_mtime_ns, stat.st_size, run_id))
+        return added
+
+    def _forget(self, run_id):
+        for table, column in (('runs', 'id'), ('tests', 'run_id'), ('endpoints', 'run_id')):
+            self.db.execute(f'DELETE FROM {table} WHERE {column} = ?', (run_id,))
+
+    def _ingest_file(self, path, mtime):
+        try:
+            with open(path, encoding='utf-8') as f:
+                report = json.load(f)
+            tests = report_tests(report)
+        except (OSError, ValueError, AttributeError):
+            return None
+        if tests is None:
+            return None
+
+        attributes = report_attributes(report)
+        created_at = _timestamp(attributes.get('created_at'), mtime)
+        summary = attributes.get('summary', {})
+        run_id = self.db.execute(
+            'INSERT INTO runs (created_at, env, duration, num_tests) VALUES (?, ?, ?, ?)',
+            (created_at, attributes.get('env'), summary.get('duration'), summary.get('num_tests', len(tests)))
+        ).lastrowid
+        self.db.executemany('INSERT INTO tests VALUES (?, ?, ?, ?, ?)', [
+            (run_id, created_at, test.get('name'), test.get('outcome'), test.get('duration'))
+            for test in tests
+        ])
+        self.db.executemany('INSERT INTO endpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+            (run_id, created_at, metric, endpoint, hist.get('count'), hist.get('mean'),
+             *(hist.get('percentiles', {}).get(p) for p in ('p50', 'p90', 'p95', 'p99')), hist.get('max'))
+            for metric in REPORTED
+            for endpoint, hist in (attributes.get(metric) or {}).items()
+        ])
+        return run_id
+
+    def endpoint_trend(self, endpoint, stat='p95', metric='load_latency', last=500, env=None):
+        """
+        [(created_at, value)] of one endpoint statistic over the `last` runs that measured it, oldest first
+        """
+        if stat not in STATS:
+            raise ValueError(f'Unknown stat {stat!r}, expected one of {STATS}')
+        rows = self.db.execute(
+            f'SELECT e.created_at, e.{stat} FROM endpoints e JOIN runs r ON r.id = e.run_id '
+            'WHERE e.endpoint = ? AND e.metric = ? AND (? IS NULL OR r.env = ?) '
+            'ORDER BY e.created_at DESC LIMIT ?',
+            (endpoint, metric, env, env, last)).fetchall()
+        return rows[::-1]
+
+    def test_trend(self, test_id, last=500):
+        """
+        [(created_at, outcome, duration)] of one test over its `last` runs, oldest first
+        """
+        rows = self.db.execute(
+            'SELECT created_at, outcome, duration FROM tests WHERE test_id = ? '
+            'ORDER BY created_at DESC LIMIT ?', (test_id, last)).fetchall()
+        return rows[::-1]
+
+    def failures(self, last=50):
+        """
+        [(test_id, failed, runs)] for tests that did not pass in the `last` runs, most failures first
+        """
+        since = self.db.execute(
+            'SELECT MIN(created_at) FROM (SELECT created_at FROM runs ORDER BY created_at DESC LIMIT ?)',
+            (last,)).fetchone()[0]
+        return self.db.execute(
+            "SELECT test_id, SUM(outcome NOT IN ('passed', 'skipped')) AS failed, COUNT(*) FROM tests "
+            'WHERE created_at >= ? GROUP BY test_id HAVING failed > 0 ORDER BY failed DESC, test_id',
+            (since or 0,)).fetchall()
+
+
+def _when(created_at):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created_at))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Trend queries over the archived test reports')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--archive', default=ARCHIVE_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('ingest', help='load new archived reports')
+    endpoint = commands.add_parser('endpoint', help='one latency statistic of an endpoint per run')
+    endpoint.add_argument('name')
+    endpoint.add_argument('--stat', default='p95', choices=STATS)
+    endpoint.add_argument('--metric', default='load_latency', choices=tuple(REPORTED))
+    endpoint.add_argument('--env', default=None)
+    endpoint.add_argument('--last', type=int, default=500)
+    test = commands.add_parser('test', help='outcome and duration of a test per run')
+    test.add_argument('name')
+    test.add_argument('--last', type=int, default=500)
+    failures = commands.add_parser('failures', help='tests that failed in recent runs')
+    failures.add_argument('--last', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    store = ArchiveStore(args.db)
+    try:
+        added = store.ingest(args.archive)
+        start = time.perf_counter()
+        if args.command == 'ingest':
+            print(f'{added} new runs ingested')
+        elif args.command == 'endpoint':
+            for created_at, value in store.endpoint_trend(args.name, args.stat, args.metric, args.last, args.env):
+                print(f'{_when(created_at)}  {value}')
+        elif args.command == 'test':
+            for created_at, outcome, duration in store.test_trend(args.name, args.last):
+                # old reports may lack a test's outcome or duration
+                print(f'{_when(created_at)}  {outcome or "-":<8} {"-" if duration is None else f"{duration:.3f}s"}')
+        else:
+            for test_id, failed, runs in store.failures(args.last):
+                print(f'{failed:>4}/{runs:<4} {test_id}')
+        if args.command != 'ingest':
+            print(f'({(time.perf_counter() - start) * 1000:.1f} ms)')
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+"""
+Record/replay of API traffic through the shared Transport.
+
+A cassette is one binary file:
+
+    MAGIC | entry | entry | ... | index | footer
+
+Each entry is a zlib-compressed JSON header line (request and response
+metadata) followed by the raw response body. A streamed response is
+compressed chunk by chunk as the test reads it, into a spooled temporary
+file, and its entry is appended when the body ends or the response is
+closed; the rest of the body is read then if the test stopped early. The index is a compressed JSON
+map of request key -> [[offset, length, path], ...] in recording order, and
+the footer holds its position, so a replay maps the file once and
+decompresses only the entries it serves.
+
+Request keys are built from the method, the route with ids collapsed
+(utils.metrics.route_template), the query and the JSON body with every
+digit run replaced by '#', so `_unique_name` suffixes and generated ids
+match across runs. Among entries with the same key, one recorded for the
+exact same path is preferred, so ids handed out by replayed responses keep
+getting their own answers even when tests run in another order.
+
+Strings that differ between the recorded and the replayed request bodies
+are remembered and substituted back into every later response, so a
+freshly generated name is echoed the way a live API would echo it.
+"""
+import glob
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import zlib
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, stream_decode_response_unicode
+
+from utils.metrics import route_template
+from utils.request import Transport
+
+MAGIC = b'APICASS1'
+_FOOTER = struct.Struct('<QI')
+_DIGITS = re.compile(r'\d+')
+# recorded bodies are already decoded, so these no longer describe them
+_DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+# compressed bytes of a streamed entry kept in memory before it spills to disk
+SPOOL_SIZE = 1 << 20
+_DRAIN_CHUNK = 65536
+
+
+class CassetteMiss(LookupError):
+    """
+    Raised in replay mode for a request that was never recorded
+    """
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return _DIGITS.sub('#', value)
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def request_key(method, url, params=None, json_body=None, data=None):
+    """
+    Matching key of a request; ids and digit runs never take part in a match
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query) + sorted((params or {}).items())
+    body = _normalize(json_body) if json_body is not None else _normalize(data)
+    return ' '.join((
+        method.upper(),
+        route_template(url),
+        json.dumps(sorted((str(k), str(v)) for k, v in query)),
+        json.dumps(body, sort_keys=True, default=str),
+    ))
+
+
+def _aliases(recorded, current, found):
+    """
+    Collects recorded -> current pairs of strings that differ between two request bodies
+    """
+    if isinstance(recorded, str) and isinstance(current, str):
+        if recorded != current:
+            found[recorded] = current
+    elif isinstance(recorded, dict) and isinstance(current, dict):
+        for key in recorded.keys() & current.keys():
+            _aliases(recorded[key], current[key], found)
+    elif isinstance(recorded, list) and isinstance(current, list):
+        for old, new in zip(recorded, current):
+            _aliases(old, new, found)
+    return found
+
+
+def _substitute(value, aliases):
+    if isinstance(value, str):
+        return aliases.get(value, value)
+    if isinstance(value, dict):
+        return {k: _substitute(v, aliases) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_substitute(v, aliases) for v in value]
+    return value
+
+
+def _response(url, status, reason, headers, body):
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason
+    response.url = url
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.elapsed = timedelta(0)
+    # a fully read body: iter_content() slices it, close() has no connection to release
+    response._content = body  # pylint: disable=protected-access
+    response._content_consumed = True  # pylint: disable=protected-access
+    return response
+
+
+class CassetteWriter:
+    """
+    Appends entries as they are recorded; the index is written by close()
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._file = open(path, 'wb')  # pylint: disable=consider-using-with
+        self._file.write(MAGIC)
+        self._index = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _head(method, url, json_body, response):
+        return json.dumps({
+            'method': method.upper(),
+            'url': url,
+            'json': json_body,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS},
+        }, separators=(',', ':'), default=str).encode()
+
+    def add(self, method, url, params, json_body, data, response):
+        blob = zlib.compress(self._head(method, url, json_body, response) + b'\n' + response.content)
+        key = request_key(method, url, params, json_body, data)
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(blob)
+            self._index.setdefault(key, []).append((offset, len(blob), urlsplit(url).path))
+
+    def add_streamed(self, method, url, params, json_body, data, response):
+        """
+        Records a response opened with stream=True as its body is read; see _StreamedEntry
+        """
+        _StreamedEntry(self, request_key(method, url, params, json_body, data), urlsplit(url).path,
+                       self._head(method, url, json_body, response), response)
+
+    def _append(self, key, path, spool):
+        with self._lock:
+            offset = self._file.tell()
+            spool.seek(0)
+            while chunk := spool.read(_DRAIN_CHUNK):
+                self._file.write(chunk)
+            self._index.setdefault(key, []).append((offset, self._file.tell() - offset, path))
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            index = zlib.compress(json.dumps(self._index, separators=(',', ':')).encode())
+            offset = self._file.tell()
+            self._file.write(index)
+            self._file.write(_FOOTER.pack(offset, len(index)))
+            self._file.close()
+
+
+class _StreamedEntry:
+    """
+    Hooks a streamed response's iter_content() (which content, json() and
+    iter_lines() go through as well) and close(): every chunk the test reads
+    is compressed into a spooled file, and the entry is appended to the
+    cassette once the body is exhausted
+    """
+
+    def __init__(self, writer, key, path, head, response):
+        self._writer = writer
+        self._key = key
+        self._path = path
+        self._response = response
+        self._compressor = zlib.compressobj()
+        self._spool = tempfile.SpooledTemporaryFile(SPOOL_SIZE)  # pylint: disable=consider-using-with
+        self._spool.write(self._compressor.compress(head + b'\n'))
+        self._iter_content = response.iter_content
+        self._close = response.close
+        self._done = False
+        response.iter_content = self.iter_content
+        response.close = self.close
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        chunks = self._record(self._iter_content(chunk_size))
+        return stream_decode_response_unicode(chunks, self._response) if decode_unicode else chunks
+
+    def _record(self, chunks):
+        for chunk in chunks:
+            self._spool.write(self._compressor.compress(chunk))
+            yield chunk
+        self._finish()
+
+    def _finish(self):
+        if self._done:
+            return
+        self._done = True
+        self._spool.write(self._compressor.flush())
+        self._writer._append(self._key, self._path, self._spool)  # pylint: disable=protected-access
+        self._spool.close()
+
+    def close(self):
+        try:
+            if not self._done:
+                # the test stopped early: the replay still needs the whole body
+                for _ in self.iter_content(_DRAIN_CHUNK):
+                    pass
+        finally:
+            self._close()
+
+
+class Cassette:
+    """
+    Read-only, memory-mapped cassette(s). Requests with the same key are
+    answered in recording order; once exhausted the last response repeats.
+    """
+
+    def __init__(self, *paths):
+        if not paths:
+            raise FileNotFoundError('No cassette files given')
+        self._maps = []
+        self._entries = {}
+        self._cursor = {}
+        self._aliases = {}
+        self._lock = threading.Lock()
+        for path in paths:
+            self._load(path)
+
+    @classmethod
+    def open(cls, path):
+        """
+        Loads `path`, or the per-worker files of a parallel recording next to it
+        """
+        if os.path.exists(path):
+            return cls(path)
+        stem, suffix = os.path.splitext(path)
+        return cls(*sorted(glob.glob(f'{glob.escape(stem)}.*{suffix}')))
+
+    def _load(self, path):
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(MAGIC)] != MAGIC or len(mapped) < len(MAGIC) + _FOOTER.size:
+            mapped.close()
+            raise ValueError(f'{path} is not a complete cassette')
+        offset, length = _FOOTER.unpack(mapped[-_FOOTER.size:])
+        index = json.loads(zlib.decompress(mapped[offset:offset + length]))
+        self._maps.append(mapped)
+        for key, spans in index.items():
+            for start, size, path in spans:
+                self._entries.setdefault(key, []).append((mapped, start, size))
+                self._entries.setdefault((key, path), []).append((mapped, start, size))
+
+    def __len__(self):
+        return sum(len(spans) for key, spans in self._entries.items() if isinstance(key, str))
+
+    def play(self, method, url, params=None, json_body=None, data=None):
+        key = request_key(method, url, params, json_body, data)
+        with self._lock:
+            exact = (key, urlsplit(url).path)
+            if exact in self._entries:
+                key = exact
+            spans = self._entries.get(key)
+            if not spans:
+                raise CassetteMiss(f'No recorded response for {key}')
+            position = self._cursor.get(key, 0)
+            self._cursor[key] = position + 1
+        mapped, start, size = spans[min(position, len(spans) - 1)]
+        head, _, body = zlib.decompress(mapped[start:start + size]).partition(b'\n')
+        meta = json.loads(head)
+
+        with self._lock:
+            if json_body is not None:
+                _aliases(meta['json'], json_body, self._aliases)
+            aliases = dict(self._aliases)
+        if aliases and body:
+            try:
+                body = json.dumps(_substitute(json.loads(body), aliases), separators=(',', ':')).encode()
+            except ValueError:
+                pass
+        return _response(url, meta['status'], meta['reason'], meta['headers'], body)
+
+    def close(self):
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+
+
+class RecordingTransport(Transport):
+    """
+    Transport that sends every request for real and also writes it to a cassette;
+    a streamed response is written as it is read, never held in memory whole
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = CassetteWriter(path)
+
+    def request(self, method, url, **kwargs):
+        response = super().request(method, url, **kwargs)
+        add = self.writer.add_streamed if kwargs.get('stream') else self.writer.add
+        add(method, url, kwargs.get('params'), kwargs.get('json'), kwargs.get('data'), response)
+        return response
+
+    def close(self):
+        super().close()
+        self.writer.close()
+
+
+class ReplayTransport(Transport):
+    """
+    Transport that answers every request from a cassette without touching the network
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = Cassette.open(path)
+
+    def request(self, method, url, **kwargs):
+        return self.cassette.play(method, url, kwargs.get('params'), kwargs.get('json'), kwargs.get('data'))
+
+    def close(self):
+        super().close()
+        self.cassette.close()
@@ -0,0 +1,241 @@
+"""
+Generated data-driven cases from a payload template and a cerberus schema.
+
+For every field of `schema`, field_variants() derives a list of labelled
+values from its rules: the allowed values and deliberately wrong ones
+(wrong case, padding, unknown), the length boundaries (minlength,
+maxlength, or a long string if there is no maxlength), unicode, blank,
+null, wrong type and a missing key. A CaseSet then holds
+
+1. every variant of one field, with the other fields left at the template
+   ("name-min", "status-lower", "location-missing", ...); template fields
+   that are missing or invalid start from `defaults`, or else from their
+   first valid variant;
+2. `extra` seeded random combinations of variants over all fields
+   ("mix-000042-name.unicode-status.idle-location.blank").
+
+A CaseSet is a lazy sequence that builds each Case only when it is
+indexed, so a large set can be read in slices without ever holding all
+of it (pytest's parametrize would: one collected item per case). Cases
+are small: the template and the shared variant values are referenced,
+not copied, and a payload dict is only built when a test reads
+Case.payload. Whether a case is valid is the schema's verdict on that
+payload; what the API is known to do with it (Case.expected) comes from
+`established`, the variants other tests already show to be accepted or
+rejected, and is None for the rest. A case's id depends only on the
+template, schema, seed and its position, so it is the same in every run
+and process; shard=(index, total) keeps the ids whose CRC32 falls on
+`index`, which splits a run deterministically over `total` machines.
+"""
+import re
+import zlib
+from array import array
+from collections.abc import Sequence
+
+from utils.schema import SchemaValidator, compile_schema, validator_for
+
+MISSING = type('Missing', (), {'__repr__': lambda self: '<missing>'})()
+LONG_LENGTH = 1000
+UNICODE_TEXT = 'Gerät ✓ 起重机'
+_SLUG = re.compile(r'[^a-z0-9]+')
+_MASK64 = (1 << 64) - 1
+
+_WRONG_TYPES = {
+    'string': ('number', 42),
+    'integer': ('string', '42'),
+    'boolean': ('string', 'true'),
+    'dict': ('list', []),
+    'list': ('dict', {}),
+}
+
+
+def _slug(value):
+    return _SLUG.sub('-', str(value).lower()).strip('-') or 'empty'
+
+
+def field_variants(rules):
+    """
+    [(label, value)] probing one field's cerberus `rules`; MISSING drops the key
+    """
+    variants = []
+    if 'allowed' in rules:
+        allowed = list(rules['allowed'])
+        variants += [(_slug(value), value) for value in sorted(allowed, key=str)]
+        sample = sorted(allowed, key=str)[0]
+        if isinstance(sample, str):
+            if sample.lower() not in allowed:
+                variants.append(('lower', sample.lower()))
+            if sample.upper() not in allowed:
+                variants.append(('upper', sample.upper()))
+            variants += [('padded', f' {sample} '), ('unknown', 'Retired'), ('empty', '')]
+    elif rules.get('type') == 'string':
+        minlength = rules.get('minlength', 0)
+        maxlength = rules.get('maxlength')
+        variants += [('min', 'A' * max(minlength, 1)), ('unicode', UNICODE_TEXT), ('padded', '  Padded value  ')]
+        if minlength:
+            variants.append(('below-min', 'A' * (minlength - 1)))
+        if maxlength is not None:
+            variants += [('max', 'A' * maxlength), ('above-max', 'A' * (maxlength + 1))]
+        else:
+            variants.append(('long', 'A' * LONG_LENGTH))
+        variants.append(('blank', '   '))
+    elif 'min' in rules or 'max' in rules:
+        for bound, step in (('min', -1), ('max', 1)):
+            if bound in rules:
+                variants += [(bound, rules[bound]), (f'{"below" if step < 0 else "above"}-{bound}',
+                                                     rules[bound] + step)]
+    if rules.get('type') in _WRONG_TYPES:
+        variants.append(_WRONG_TYPES[rules['type']])
+    variants += [('null', None), ('missing', MISSING)]
+    return variants
+
+
+class Case:
+    """
+    One generated case; `payload`, `valid` and `expected` are computed on access
+    """
+    __slots__ = ('id', 'template', 'overrides', 'schema', 'labels', 'established')
+
+    def __init__(self, case_id, template, overrides, schema, labels=None, established=None):
+        self.id = case_id
+        self.template = template
+        self.overrides = overrides
+        self.schema = schema
+        self.labels = labels or {}
+        self.established = established or {}
+
+    @property
+    def payload(self):
+        payload = dict(self.template)
+        for field, value in self.overrides.items():
+            if value is MISSING:
+                payload.pop(field, None)
+            else:
+                payload[field] = value
+        return payload
+
+    @property
+    def valid(self):
+        return validator_for(self.schema).validate(self.payload)
+
+    @property
+    def expected(self):
+        """
+        What the API is known to do with this case: False if any varied field's variant is
+        established as rejected, True if every one is established as accepted, else None
+        """
+        verdicts = [self.established.get(field, {}).get(label) for field, label in self.labels.items()]
+        if False in verdicts:
+            return False
+        return True if verdicts and all(verdicts) else None
+
+    def __repr__(self):
+        return self.id
+
+    __str__ = __repr__
+
+
+def complete_template(template, schema, defaults=None):
+    """
+    `template` with every field of `schema` that it lacks, or holds an invalid
+    value for, set to its value in `defaults` if that is valid, else to the
+    field's first valid variant
+    """
+    completed = dict(template)
+    defaults = defaults or {}
+    for field, rules in schema.items():
+        # a throwaway schema: validator_for would cache it by id() forever without a hit
+        field_schema = {field: rules}
+        check = SchemaValidator(field_schema, True, compile_schema(field_schema, True))
+        if field not in completed or not check.validate({field: completed[field]}):
+            candidates = ([defaults[field]] if field in defaults else []) + \
+                [value for _, value in field_variants(rules) if value is not MISSING]
+            completed[field] = next(value for value in candidates if check.validate({field: value}))
+    return completed
+
+
+def _splitmix64(x):
+    """
+    Well-mixed 64-bit hash of an integer: the same random-looking value for the same
+    seed and position in every process, without the cost of seeding a random.Random
+    """
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def in_shard(case_id, shard):
+    """
+    True if `case_id` belongs to shard (index, total), indexes counting from 0
+    """
+    if shard is None:
+        return True
+    index, total = shard
+    return zlib.crc32(case_id.encode()) % total == index
+
+
+def parse_shard(text):
+    """
+    "2/4" -> (1, 4): the second of four shards; None for no sharding
+    """
+    if not text:
+        return None
+    index, _, total = text.partition('/')
+    index, total = int(index), int(total)
+    if not 1 <= index <= total:
+        raise ValueError(f'Shard {text!r} is not i/n with 1 <= i <= n')
+    return index - 1, total
+
+
+class CaseSet(Sequence):
+    """
+    The single-field variants, then `extra` seeded random combinations, of
+    `template` under `schema`, as a lazy sequence: a Case is only built
+    when it is indexed or iterated over; see the module docstring
+    """
+
+    def __init__(self, template, schema, extra=0, seed=0, shard=None, singles=True, defaults=None,
+                 established=None):
+        self.template = complete_template(template, schema, defaults)
+        self.schema = schema
+        # {field: {variant label: True if known to be accepted, False if known to be rejected}}
+        self.established = established or {}
+        self.seed = seed
+        self.variants = {field: field_variants(rules) for field, rules in schema.items()}
+        self._singles = [(field, option) for field, options in self.variants.items() for option in options]
+        # singles=False leaves out the single-field variants: only the `extra` combinations
+        self._start = 0 if singles else len(self._singles)
+        total = len(self._singles) + extra
+        # positions of the cases in the shard, 4 bytes each; None keeps all of them
+        self._positions = None if shard is None else \
+            array('I', (i for i in range(self._start, total) if in_shard(self._case(i)[0], shard)))
+        self._total = total - self._start
+
+    def _case(self, i):
+        if i < len(self._singles):
+            field, (label, value) = self._singles[i]
+            return f'{field}-{label}', {field: value}, {field: label}
+        i -= len(self._singles)
+        picks = {}
+        state = _splitmix64((self.seed << 32) + i)
+        for field, options in self.variants.items():
+            state, pick = divmod(state, len(options))
+            picks[field] = options[pick]
+        labels = '-'.join(f'{field}.{label}' for field, (label, _) in picks.items())
+        return (f'mix-{i:06d}-{labels}', {field: value for field, (_, value) in picks.items()},
+                {field: label for field, (label, _) in picks.items()})
+
+    def __len__(self):
+        return self._total if self._positions is None else len(self._positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        position = self._start + index if self._positions is None else self._positions[index]
+        case_id, overrides, labels = self._case(position)
+        return Case(case_id, self.template, overrides, self.schema, labels, self.established)
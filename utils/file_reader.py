@@ -1,14 +1,68 @@
 import json
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from types import MappingProxyType
 
-BASE_PATH = Path.cwd().joinpath('tests', 'data')
+BASE_PATH = Path(__file__).resolve().parent.parent.joinpath('tests', 'data')
+CACHE_SIZE = 128
 
-def read_json_file(fname):
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def _thaw(value):
+    if isinstance(value, MappingProxyType):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+def _load(path):
+    """
+    Parsed, deep-frozen content of `path`; re-read only when its mtime or size
+    changes, keeping at most CACHE_SIZE files (least recently used evicted)
+    """
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    key = str(path)
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] == signature:
+            _cache.move_to_end(key)
+            return hit[1]
+
+    with open(path) as json_file:
+        data = _freeze(json.load(json_file))
+
+    with _cache_lock:
+        _cache[key] = (signature, data)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return data
+
+def read_json_file(fname, frozen=False):
     """
-    Reads a json file and returns the data as a dictionary
+    Reads a json file and returns the data as a dictionary.
+
+    Files are parsed once and cached; every call returns a fresh copy the
+    caller may mutate. frozen=True returns the shared read-only view instead
+    (MappingProxyType/tuple) without copying.
     """
     
     if not fname.endswith('.json'): fname += '.json'
-    
-    with open(BASE_PATH.joinpath(fname)) as json_file:
-        return json.load(json_file)
\ No newline at end of file
+
+    data = _load(BASE_PATH.joinpath(fname))
+    return data if frozen else _thaw(data)
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
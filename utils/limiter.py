@@ -0,0 +1,181 @@
+"""
+Client-side rate limiting and adaptive concurrency for the shared Transport.
+
+Before every attempt the transport takes a Limiter slot:
+
+- a token from a token bucket refilled at `rate` requests/s, holding at
+  most `burst` tokens, so the API never sees more than that rate;
+- a place among the requests in flight, under an AIMD concurrency limit.
+  Every `limit` healthy responses raise the limit by one (additive
+  increase); a 429, a 5xx, a connection error or a latency above
+  `latency_tolerance` times the long-run average multiplies it by
+  `backoff` (multiplicative decrease), at most once per round trip:
+  only requests sent after the last decrease can cause the next one.
+
+Waiting for a slot happens before the request is timed, so latencies keep
+measuring the server rather than our own queue; the wait is kept on
+RequestTiming.queued. The limiter's state is observed into `metrics`
+(utils.metrics.limiter by default): "limit" and "in_flight" on every
+acquire, "wait" (ms queued), and "decrease" with the new limit on every
+back-off.
+"""
+import threading
+import time
+
+from utils.metrics import limiter as limiter_metrics
+
+
+def parse_limits(text):
+    """
+    "rate=20,burst=5,max_concurrency=16" -> {'rate': 20.0, 'burst': 5.0, 'max_concurrency': 16.0};
+    "off" (or empty) -> None
+    """
+    if not text or text.strip() == 'off':
+        return None
+    limits = {}
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        name, _, value = part.partition('=')
+        limits[name.strip()] = float(value)
+    return limits
+
+
+class TokenBucket:
+    """
+    Blocking token bucket: `rate` tokens per second, at most `burst` stored
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Takes one token, sleeping until it is available; returns the seconds waited
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # tokens may go negative: later callers queue up behind this one's debt
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on the requests in flight; see the module docstring
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, backoff=0.5, latency_tolerance=3.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self.latency = None  # long-run EWMA of healthy latencies, ms
+        self._decreased_at = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Waits for a place in flight; returns the send time to hand back to release()
+        """
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, sent_at, overloaded, latency_ms=None):
+        """
+        Frees the place and adapts the limit; returns the new limit if this response lowered it
+        """
+        with self._condition:
+            self.in_flight -= 1
+            slow = (not overloaded and latency_ms is not None and self.latency is not None
+                    and latency_ms > self.latency * self.latency_tolerance)
+            decreased = None
+            if overloaded or slow:
+                if sent_at >= self._decreased_at and self.limit > self.minimum:
+                    self.limit = max(self.minimum, self.limit * self.backoff)
+                    self._decreased_at = time.monotonic()
+                    decreased = self.limit
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            if not overloaded and latency_ms is not None:
+                self.latency = latency_ms if self.latency is None else 0.95 * self.latency + 0.05 * latency_ms
+            self._condition.notify_all()
+            return decreased
+
+
+class Limiter:
+    """
+    Token bucket (if `rate`) plus adaptive concurrency (if `max_concurrency`);
+    built from one entry of config.LIMITS with Limiter.from_limits
+    """
+
+    def __init__(self, rate=None, burst=1, concurrency=None, metrics=None):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.concurrency = concurrency
+        self.metrics = metrics or limiter_metrics
+
+    @classmethod
+    def from_limits(cls, limits, metrics=None):
+        """
+        None for no limits; otherwise keys rate, burst, initial_concurrency,
+        min_concurrency, max_concurrency, backoff, latency_tolerance
+        """
+        if not limits:
+            return None
+        concurrency = None
+        if limits.get('max_concurrency'):
+            concurrency = AdaptiveConcurrency(initial=limits.get('initial_concurrency', 4),
+                                              minimum=limits.get('min_concurrency', 1),
+                                              maximum=limits['max_concurrency'],
+                                              backoff=limits.get('backoff', 0.5),
+                                              latency_tolerance=limits.get('latency_tolerance', 3.0))
+        return cls(limits.get('rate'), limits.get('burst', 1), concurrency, metrics)
+
+    def acquire(self):
+        """
+        Blocks until the request may be sent; returns (ticket, ms waited)
+        """
+        start = time.perf_counter()
+        ticket = self.concurrency.acquire() if self.concurrency else None
+        if self.bucket:
+            self.bucket.acquire()
+        waited_ms = (time.perf_counter() - start) * 1000
+        self.metrics.observe('wait', waited_ms)
+        if self.concurrency:
+            self.metrics.observe('limit', self.concurrency.limit)
+            self.metrics.observe('in_flight', self.concurrency.in_flight)
+        return ticket, waited_ms
+
+    def release(self, ticket, status_code=None, latency_ms=None):
+        """
+        Reports the outcome of an acquired attempt; status_code None means it raised
+        """
+        if not self.concurrency:
+            return
+        overloaded = status_code is None or status_code == 429 or status_code >= 500
+        decreased = self.concurrency.release(ticket, overloaded, latency_ms)
+        if decreased is not None:
+            self.metrics.observe('decrease', decreased)
+
+    def state(self):
+        """
+        Current limiter state, e.g. for logging
+        """
+        state = {}
+        if self.bucket:
+            state.update(rate=self.bucket.rate, tokens=round(self.bucket.tokens, 2))
+        if self.concurrency:
+            state.update(limit=round(self.concurrency.limit, 2), in_flight=self.concurrency.in_flight)
+        return state
@@ -0,0 +1,178 @@
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+
+from utils.metrics import load_latency
+from utils.request import default_transport
+from utils.timing import PHASES
+
+PERCENTILES = (50, 90, 95, 99)
+# causes of failed requests kept per endpoint; the rest are only counted
+MAX_FAILURES = 5
+
+log = logging.getLogger(__name__)
+
+@dataclass
+class LoadProfile:
+    """
+    Shape of a load run; all durations are in seconds
+    """
+    users: int = 4
+    duration: float = 5.0
+    warmup: float = 1.0
+    ramp_up: float = 1.0
+    think_time: float = 0.0
+
+def percentile(sorted_samples, pct):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+@dataclass
+class EndpointStats:
+    name: str
+    samples: list = field(default_factory=list)
+    errors: int = 0
+    window: float = 0.0
+    # utils.timing phase -> samples (ms), e.g. {'ttfb': [...], 'connect': [...]}
+    phases: dict = field(default_factory=dict)
+    # the first MAX_FAILURES causes, e.g. "503" or "ConnectionError: ..."
+    failures: list = field(default_factory=list)
+
+    @property
+    def count(self):
+        return len(self.samples)
+
+    @property
+    def throughput(self):
+        return self.count / self.window if self.window else 0.0
+
+    @property
+    def error_rate(self):
+        return self.errors / self.count if self.count else 0.0
+
+    def percentiles(self):
+        ordered = sorted(self.samples)
+        stats = {f'p{pct}': percentile(ordered, pct) for pct in PERCENTILES}
+        stats['max'] = ordered[-1] if ordered else 0.0
+        return stats
+
+    @property
+    def p50(self):
+        return self.percentiles()['p50']
+
+    @property
+    def p95(self):
+        return self.percentiles()['p95']
+
+    @property
+    def p99(self):
+        return self.percentiles()['p99']
+
+    def phase_p95(self):
+        """
+        p95 of every request phase that was observed, in utils.timing.PHASES order
+        """
+        return {phase: percentile(sorted(self.phases[phase]), 95) for phase in PHASES if self.phases.get(phase)}
+
+    def as_dict(self):
+        return dict(
+            name=self.name,
+            count=self.count,
+            errors=self.errors,
+            throughput=round(self.throughput, 2),
+            **{k: round(v, 1) for k, v in self.percentiles().items()},
+            phase_p95={k: round(v, 1) for k, v in self.phase_p95().items()},
+            failures=self.failures
+        )
+
+    def summary(self):
+        p = self.percentiles()
+        text = (f'{self.name}: n={self.count} err={self.errors} rps={self.throughput:.1f} '
+                f'p50={p["p50"]:.1f} p90={p["p90"]:.1f} p95={p["p95"]:.1f} '
+                f'p99={p["p99"]:.1f} max={p["max"]:.1f} ms')
+        phases = self.phase_p95()
+        if phases:
+            text += ' | p95 ' + ' '.join(f'{phase}={ms:.1f}' for phase, ms in phases.items()) + ' ms'
+        if self.failures:
+            text += f' | first failures: {"; ".join(self.failures)}'
+        return text
+
+class LoadRunner:
+    """
+    Closed-loop load generator: `users` virtual users, started linearly over
+    `ramp_up`, each repeatedly sending requests built by the scenario factories.
+    Samples taken during `warmup` are discarded; the next `duration` seconds
+    are measured and also recorded in `metrics` (utils.metrics.load_latency
+    by default), which is what the regression gate baselines.
+    """
+
+    def __init__(self, profile=None, transport=None, metrics=None):
+        self.profile = profile or LoadProfile()
+        self.transport = transport or default_transport()
+        self.metrics = metrics or load_latency
+        self._lock = threading.Lock()
+
+    def run(self, scenarios):
+        """
+        `scenarios` maps an endpoint name to a zero-arg callable returning an
+        ApiRequest; each virtual user cycles through them in order.
+        Returns {name: EndpointStats}.
+        """
+        profile = self.profile
+        stats = {name: EndpointStats(name, window=profile.duration) for name in scenarios}
+        factories = list(scenarios.items())
+
+        start = time.monotonic()
+        measure_from = start + profile.warmup
+        stop_at = measure_from + profile.duration
+
+        def _user(index):
+            delay = profile.ramp_up * index / profile.users if profile.users else 0
+            time.sleep(delay)
+            i = index
+            while True:
+                name, factory = factories[i % len(factories)]
+                i += 1
+                sent = time.monotonic()
+                if sent >= stop_at:
+                    return
+                timing = failure = error = None
+                try:
+                    response = factory().send(self.transport)
+                    timing = response.timing
+                    if response.status_code >= 400:
+                        failure = f'{response.status_code} {response.text[:200]}'
+                except Exception as e:  # pylint: disable=broad-except
+                    failure, error = f'{type(e).__name__}: {e}', e
+                done = time.monotonic()
+                # time queued in the client-side limiter is ours, not the server's
+                queued = timing.queued if timing else 0.0
+                if sent >= measure_from:
+                    with self._lock:
+                        stats[name].samples.append((done - sent) * 1000 - queued)
+                        if failure is not None:
+                            stats[name].errors += 1
+                            if len(stats[name].failures) < MAX_FAILURES:
+                                stats[name].failures.append(failure)
+                                log.warning('%s failed: %s', name, failure, exc_info=error)
+                        for phase, elapsed_ms in (timing.phases() if timing else {}).items():
+                            stats[name].phases.setdefault(phase, []).append(elapsed_ms)
+                if profile.think_time:
+                    time.sleep(profile.think_time)
+
+        users = [threading.Thread(target=_user, args=(i,), daemon=True) for i in range(profile.users)]
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        for name, endpoint in stats.items():
+            for sample in endpoint.samples:
+                self.metrics.observe(name, sample)
+        return stats
@@ -0,0 +1,123 @@
+import logging
+import logging.handlers
+import queue
+import random
+from collections.abc import Mapping
+
+# log arguments that cannot change after the call, so they are safe to format later
+_IMMUTABLE = (str, bytes, int, float, bool, type(None))
+
+class BodyPolicy:
+    """
+    How request/response bodies appear in the logs:
+    mode 'off' omits them, 'truncated' keeps the first `limit` characters,
+    'full' keeps everything; only a `sample_rate` fraction is rendered at all.
+    """
+
+    MODES = ('off', 'truncated', 'full')
+
+    def __init__(self, mode='truncated', limit=2048, sample_rate=1.0):
+        self.mode = mode
+        self.limit = limit
+        self.sample_rate = sample_rate
+
+    def render(self, value, sampled):
+        if self.mode == 'off':
+            return '<body omitted>'
+        if not sampled:
+            return '<body not sampled>'
+        if isinstance(value, (bytes, bytearray)):
+            text = value.decode('utf-8', errors='replace')
+        else:
+            text = value if isinstance(value, str) else str(value)
+        if self.mode == 'truncated' and len(text) > self.limit:
+            return f'{text[:self.limit]}... [+{len(text) - self.limit} chars]'
+        return text
+
+policy = BodyPolicy()
+
+def configure(mode=None, limit=None, sample_rate=None):
+    if mode is not None:
+        if mode not in BodyPolicy.MODES:
+            raise ValueError(f'Unknown body log mode {mode!r}')
+        policy.mode = mode
+    if limit is not None:
+        policy.limit = limit
+    if sample_rate is not None:
+        policy.sample_rate = sample_rate
+
+class LazyBody:
+    """
+    Log argument for a request/response body: nothing is stringified unless a
+    handler actually emits the record, and then only once, under `policy`.
+
+        log.info('Response %s: %s', r.status_code, LazyBody(r.content))
+    """
+    __slots__ = ('value', 'sampled', '_text')
+
+    def __init__(self, value):
+        self.value = value
+        self.sampled = policy.sample_rate >= 1 or random.random() < policy.sample_rate
+        self._text = None
+
+    def __str__(self):
+        if self._text is None:
+            self._text = policy.render(self.value, self.sampled)
+        return self._text
+
+    __repr__ = __str__
+
+    def freeze(self):
+        """
+        Renders a mutable body (a payload dict, a bytearray) now, so later changes do not reach
+        the log; bytes and str stay deferred
+        """
+        if not isinstance(self.value, (str, bytes)):
+            str(self)
+
+class _Frozen:
+    """
+    A log argument's str() and repr() as they were when the call was made
+    """
+    __slots__ = ('text', 'representation')
+
+    def __init__(self, value):
+        self.text = str(value)
+        self.representation = repr(value)
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return self.representation
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    In-process QueueHandler that enqueues records with their %-style message
+    unformatted, so LazyBody bodies are rendered on the listener thread
+    instead of the caller's. Every other mutable argument (a payload dict,
+    headers) is frozen to its text first, since the caller may change it
+    before the listener gets to it.
+    """
+
+    def prepare(self, record):
+        if isinstance(record.args, Mapping):
+            record.msg, record.args = record.getMessage(), None
+        elif record.args:
+            for arg in record.args:
+                if isinstance(arg, LazyBody):
+                    arg.freeze()
+            record.args = tuple(arg if isinstance(arg, (LazyBody,) + _IMMUTABLE) else _Frozen(arg)
+                                for arg in record.args)
+        return record
+
+def start_queue_logging(logger, *handlers):
+    """
+    Routes `logger` through a queue to `handlers`, which run on a background
+    QueueListener thread. Returns the started listener; stop() flushes it.
+    """
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,162 @@
+import math
+import re
+import threading
+from urllib.parse import urlsplit
+
+_ID_SEGMENT = re.compile(r'^(\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$', re.I)
+
+def route_template(url):
+    """
+    Path of `url` with id-like segments collapsed, e.g. /api/equipment/{id}/status
+    """
+    segments = urlsplit(url).path.split('/')
+    return '/'.join('{id}' if _ID_SEGMENT.match(s) else s for s in segments) or '/'
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram in the spirit of HdrHistogram/DDSketch.
+
+    A value v (ms) is counted in bucket ceil(log_gamma(v)); every bucket spans
+    a fixed relative width, so any percentile is accurate to RELATIVE_ERROR
+    while the histogram is a small sparse {bucket: count} map. Histograms
+    merge exactly by adding bucket counts, which is what lets xdist workers
+    be combined on the controller.
+    """
+    RELATIVE_ERROR = 0.01
+    MIN_VALUE = 0.001
+    PERCENTILES = (50, 90, 95, 99, 99.9)
+
+    _gamma = (1 + RELATIVE_ERROR) / (1 - RELATIVE_ERROR)
+    _log_gamma = math.log(_gamma)
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value):
+        return math.ceil(math.log(max(value, self.MIN_VALUE)) / self._log_gamma)
+
+    def _value(self, index):
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def record(self, value):
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def value_at_rank(self, rank):
+        """
+        Value of the `rank`-th smallest sample (1-based), within RELATIVE_ERROR
+        """
+        if not self.count:
+            return 0.0
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    def value_at_percentile(self, pct):
+        return self.value_at_rank(max(1, math.ceil(pct / 100 * self.count)))
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'min': round(self.min, 3) if self.count else 0.0,
+            'max': round(self.max, 3),
+            'mean': round(self.mean, 3),
+            'percentiles': {
+                f'p{pct:g}': round(self.value_at_percentile(pct), 3) for pct in self.PERCENTILES
+            },
+            'relative_error': self.RELATIVE_ERROR,
+            'sum': round(self.total, 3),
+            'buckets': {str(index): n for index, n in sorted(self.buckets.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls()
+        hist.buckets = {int(index): n for index, n in data['buckets'].items()}
+        hist.count = data['count']
+        hist.total = data['sum']
+        hist.min = data['min'] if data['count'] else math.inf
+        hist.max = data['max']
+        return hist
+
+class MetricsRegistry:
+    """
+    Thread-safe set of histograms; request latencies are keyed by "METHOD /route/{id}".
+    Every observation is also passed to each callable in `listeners` as (key, value).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.listeners = []
+
+    def record(self, method, url, elapsed_ms):
+        self.observe(f'{method.upper()} {route_template(url)}', elapsed_ms)
+
+    def observe(self, key, value):
+        with self._lock:
+            self.histograms.setdefault(key, LatencyHistogram()).record(value)
+        for listener in self.listeners:
+            listener(key, value)
+
+    def merge(self, serialized):
+        with self._lock:
+            for key, data in serialized.items():
+                self.histograms.setdefault(key, LatencyHistogram()).merge(LatencyHistogram.from_dict(data))
+
+    def to_dict(self):
+        with self._lock:
+            return {key: hist.to_dict() for key, hist in sorted(self.histograms.items())}
+
+    def clear(self):
+        with self._lock:
+            self.histograms = {}
+
+registry = MetricsRegistry()
+consistency = MetricsRegistry()
+# measured LoadRunner samples, keyed by scenario name; the baseline for the regression gate
+load_latency = MetricsRegistry()
+# open-loop soak latencies (utils.soak), corrected for coordinated omission, keyed by scenario
+soak_latency = MetricsRegistry()
+# per-phase request timings (utils.timing), keyed by "METHOD /route/{id} phase"
+request_phases = MetricsRegistry()
+# backoff (ms) of every request-level retry (utils.retry), keyed by "METHOD /route/{id} reason";
+# the count is the number of retries, "... denied" counts retries the budget refused
+retries = MetricsRegistry()
+# client-side limiter state (utils.limiter): "limit", "in_flight", "wait" (ms queued) and "decrease"
+limiter = MetricsRegistry()
+
+# report attribute name -> registry, serialized into the JSON report at session end
+REPORTED = {
+    'latency': registry,
+    'time_to_consistency': consistency,
+    'load_latency': load_latency,
+    'request_phases': request_phases,
+    'soak_latency': soak_latency,
+    'retries': retries,
+    'limiter': limiter,
+}
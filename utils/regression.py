@@ -0,0 +1,190 @@
+"""
+Statistical latency-regression gate.
+
+Each run's LoadRunner histograms are archived with its JSON report; the
+baseline for a scenario is the merge of the same scenario's histograms over
+the most recent runs against the same --env. A new run is compared with it
+using a Mann-Whitney U test computed directly on the histogram buckets
+(samples in one bucket are ties), with the rank-biserial correlation as the
+effect size, plus distribution-free confidence intervals on both p95s.
+
+With thousands of samples even run-to-run noise is "significant", so a
+regression also needs a practical size: a medium rank effect, a p95 shift of
+at least max(MIN_DELTA_MS, MIN_RATIO * baseline p95), and non-overlapping
+p95 intervals. Improvements are judged the same way in the other direction.
+"""
+import json
+import math
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from utils.metrics import LatencyHistogram
+from utils.report import report_attributes
+
+BASELINE_RUNS = 10
+ALPHA = 0.01
+MIN_EFFECT = 0.2
+MIN_DELTA_MS = 10.0
+MIN_RATIO = 0.1
+MIN_SAMPLES = 100
+_Z95 = 1.959964
+
+
+def mann_whitney(baseline, current):
+    """
+    One-sided Mann-Whitney U test of "current is slower than baseline" on two
+    LatencyHistograms. Returns (p_greater, p_less, effect), where effect is the
+    rank-biserial correlation in [-1, 1]; positive means current is slower.
+    """
+    n1, n2 = baseline.count, current.count
+    u = 0.0
+    below = 0
+    ties = 0
+    for index in sorted(baseline.buckets.keys() | current.buckets.keys()):
+        in_base = baseline.buckets.get(index, 0)
+        in_current = current.buckets.get(index, 0)
+        u += in_current * (below + in_base / 2)
+        below += in_base
+        tied = in_base + in_current
+        ties += tied ** 3 - tied
+
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    z = (u - n1 * n2 / 2) / math.sqrt(variance) if variance > 0 else 0.0
+    p_greater = 0.5 * math.erfc(z / math.sqrt(2))
+    return p_greater, 1 - p_greater, 2 * u / (n1 * n2) - 1
+
+
+def quantile_ci(hist, pct, z=_Z95):
+    """
+    Distribution-free confidence interval for the `pct` percentile, from the
+    binomial ranks around n * pct / 100
+    """
+    n, q = hist.count, pct / 100
+    spread = z * math.sqrt(n * q * (1 - q))
+    low = max(1, math.floor(n * q - spread))
+    high = min(n, math.ceil(n * q + spread) + 1)
+    return hist.value_at_rank(low), hist.value_at_rank(high)
+
+
+@dataclass
+class Comparison:
+    name: str
+    verdict: str
+    current_count: int
+    current_p95: float
+    current_p95_ci: tuple = (0.0, 0.0)
+    baseline_count: int = 0
+    baseline_p95: float = 0.0
+    baseline_p95_ci: tuple = (0.0, 0.0)
+    p_value: float = 1.0
+    effect_size: float = 0.0
+    budget_ms: float = None
+    failed: bool = False
+
+    def summary(self):
+        if self.verdict == 'no baseline':
+            return (f'{self.name}: no baseline yet, p95={self.current_p95:.1f} ms '
+                    f'against the {self.budget_ms:g} ms budget (n={self.current_count})')
+        return (f'{self.name}: {self.verdict} - p95 {self.baseline_p95:.1f} -> {self.current_p95:.1f} ms '
+                f'(95% CI {self.baseline_p95_ci[0]:.1f}-{self.baseline_p95_ci[1]:.1f} -> '
+                f'{self.current_p95_ci[0]:.1f}-{self.current_p95_ci[1]:.1f}), '
+                f'Mann-Whitney p={self.p_value:.2g}, effect r={self.effect_size:+.2f} '
+                f'(n={self.baseline_count}/{self.current_count})')
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+
+def compare(name, baseline, current, alpha=ALPHA, min_effect=MIN_EFFECT,
+            min_delta_ms=MIN_DELTA_MS, min_ratio=MIN_RATIO):
+    """
+    Compares two LatencyHistograms; the verdict is 'regression' or
+    'improvement' only when the difference is significant at `alpha`
+    (two-sided), its effect size is at least `min_effect` and the p95 moved
+    by a practical amount with non-overlapping confidence intervals
+    """
+    p_greater, p_less, effect = mann_whitney(baseline, current)
+    p_value = min(1.0, 2 * min(p_greater, p_less))
+    baseline_p95, current_p95 = baseline.value_at_percentile(95), current.value_at_percentile(95)
+    baseline_ci, current_ci = quantile_ci(baseline, 95), quantile_ci(current, 95)
+    threshold = max(min_delta_ms, min_ratio * baseline_p95)
+
+    verdict = 'no change'
+    if p_value < alpha:
+        if (effect >= min_effect and current_p95 - baseline_p95 >= threshold
+                and current_ci[0] > baseline_ci[1]):
+            verdict = 'regression'
+        elif (effect <= -min_effect and baseline_p95 - current_p95 >= threshold
+              and current_ci[1] < baseline_ci[0]):
+            verdict = 'improvement'
+    return Comparison(
+        name=name,
+        verdict=verdict,
+        current_count=current.count,
+        current_p95=current_p95,
+        current_p95_ci=current_ci,
+        baseline_count=baseline.count,
+        baseline_p95=baseline_p95,
+        baseline_p95_ci=baseline_ci,
+        p_value=p_value,
+        effect_size=effect,
+        failed=verdict == 'regression',
+    )
+
+
+def load_baseline(archive_dir, env, runs=BASELINE_RUNS, attribute='load_latency'):
+    """
+    {scenario: merged LatencyHistogram} over the `runs` most recent archived
+    reports in `archive_dir` that were run against `env`
+    """
+    paths = sorted(Path(archive_dir).glob('*.json'), key=os.path.getmtime, reverse=True)
+    baseline = {}
+    used = 0
+    for path in paths:
+        try:
+            with open(path, encoding='utf-8') as f:
+                attributes = report_attributes(json.load(f))
+        except (OSError, ValueError, KeyError, IndexError):
+            continue
+        histograms = attributes.get(attribute)
+        if attributes.get('env') != env or not histograms:
+            continue
+        for name, data in histograms.items():
+            baseline.setdefault(name, LatencyHistogram()).merge(LatencyHistogram.from_dict(data))
+        used += 1
+        if used == runs:
+            break
+    return baseline
+
+
+@dataclass
+class RegressionGate:
+    """
+    Judges LoadRunner results against the archived baseline; scenarios with
+    fewer than `min_samples` baseline samples fall back to a fixed p95 budget.
+    """
+    baseline: dict
+    alpha: float = ALPHA
+    min_effect: float = MIN_EFFECT
+    min_delta_ms: float = MIN_DELTA_MS
+    min_ratio: float = MIN_RATIO
+    min_samples: int = MIN_SAMPLES
+    results: list = field(default_factory=list)
+
+    def check(self, stats, budget_ms):
+        current = LatencyHistogram()
+        for sample in stats.samples:
+            current.record(sample)
+        baseline = self.baseline.get(stats.name)
+        if baseline is None or baseline.count < self.min_samples or not current.count:
+            p95 = current.value_at_percentile(95)
+            result = Comparison(stats.name, 'no baseline', current.count, p95,
+                                budget_ms=budget_ms, failed=p95 > budget_ms)
+        else:
+            result = compare(stats.name, baseline, current, self.alpha, self.min_effect,
+                             self.min_delta_ms, self.min_ratio)
+            result.budget_ms = budget_ms
+        self.results.append(result)
+        return result
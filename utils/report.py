@@ -0,0 +1,54 @@
+import json
+import os
+import shutil
+import time
+
+
+def report_attributes(report):
+    """
+    Session-level attributes of a parsed pytest-json report, in either layout
+    """
+    if 'data' in report:
+        return report['data'][0].setdefault('attributes', {})
+    return report.setdefault('report', {})
+
+
+def report_tests(report):
+    """
+    Per-test attribute dicts of a parsed pytest-json report, in either layout;
+    None if `report` is not one
+    """
+    if isinstance(report.get('data'), list) and report['data'] and report['data'][0].get('type') == 'report':
+        return [entry['attributes'] for entry in report.get('included', []) if entry.get('type') == 'test']
+    if isinstance(report.get('report'), dict) and 'tests' in report['report']:
+        return report['report']['tests']
+    return None
+
+
+def add_report_attributes(json_path, **attributes):
+    """
+    Merges extra attributes into a pytest-json report that has already been written.
+    Handles both the jsonapi layout (data[0].attributes) and the plain one (report).
+    """
+    if not json_path or not os.path.exists(json_path):
+        return
+
+    with open(json_path, encoding='utf-8') as json_file:
+        report = json.load(json_file)
+
+    report_attributes(report).update(attributes)
+
+    with open(json_path, 'w', encoding='utf-8') as json_file:
+        json.dump(report, json_file)
+
+
+def archive_report(json_path, archive_dir):
+    """
+    Copies a finished pytest-json report to `archive_dir` as report_<timestamp>.json
+    """
+    if not json_path or not os.path.exists(json_path):
+        return None
+    os.makedirs(archive_dir, exist_ok=True)
+    target = os.path.join(archive_dir, f'report_{time.time()}.json')
+    shutil.copyfile(json_path, target)
+    return target
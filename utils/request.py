@@ -1,13 +1,211 @@
-from dataclasses import dataclass
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import json
+from datetime import timedelta
 
 import requests
+try:
+    import orjson
+except ImportError:  # optional fast JSON backend
+    orjson = None
+
+from utils.metrics import registry, request_phases, retries, route_template
+from utils.retry import RetryPolicy
+from utils.timing import RequestTiming, TimedHTTPAdapter, finish, measure
+
+log = logging.getLogger(__name__)
+
+_MISSING = object()
+
+def loads(body):
+    """
+    Parses a JSON body (bytes or str) with orjson when it is installed, else the json module
+    """
+    return orjson.loads(body) if orjson is not None else json.loads(body)
 
-@dataclass
 class ApiResponse:
-    status_code: int
-    text: str
-    as_dict: object
-    headers: dict
+    """
+    Response of ApiRequest.send(). The body is kept once, as the raw bytes in
+    `content`; `text` is decoded and `as_dict` parsed (None for an empty or
+    non-JSON body) on first access only, and cached.
+    """
+    __slots__ = ('status_code', 'content', 'headers', 'elapsed', 'timing', 'attempts', 'encoding', '_text', '_json')
+
+    def __init__(self, status_code, content=b'', headers=None, elapsed=timedelta(0), timing=None, attempts=1,
+                 encoding=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers if headers is not None else {}
+        self.elapsed = elapsed
+        self.timing = timing
+        self.attempts = attempts
+        self.encoding = encoding
+        self._text = None
+        self._json = _MISSING
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        Wraps a requests.Response without copying or decoding its body
+        """
+        return cls(
+            status_code=response.status_code,
+            content=response.content or b'',
+            headers=response.headers,
+            elapsed=response.elapsed,
+            timing=getattr(response, 'timing', None),
+            attempts=getattr(response, 'attempts', 1),
+            encoding=response.encoding
+        )
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = str(self.content, self.encoding or 'utf-8', errors='replace')
+        return self._text
+
+    @property
+    def as_dict(self):
+        if self._json is _MISSING:
+            try:
+                self._json = loads(self.content) if self.content else None
+            except ValueError:
+                self._json = None
+        return self._json
+
+    def __repr__(self):
+        return f'<ApiResponse [{self.status_code}] {len(self.content)} bytes>'
+
+class Transport:
+    """
+    Keep-alive transport shared by every ApiRequest in a session.
+
+    A single HTTPAdapter (and therefore a single urllib3 connection pool) is
+    mounted on one requests.Session per thread, so connections are reused
+    across threads while cookie/session state is never shared between them.
+    Every completed request is recorded in `metrics` (the session-wide
+    latency registry by default), and its DNS/connect/TLS/TTFB/body phases
+    (utils.timing) in `phase_metrics` as "METHOD /route/{id} phase".
+
+    Failed attempts are repeated under `retry` (utils.retry.RetryPolicy);
+    every retry is logged and its backoff recorded in `retry_metrics` as
+    "METHOD /route/{id} reason", a retry refused by the budget as
+    "METHOD /route/{id} reason denied".
+
+    With a `limiter` (utils.limiter.Limiter) every attempt first waits for
+    the client-side rate limit and adaptive concurrency limit; the wait is
+    on the response's timing.queued and not in any latency.
+    """
+
+    def __init__(self, pool_connections=4, pool_maxsize=32, pool_block=False, metrics=None, phase_metrics=None,
+                 retry=None, retry_metrics=None, limiter=None):
+        self.metrics = metrics or registry
+        self.phase_metrics = phase_metrics or request_phases
+        self.retry = retry or RetryPolicy()
+        self.retry_metrics = retry_metrics or retries
+        self.limiter = limiter
+        self.adapter = TimedHTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block
+        )
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self.adapter)
+            session.mount('https://', self.adapter)
+            with self._lock:
+                self._sessions.append(session)
+            self._local.session = session
+        return session
+
+    def request(self, method, url, **kwargs):
+        """
+        Sends the request, retrying it under the retry policy; the response's
+        `attempts` counts the tries it took
+        """
+        policy = self.retry
+        route = f'{method.upper()} {route_template(url)}'
+        policy.budget.deposit()
+        attempt = 0
+        queued_ms = 0.0
+        while True:
+            response = error = None
+            ticket, waited_ms = self.limiter.acquire() if self.limiter else (None, 0.0)
+            queued_ms += waited_ms
+            try:
+                response = self._attempt(method, url, **kwargs)
+            except requests.RequestException as e:
+                error = e
+            finally:
+                if self.limiter:
+                    self.limiter.release(ticket, *((response.status_code, response.timing.total)
+                                                   if response is not None else ()))
+            reason = policy.reason(method, kwargs.get('headers'), response, error)
+            wait = policy.delay(attempt, response) if reason and attempt < policy.retries else None
+            if wait is not None and not policy.budget.withdraw():
+                self.retry_metrics.observe(f'{route} {reason} denied', 0.0)
+                log.warning('%s %s: %s, retry budget exhausted after %s attempt(s)', method, url, reason, attempt + 1)
+                wait = None
+            if wait is None:
+                if error is not None:
+                    raise error
+                response.attempts = attempt + 1
+                response.timing.queued = queued_ms
+                return response
+            attempt += 1
+            self.retry_metrics.observe(f'{route} {reason}', wait * 1000)
+            log.warning('%s %s: %s, retry %s/%s in %.0f ms', method, url, reason, attempt, policy.retries, wait * 1000)
+            if response is not None:
+                response.close()
+            time.sleep(wait)
+
+    def _attempt(self, method, url, **kwargs):
+        with measure() as timing:
+            response = self.session.request(method, url, **kwargs)
+            finish(timing, streamed=kwargs.get('stream', False))
+        response.timing = timing
+        self.metrics.record(method, url, timing.total)
+        route = f'{method.upper()} {route_template(url)}'
+        for phase, elapsed_ms in timing.phases().items():
+            self.phase_metrics.observe(f'{route} {phase}', elapsed_ms)
+        return response
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self.adapter.close()
+        self._local = threading.local()
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+def default_transport():
+    """
+    Returns the process-wide transport used when none is passed to send()
+    """
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = Transport()
+        return _default_transport
+
+def set_default_transport(transport):
+    global _default_transport
+    with _default_lock:
+        _default_transport = transport
 
 class ApiRequest:
     def __init__(self, url, method, headers=None, params=None, data=None, json=None):
@@ -18,8 +216,9 @@ class ApiRequest:
         self.data = data
         self.json = json
 
-    def send(self):
-        response = requests.request(
+    def send(self, transport=None):
+        transport = transport or default_transport()
+        response = transport.request(
             self.method,
             self.url,
             headers=self.headers,
@@ -27,9 +226,54 @@ class ApiRequest:
             data=self.data,
             json=self.json
         )
-        return ApiResponse(
-            status_code=response.status_code,
-            text=response.text,
-            as_dict=response.json(),
-            headers=response.headers
-        )
\ No newline at end of file
+        return ApiResponse.from_response(response)
+
+    @contextmanager
+    def stream(self, transport=None):
+        """
+        Sends the request without reading the body; yields the live
+        requests.Response for incremental consumption (iter_content) and
+        releases the connection back to the pool on exit
+        """
+        transport = transport or default_transport()
+        response = transport.request(
+            self.method,
+            self.url,
+            headers=self.headers,
+            params=self.params,
+            data=self.data,
+            json=self.json,
+            stream=True
+        )
+        try:
+            yield response
+        finally:
+            response.close()
+
+    async def send_async(self, transport=None, executor=None):
+        """
+        Awaitable send(); the blocking call runs on `executor` (default loop executor if None)
+        so the shared keep-alive pool is used from asyncio code as well
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.send, transport)
+
+async def send_batch(api_requests, concurrency=10, transport=None):
+    """
+    Sends ApiRequests concurrently, at most `concurrency` in flight, and returns
+    the ApiResponses in the same order as `api_requests`
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def _send(api_request):
+            async with semaphore:
+                return await api_request.send_async(transport, executor)
+
+        return await asyncio.gather(*(_send(req) for req in api_requests))
+
+def send_all(api_requests, concurrency=10, transport=None):
+    """
+    Blocking entry point for send_batch(), for use from synchronous tests
+    """
+    return asyncio.run(send_batch(api_requests, concurrency=concurrency, transport=transport))
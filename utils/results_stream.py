@@ -0,0 +1,308 @@
+"""
+Crash-safe, append-only JSONL record of a test session.
+
+One compact JSON line per event - session start/finish, each finished test
+with its setup/call/teardown phases, and each latency observation made
+through a utils.metrics registry - is buffered and flushed (and fsynced)
+every `flush_interval` seconds by a background thread, so a killed run
+loses at most that much. xdist workers each write their own file next to
+the controller's (results.gw0.jsonl, ...).
+
+    python -m utils.results_stream build report/stream/results.jsonl --json report/json/report.json --html report
+
+rebuilds the pytest-json report (with the latency attributes) and, through
+pytest-html-reporter's own merge command, the HTML report from a stream.
+"""
+import argparse
+import datetime
+import functools
+import glob
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from utils.metrics import MetricsRegistry, REPORTED
+
+STREAM_PATH = 'report/stream/results.jsonl'
+FLUSH_INTERVAL = 1.0
+PHASES = ('setup', 'call', 'teardown')
+# pytest-html-reporter's build status for each pytest-json outcome
+_HTML_STATUS = {'passed': 'PASS', 'failed': 'FAIL', 'error': 'ERROR', 'skipped': 'SKIP',
+                'xfailed': 'XFAIL', 'xpassed': 'XPASS', 'rerun': 'RERUN'}
+
+
+def worker_path(path, worker=None):
+    """
+    `path` for the controller, stem.<worker>.suffix for an xdist worker
+    """
+    worker = worker or os.environ.get('PYTEST_XDIST_WORKER')
+    if not worker:
+        return path
+    stem, suffix = os.path.splitext(path)
+    return f'{stem}.{worker}{suffix}'
+
+
+def stream_paths(path):
+    """
+    `path` and every per-worker file written next to it
+    """
+    stem, suffix = os.path.splitext(path)
+    siblings = sorted(glob.glob(f'{glob.escape(stem)}.*{suffix}'))
+    return [p for p in [path, *siblings] if os.path.exists(p)]
+
+
+def phase_outcome(report):
+    """
+    pytest-json's name for the outcome of one phase report
+    """
+    if report.failed:
+        if report.when != 'call':
+            return 'error'
+        return 'xpassed' if hasattr(report, 'wasxfail') else 'failed'
+    if report.skipped:
+        return 'xfailed' if hasattr(report, 'wasxfail') else 'skipped'
+    return report.outcome
+
+
+def overall_outcome(phases):
+    """
+    A test's outcome from its phases, the way pytest-json decides it
+    """
+    setup = phases.get('setup', {}).get('outcome', 'passed')
+    if setup != 'passed':
+        return setup
+    call = phases.get('call', {}).get('outcome', 'passed')
+    if call == 'passed':
+        return phases.get('teardown', {}).get('outcome', 'passed')
+    return call
+
+
+class ResultStream:
+    """
+    Thread-safe JSONL writer; `write` only appends to an in-memory buffer
+    """
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.flush_interval = flush_interval
+        self._file = open(path, 'w', encoding='utf-8')  # pylint: disable=consider-using-with
+        self._buffer = []
+        self._phases = {}
+        self._lock = threading.Lock()
+        # held across file I/O, so a slow fsync never blocks `write`
+        self._io_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name='result-stream', daemon=True)
+        self._flusher.start()
+
+    def write(self, event_type, **fields):
+        line = json.dumps({'type': event_type, 'ts': round(time.time(), 6), **fields},
+                          separators=(',', ':'), default=str)
+        with self._lock:
+            self._buffer.append(line + '\n')
+
+    def metric(self, name, key, value):
+        """
+        Registry listener: one line per observation
+        """
+        self.write('metric', metric=name, key=key, ms=round(value, 3))
+
+    def phase(self, nodeid, when, outcome, duration, longrepr=None):
+        """
+        Collects one phase of a test; the test's line is written once its teardown is in
+        """
+        stage = {'duration': round(duration, 6), 'outcome': outcome}
+        if longrepr:
+            stage['longrepr'] = longrepr
+        with self._lock:
+            phases = self._phases.setdefault(nodeid, {})
+            phases[when] = stage
+            if when != 'teardown':
+                return
+            del self._phases[nodeid]
+        self.write('test', name=nodeid, outcome=overall_outcome(phases),
+                   duration=round(sum(stage['duration'] for stage in phases.values()), 6), **phases)
+
+    def flush(self):
+        with self._io_lock:
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+            if not lines or self._file.closed:
+                return
+            self._file.write(''.join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _flush_periodically(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stopped.set()
+        self._flusher.join()
+        self.flush()
+        with self._io_lock:
+            self._file.close()
+
+
+class ResultStreamPlugin:
+    """
+    pytest plugin feeding a ResultStream: session events, one line per test
+    (by the process that ran it; an xdist controller leaves tests to its
+    workers) and one line per observation in every reported registry.
+    """
+
+    def __init__(self, stream, env=None, registries=None):
+        self.stream = stream
+        self.env = env
+        self.controller = False
+        self.registries = REPORTED if registries is None else registries
+        self._listeners = {name: functools.partial(stream.metric, name) for name in self.registries}
+        for name, listener in self._listeners.items():
+            self.registries[name].listeners.append(listener)
+
+    def pytest_sessionstart(self, session):
+        self.controller = session.config.pluginmanager.has_plugin('dsession')
+        self.stream.write('session', event='start', env=self.env, pid=os.getpid(),
+                          worker=os.environ.get('PYTEST_XDIST_WORKER'))
+
+    def pytest_runtest_logreport(self, report):
+        if self.controller:
+            return
+        longrepr = str(report.longrepr) if report.failed and report.longrepr else None
+        self.stream.phase(report.nodeid, report.when, phase_outcome(report), report.duration, longrepr)
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        self.stream.write('session', event='finish', exitstatus=int(exitstatus))
+        self.stream.flush()
+
+    def pytest_unconfigure(self, config):
+        for name, listener in self._listeners.items():
+            self.registries[name].listeners.remove(listener)
+        self.stream.close()
+
+
+def read_events(path):
+    """
+    Events of a stream and its per-worker files; a line cut short by a crash is skipped
+    """
+    for stream_path in stream_paths(path):
+        with open(stream_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def build_report(events):
+    """
+    pytest-json (jsonapi layout) report of a stream, with the latency
+    attributes the session hook adds; reruns count, the last attempt wins
+    """
+    tests = {}
+    summary = {}
+    registries = {name: MetricsRegistry() for name in REPORTED}
+    env = None
+    first = last = None
+    for event in events:
+        first = event['ts'] if first is None else min(first, event['ts'])
+        last = event['ts'] if last is None else max(last, event['ts'])
+        if event['type'] == 'metric' and event['metric'] in registries:
+            registries[event['metric']].observe(event['key'], event['ms'])
+        elif event['type'] == 'test':
+            for when in PHASES:
+                stage = event.get(when)
+                if stage and (when == 'call' or stage['outcome'] != 'passed'):
+                    summary[stage['outcome']] = summary.get(stage['outcome'], 0) + 1
+            test = {key: event[key] for key in ('name', 'duration', 'outcome', *PHASES) if key in event}
+            test['run_index'] = tests[event['name']]['run_index'] if event['name'] in tests else len(tests)
+            tests[event['name']] = test
+        elif event['type'] == 'session' and event.get('env'):
+            env = event['env']
+
+    summary['num_tests'] = len(tests)
+    summary['duration'] = (last - first) if first is not None else 0.0
+    created_at = datetime.datetime.fromtimestamp(last) if last is not None else datetime.datetime.now()
+    included = [{'id': i, 'type': 'test', 'attributes': test}
+                for i, test in enumerate(sorted(tests.values(), key=lambda t: t['run_index']), start=1)]
+    attributes = {'environment': {}, 'summary': summary, 'created_at': str(created_at), 'env': env,
+                  **{name: registry.to_dict() for name, registry in registries.items()}}
+    return {
+        'data': [{
+            'type': 'report',
+            'id': 1,
+            'attributes': attributes,
+            'relationships': {'tests': {'data': [{'id': t['id'], 'type': 'test'} for t in included]}},
+        }],
+        'included': included,
+    }
+
+
+def html_bundle(report):
+    """
+    pytest-html-reporter records bundle for a report built by build_report
+    """
+    from pytest_html_reporter.shards import SHARD_SCHEMA, SHARD_VERSION  # pylint: disable=import-outside-toplevel
+
+    records = []
+    for index, entry in enumerate(report['included']):
+        test = entry['attributes']
+        path, _, name = test['name'].partition('::')
+        failed = next((test[when] for when in PHASES if test.get(when, {}).get('longrepr')), {})
+        records.append({
+            'suite_name': path,
+            'test_name': name.rpartition('::')[2] or name,
+            'nodeid': test['name'],
+            'status': _HTML_STATUS.get(test['outcome'], 'ERROR'),
+            'message': failed.get('longrepr', ''),
+            'duration': test['duration'],
+            'index': index,
+            'phases': {when: round(test[when]['duration'] * 1000, 3) for when in PHASES if when in test},
+        })
+    attributes = report['data'][0]['attributes']
+    created_at = datetime.datetime.fromisoformat(attributes['created_at']).timestamp()
+    return {
+        'schema': SHARD_SCHEMA,
+        'version': SHARD_VERSION,
+        'shard': {'id': 'stream', 'label': 'result stream'},
+        'run': {
+            'session_start': created_at - attributes['summary']['duration'],
+            'session_end': created_at,
+            'collected': len(records),
+            'environment': attributes.get('env') or '',
+        },
+        'records': records,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rebuild the JSON and HTML reports from a result stream')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='write report.json (and the HTML report) from a stream')
+    build.add_argument('stream', nargs='?', default=STREAM_PATH)
+    build.add_argument('--json', default='report/json/report.json')
+    build.add_argument('--html', default=None, help='pytest-html-reporter report folder')
+    args = parser.parse_args(argv)
+
+    report = build_report(read_events(args.stream))
+    os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(report, f)
+    print(f'{report["data"][0]["attributes"]["summary"]["num_tests"]} tests written to {args.json}')
+
+    if args.html:
+        bundle_dir = os.path.join(os.path.dirname(os.path.abspath(args.stream)), 'shards', 'stream')
+        os.makedirs(bundle_dir, exist_ok=True)
+        with open(os.path.join(bundle_dir, 'records.json'), 'w', encoding='utf-8') as f:
+            json.dump(html_bundle(report), f)
+        subprocess.run([sys.executable, '-m', 'pytest_html_reporter', 'merge', bundle_dir,
+                        '--html-report', args.html, '--report-open', 'none', '-q'], check=True)
+
+
+if __name__ == '__main__':
+    main()
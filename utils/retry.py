@@ -0,0 +1,137 @@
+"""
+Request-level retries for the shared Transport.
+
+A failed attempt is retried only when repeating it cannot apply a change
+twice:
+
+- a connection that could not be opened (nothing was sent) - any method
+- 429 Too Many Requests (the request was turned away) - any method
+- 500/502/503/504 or a read timeout - idempotent methods only, i.e.
+  GET/HEAD/OPTIONS/PUT/DELETE, or a request carrying an Idempotency-Key
+
+Errors that another attempt cannot fix - a failed TLS handshake, a proxy
+refusing us, an invalid URL - are never retried, even though requests
+raises some of them as ConnectionError.
+
+Between attempts the client sleeps a "full jitter" backoff,
+uniform(0, min(max_wait, backoff * 2 ** retry)), or the server's Retry-After
+when one is given; a Retry-After longer than `max_wait` ends the retries.
+
+Every retry also draws a token from a RetryBudget shared by the session.
+Each first attempt deposits `ratio` tokens, so in the long run retries
+stay under that fraction of the traffic; when the API is down the budget
+runs dry and requests fail fast instead of multiplying the load.
+"""
+import email.utils
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib3.exceptions import NewConnectionError
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE'})
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+# configuration or certificate problems; SSLError and ProxyError are ConnectionErrors
+PERMANENT_ERRORS = (requests.exceptions.SSLError, requests.exceptions.ProxyError, requests.exceptions.InvalidURL,
+                    requests.exceptions.InvalidSchema, requests.exceptions.MissingSchema,
+                    requests.exceptions.InvalidHeader)
+
+
+class RetryBudget:
+    """
+    Thread-safe token bucket of retries: starts with `reserve` tokens, gains
+    `ratio` per first attempt, holds at most `capacity`; a retry costs one
+    """
+
+    def __init__(self, ratio=0.1, reserve=10, capacity=100):
+        self.ratio = ratio
+        self.capacity = max(capacity, reserve)
+        self.tokens = float(reserve)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self):
+        """
+        Takes one retry's token; False if the budget is spent
+        """
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+@dataclass
+class RetryPolicy:
+    """
+    When and how long to wait before repeating a request; `retries` is the
+    number of extra attempts (0 disables retrying), durations are in seconds
+    """
+    retries: int = 2
+    backoff: float = 0.1
+    max_wait: float = 5.0
+    statuses: frozenset = frozenset({500, 502, 503, 504})
+    budget: RetryBudget = field(default_factory=RetryBudget)
+    rng: random.Random = field(default_factory=random.Random, repr=False)
+
+    @staticmethod
+    def idempotent(method, headers=None):
+        return method.upper() in IDEMPOTENT_METHODS or IDEMPOTENCY_HEADER in CaseInsensitiveDict(headers or {})
+
+    def reason(self, method, headers, response=None, error=None):
+        """
+        Why the attempt is worth repeating ('503', 'ConnectTimeout', ...), or None if it is not
+        """
+        idempotent = self.idempotent(method, headers)
+        if error is not None:
+            if isinstance(error, PERMANENT_ERRORS):
+                return None
+            if _unsent(error) or (idempotent and isinstance(error, (requests.ConnectionError, requests.Timeout))):
+                return type(error).__name__
+            return None
+        if response.status_code == 429 or (idempotent and response.status_code in self.statuses):
+            return str(response.status_code)
+        return None
+
+    def delay(self, retry, response=None):
+        """
+        Seconds to sleep before retry number `retry` (0-based); None if Retry-After asks for more than max_wait
+        """
+        retry_after = retry_after_seconds(response.headers.get('Retry-After')) if response is not None else None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_wait else None
+        return self.rng.uniform(0, min(self.max_wait, self.backoff * 2 ** retry))
+
+
+def _unsent(error):
+    """
+    True if the request never left the client: no connection could be opened
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+def retry_after_seconds(value, now=None):
+    """
+    A Retry-After header (delta-seconds or an HTTP date) in seconds, None if absent or unreadable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
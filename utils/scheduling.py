@@ -0,0 +1,102 @@
+"""
+Duration-aware test distribution for pytest-xdist.
+
+Every run's pytest-json report (report/json/report.json) is archived under
+report/archive/json/ with each test's duration, keyed by its nodeid.
+DurationScheduling reads the most recent ones and, whenever a worker needs
+work, hands it the longest pending unit first (longest-processing-time-first
+list scheduling), so the slowest tests start early and finish times even out.
+Units are xdist groups: tests sharing an `xdist_group` mark always run
+together on one worker, every other test is a unit of its own.
+"""
+import json
+import os
+import statistics
+from pathlib import Path
+
+from xdist.scheduler import LoadGroupScheduling
+
+from utils.report import report_attributes, report_tests
+
+HISTORY_BUILDS = 10
+
+
+def duration_key(nodeid):
+    """
+    The nodeid a test's duration is reported under: xdist's '@group' suffix removed
+    """
+    if nodeid.rfind('@') > nodeid.rfind(']'):
+        nodeid = nodeid.rsplit('@', 1)[0]
+    return nodeid
+
+
+def _read_durations(path):
+    """
+    (created_at, {nodeid: seconds}) from one pytest-json report; (None, {})
+    for a file that is not one
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            report = json.load(f)
+        tests = report_tests(report)
+        created_at = report_attributes(report).get('created_at')
+    except (OSError, ValueError, AttributeError, IndexError):
+        return None, {}
+    durations = {}
+    for test in tests or ():
+        if isinstance(test.get('duration'), (int, float)) and test.get('name'):
+            durations[test['name']] = test['duration']
+    return created_at, durations
+
+
+def load_durations(report_dir, builds=HISTORY_BUILDS):
+    """
+    Median duration per test nodeid over the `builds` most recent runs in
+    `report_dir` (json/report.json and archive/json/*.json); the current
+    report and its archived copy count once
+    """
+    report_dir = Path(report_dir)
+    paths = [report_dir / 'json' / 'report.json', *report_dir.glob('archive/json/*.json')]
+    paths = sorted((p for p in paths if p.exists()), key=os.path.getmtime, reverse=True)
+    samples = {}
+    seen = set()
+    used = 0
+    for path in paths:
+        created_at, durations = _read_durations(path)
+        if not durations or (created_at is not None and created_at in seen):
+            continue
+        seen.add(created_at)
+        for key, seconds in durations.items():
+            samples.setdefault(key, []).append(float(seconds))
+        used += 1
+        if used == builds:
+            break
+    return {key: statistics.median(values) for key, values in samples.items()}
+
+
+class DurationScheduling(LoadGroupScheduling):
+    """
+    LoadGroupScheduling that always hands out the pending unit with the
+    largest expected duration; tests without history are costed at the
+    median of the known ones.
+    """
+
+    def __init__(self, config, log=None, durations=None):
+        super().__init__(config, log)
+        self.durations = durations or {}
+        known = sorted(self.durations.values())
+        self.default_duration = statistics.median(known) if known else 1.0
+        self._costs = {}
+
+    def unit_cost(self, scope):
+        if scope not in self._costs:
+            self._costs[scope] = sum(
+                self.durations.get(duration_key(nodeid), self.default_duration)
+                for nodeid in self.workqueue[scope]
+            )
+        return self._costs[scope]
+
+    def _assign_work_unit(self, node):
+        longest = max(self.workqueue, key=self.unit_cost)
+        self.workqueue.move_to_end(longest, last=False)
+        super()._assign_work_unit(node)
@@ -0,0 +1,175 @@
+import re
+import threading
+from collections.abc import Iterable, Mapping, Sequence
+
+from cerberus import Validator
+
+_TYPES = {
+    'boolean': lambda v: isinstance(v, bool),
+    'dict': lambda v: isinstance(v, Mapping),
+    'float': lambda v: isinstance(v, (float, int)),
+    'integer': lambda v: isinstance(v, int),
+    'list': lambda v: isinstance(v, Sequence) and not isinstance(v, str),
+    'number': lambda v: isinstance(v, (float, int)) and not isinstance(v, bool),
+    'string': lambda v: isinstance(v, str),
+}
+
+# rules that only steer validation of children, not the value itself
+_STRUCTURAL = {'required', 'nullable', 'allow_unknown', 'require_all', 'schema', 'type', 'meta'}
+_SUPPORTED = _STRUCTURAL | {'allowed', 'minlength', 'maxlength', 'min', 'max', 'regex'}
+
+
+class _UnsupportedRule(Exception):
+    """
+    A rule the compiler does not cover; compile_schema() falls back to cerberus
+    """
+
+
+def _compile_rules(rules, allow_unknown, require_all):
+    """
+    Returns a predicate for one field's value that is True only when cerberus
+    would report no errors for it under the same rules and inherited settings.
+    """
+    unsupported = set(rules) - _SUPPORTED
+    if unsupported:
+        raise _UnsupportedRule(f'Unsupported cerberus rules: {sorted(unsupported)}')
+
+    checks = []
+    type_name = rules.get('type')
+    if type_name is not None:
+        if type_name not in _TYPES:
+            raise _UnsupportedRule(f'Unsupported cerberus type: {type_name}')
+        checks.append(_TYPES[type_name])
+
+    if 'allowed' in rules:
+        allowed = frozenset(rules['allowed'])
+
+        def _allowed(v):
+            if isinstance(v, Iterable) and not isinstance(v, str):
+                return all(item in allowed for item in v)
+            return v in allowed
+        checks.append(_allowed)
+
+    if 'minlength' in rules:
+        minlength = rules['minlength']
+        checks.append(lambda v: not isinstance(v, Iterable) or len(v) >= minlength)
+    if 'maxlength' in rules:
+        maxlength = rules['maxlength']
+        checks.append(lambda v: not isinstance(v, Iterable) or len(v) <= maxlength)
+    if 'min' in rules:
+        minimum = rules['min']
+        checks.append(lambda v: not isinstance(v, (int, float)) or v >= minimum)
+    if 'max' in rules:
+        maximum = rules['max']
+        checks.append(lambda v: not isinstance(v, (int, float)) or v <= maximum)
+    if 'regex' in rules:
+        pattern = rules['regex']
+        match = re.compile(pattern if pattern.endswith('$') else pattern + '$').match
+        checks.append(lambda v: not isinstance(v, str) or match(v) is not None)
+
+    if 'schema' in rules:
+        if type_name == 'dict':
+            mapping = _compile_mapping(rules['schema'],
+                                       rules.get('allow_unknown', allow_unknown),
+                                       rules.get('require_all', require_all))
+            checks.append(mapping)
+        elif type_name == 'list':
+            item = _compile_rules(rules['schema'], allow_unknown, require_all)
+            checks.append(lambda v: all(item(i) for i in v))
+        else:
+            raise _UnsupportedRule("'schema' rule without a dict/list type")
+
+    nullable = rules.get('nullable', False)
+    checks = tuple(checks)
+
+    def _check(v):
+        if v is None:
+            return nullable
+        for check in checks:
+            if not check(v):
+                return False
+        return True
+    return _check
+
+
+def _compile_mapping(schema, allow_unknown, require_all):
+    fields = tuple(
+        (name, rules.get('required', require_all), _compile_rules(rules, allow_unknown, require_all))
+        for name, rules in schema.items()
+    )
+    known = frozenset(schema)
+
+    def _check(document):
+        if not isinstance(document, Mapping):
+            return False
+        if not allow_unknown and not known.issuperset(document):
+            return False
+        for name, required, check in fields:
+            if name in document:
+                if not check(document[name]):
+                    return False
+            elif required:
+                return False
+        return True
+    return _check
+
+
+_UNSET = object()
+
+
+def compile_schema(schema, require_all=False):
+    """
+    Compiles a cerberus schema into a `document -> bool` predicate, or returns
+    None when it uses rules the compiler does not cover.
+    """
+    try:
+        return _compile_mapping(schema, False, require_all)
+    except _UnsupportedRule:
+        return None
+
+
+class SchemaValidator:
+    """
+    Drop-in for `cerberus.Validator(schema, require_all=...)` in the tests.
+
+    Valid documents are accepted by the compiled predicate without cerberus'
+    per-call normalisation. Only a document the fast path rejects is handed
+    to a real cerberus Validator, which makes the verdict and `errors`
+    exactly what cerberus reports.
+    """
+
+    def __init__(self, schema, require_all=False, compiled=_UNSET):
+        self.schema = schema
+        self.require_all = require_all
+        self._fast = compile_schema(schema, require_all) if compiled is _UNSET else compiled
+        self.errors = {}
+
+    def validate(self, document):
+        try:
+            accepted = self._fast is not None and self._fast(document)
+        except TypeError:
+            accepted = False
+        if accepted:
+            self.errors = {}
+            return True
+        validator = Validator(self.schema, require_all=self.require_all)
+        result = validator.validate(document)
+        self.errors = validator.errors
+        return result
+
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def validator_for(schema, require_all=True):
+    """
+    Returns a SchemaValidator for `schema`, compiling the schema only once per
+    process. Each call gets its own instance so `errors` is never shared.
+    """
+    key = (id(schema), require_all)
+    with _compiled_lock:
+        if key not in _compiled:
+            _compiled[key] = (schema, compile_schema(schema, require_all))
+        _, compiled = _compiled[key]
+    return SchemaValidator(schema, require_all, compiled)
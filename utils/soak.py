@@ -0,0 +1,237 @@
+"""
+Open-loop soak runner.
+
+Requests are started on a fixed-rate clock - request i is due at
+start + i / rate - whatever the earlier ones are doing, with scenarios
+interleaved in the proportions of the mix. A closed loop (LoadRunner) waits
+for each response before sending the next request, so a stall delays the
+very requests that would have measured it ("coordinated omission"). Here
+every latency is taken from the request's *intended* start, so time spent
+queued behind a slow response counts; the plain service time (from the
+actual send) is kept alongside for comparison.
+
+Results are summarised per `bucket` seconds of wall-clock time (by
+completion) and handed to `on_bucket` as soon as a bucket closes, so an
+hours-long run emits its series as it goes.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from utils.metrics import LatencyHistogram, soak_latency
+from utils.request import default_transport
+
+SERIES_PERCENTILES = (50, 90, 99, 99.9)
+ALL = '*'
+
+
+@dataclass
+class SoakProfile:
+    """
+    Shape of a soak run; `rate` is requests per second over all scenarios,
+    `mix` maps a scenario name to its weight (equal weights if empty)
+    """
+    rate: float = 20.0
+    duration: float = 60.0
+    mix: dict = field(default_factory=dict)
+    bucket: float = 10.0
+    max_in_flight: int = 32
+    # requests scheduled but not finished before new ones are dropped instead of queued
+    max_backlog: int = 1000
+
+
+def parse_mix(text):
+    """
+    "list=4,create=1" -> {'list': 4.0, 'create': 1.0}
+    """
+    mix = {}
+    for part in filter(None, (p.strip() for p in (text or '').split(','))):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
+
+
+def weighted_cycle(weights):
+    """
+    Endless smooth weighted round-robin over {name: weight}: every window of
+    sum(weights) picks holds each name in proportion, evenly spread
+    """
+    weights = {name: weight for name, weight in weights.items() if weight > 0}
+    if not weights:
+        raise ValueError('The scenario mix has no positive weights')
+    total = sum(weights.values())
+    current = dict.fromkeys(weights, 0.0)
+    while True:
+        for name, weight in weights.items():
+            current[name] += weight
+        chosen = max(current, key=current.get)
+        current[chosen] -= total
+        yield chosen
+
+
+class _Bucket:
+
+    def __init__(self, start):
+        self.start = start
+        self.corrected = {}
+        self.service = {}
+        self.errors = {}
+        self.dropped = 0
+
+    def add(self, name, corrected_ms, service_ms, ok):
+        self.corrected.setdefault(name, LatencyHistogram()).record(corrected_ms)
+        self.service.setdefault(name, LatencyHistogram()).record(service_ms)
+        self.errors[name] = self.errors.get(name, 0) + (not ok)
+
+    def rows(self, width):
+        if not self.corrected and not self.dropped:
+            return []
+        names = sorted(self.corrected)
+        merged = {ALL: (LatencyHistogram(), LatencyHistogram())}
+        for name in names:
+            merged[ALL][0].merge(self.corrected[name])
+            merged[ALL][1].merge(self.service[name])
+            merged[name] = (self.corrected[name], self.service[name])
+        rows = []
+        for name, (corrected, service) in merged.items():
+            row = {
+                't': round(self.start, 3),
+                'scenario': name,
+                'completed': corrected.count,
+                'errors': sum(self.errors.values()) if name == ALL else self.errors[name],
+                'throughput': round(corrected.count / width, 2),
+                **{f'p{pct:g}': round(corrected.value_at_percentile(pct), 3) for pct in SERIES_PERCENTILES},
+                'max': round(corrected.max, 3),
+                'service_p99': round(service.value_at_percentile(99), 3),
+            }
+            if name == ALL:
+                row['dropped'] = self.dropped
+            rows.append(row)
+        return rows
+
+
+@dataclass
+class SoakResult:
+    """
+    Totals of a soak run; `corrected`/`service` hold a LatencyHistogram per scenario
+    """
+    scheduled: int = 0
+    completed: int = 0
+    errors: int = 0
+    dropped: int = 0
+    elapsed: float = 0.0
+    corrected: dict = field(default_factory=dict)
+    service: dict = field(default_factory=dict)
+
+    @property
+    def throughput(self):
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def error_rate(self):
+        return self.errors / self.completed if self.completed else 0.0
+
+    def summary(self):
+        lines = [f'soak: scheduled={self.scheduled} completed={self.completed} errors={self.errors} '
+                 f'dropped={self.dropped} rps={self.throughput:.1f}']
+        for name, hist in sorted(self.corrected.items()):
+            lines.append(f'  {name}: n={hist.count} p50={hist.value_at_percentile(50):.1f} '
+                         f'p99={hist.value_at_percentile(99):.1f} p99.9={hist.value_at_percentile(99.9):.1f} '
+                         f'max={hist.max:.1f} ms (service p99={self.service[name].value_at_percentile(99):.1f} ms)')
+        return '\n'.join(lines)
+
+
+class OpenLoopRunner:
+    """
+    Fixed-rate, open-loop request generator; see the module docstring.
+    Corrected latencies are also recorded in `metrics`
+    (utils.metrics.soak_latency by default), keyed by scenario.
+    """
+
+    def __init__(self, profile=None, transport=None, metrics=None, on_bucket=None):
+        self.profile = profile or SoakProfile()
+        self.transport = transport or default_transport()
+        self.metrics = metrics or soak_latency
+        self.on_bucket = on_bucket
+        self._lock = threading.Lock()
+
+    def run(self, scenarios):
+        """
+        `scenarios` maps a name to a zero-arg callable returning an ApiRequest.
+        Returns a SoakResult.
+        """
+        profile = self.profile
+        mix = profile.mix or dict.fromkeys(scenarios, 1.0)
+        unknown = set(mix) - set(scenarios)
+        if unknown:
+            raise ValueError(f'Unknown scenarios in the mix: {", ".join(sorted(unknown))}')
+        order = weighted_cycle(mix)
+        interval = 1.0 / profile.rate
+        result = SoakResult(corrected={name: LatencyHistogram() for name in mix},
+                            service={name: LatencyHistogram() for name in mix})
+        start = time.perf_counter()
+        bucket = _Bucket(0.0)
+        backlog = 0
+
+        def _roll(now, final=False):
+            """
+            Emits every bucket that ended before `now` (and, if `final`, the open one); call with the lock held
+            """
+            nonlocal bucket
+            while now - start >= bucket.start + profile.bucket or final:
+                width = min(profile.bucket, now - start - bucket.start)
+                rows = bucket.rows(width) if width > 0 else []
+                if rows and self.on_bucket:
+                    self.on_bucket(rows)
+                if final:
+                    return
+                bucket = _Bucket(bucket.start + profile.bucket)
+
+        def _send(name, factory, due):
+            nonlocal backlog
+            sent = time.perf_counter()
+            try:
+                ok = factory().send(self.transport).status_code < 400
+            except Exception:  # pylint: disable=broad-except
+                ok = False
+            done = time.perf_counter()
+            corrected_ms, service_ms = (done - due) * 1000, (done - sent) * 1000
+            with self._lock:
+                _roll(done)
+                bucket.add(name, corrected_ms, service_ms, ok)
+                result.corrected[name].record(corrected_ms)
+                result.service[name].record(service_ms)
+                result.completed += 1
+                result.errors += not ok
+                backlog -= 1
+            self.metrics.observe(name, corrected_ms)
+
+        with ThreadPoolExecutor(max_workers=profile.max_in_flight, thread_name_prefix='soak') as executor:
+            i = 0
+            while True:
+                due = start + i * interval
+                if due - start >= profile.duration:
+                    break
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                name = next(order)
+                with self._lock:
+                    _roll(time.perf_counter())
+                    result.scheduled += 1
+                    if backlog >= profile.max_backlog:
+                        result.dropped += 1
+                        bucket.dropped += 1
+                        factory = None
+                    else:
+                        backlog += 1
+                        factory = scenarios[name]
+                if factory is not None:
+                    executor.submit(_send, name, factory, due)
+                i += 1
+
+        with self._lock:
+            result.elapsed = time.perf_counter() - start
+            _roll(start + result.elapsed, final=True)
+        return result
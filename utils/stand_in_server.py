@@ -0,0 +1,315 @@
+"""
+In-process stand-in for the Equipment API.
+
+Implements the four endpoints the suite exercises with the response shapes
+described in tests/data/schema/*.py. It is a small asyncio HTTP/1.1 server
+(keep-alive, Content-Length bodies) running on its own event-loop thread, so
+injected latency never blocks other connections and a single process can
+serve thousands of requests per second.
+
+    python -m utils.stand_in_server --port 8080 --latency-ms 20 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+from datetime import datetime, timezone
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+ALLOWED_STATUS = ("Active", "Idle", "Under Maintenance")
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+_STATUS_PATH = re.compile(r'^/api/equipment/(\d+)/status/?$')
+_HISTORY_PATH = re.compile(r'^/api/equipment/(\d+)/history/?$')
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def _non_empty_str(value):
+    return isinstance(value, str) and value.strip() != ''
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class EquipmentStore:
+    """
+    Thread-safe in-memory equipment table plus per-equipment status history
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.items = {}
+        self.history = {}
+        self._next_id = 1
+        self._next_history_id = 1
+
+    def list(self):
+        with self._lock:
+            return list(self.items.values())
+
+    def create(self, body):
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+        if not _non_empty_str(body.get("name")):
+            raise ApiError(400, "Field 'name' is required")
+        if body.get("status") not in ALLOWED_STATUS:
+            raise ApiError(400, f"Field 'status' must be one of: {', '.join(ALLOWED_STATUS)}")
+        if not _non_empty_str(body.get("location")):
+            raise ApiError(400, "Field 'location' is required")
+
+        with self._lock:
+            item = {
+                "id": self._next_id,
+                "name": body["name"],
+                "status": body["status"],
+                "location": body["location"],
+                "lastUpdated": _now(),
+            }
+            self.items[item["id"]] = item
+            self.history[item["id"]] = []
+            self._next_id += 1
+            return dict(item)
+
+    def update_status(self, eq_id, body):
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+        if body.get("status") not in ALLOWED_STATUS:
+            raise ApiError(400, f"Field 'status' must be one of: {', '.join(ALLOWED_STATUS)}")
+        changed_by = body.get("changedBy")
+        if changed_by is not None and not _non_empty_str(changed_by):
+            raise ApiError(400, "Field 'changedBy' must be a non-empty string")
+
+        with self._lock:
+            item = self.items.get(eq_id)
+            if item is None:
+                raise ApiError(404, f"Equipment {eq_id} not found")
+            timestamp = _now()
+            entry = {
+                "id": self._next_history_id,
+                "equipmentId": eq_id,
+                "previousStatus": item["status"],
+                "newStatus": body["status"],
+                "timestamp": timestamp,
+                "changedBy": changed_by or "System",
+            }
+            self._next_history_id += 1
+            item["status"] = body["status"]
+            item["lastUpdated"] = timestamp
+            self.history[eq_id].append(entry)
+            return {"equipment": dict(item), "historyEntry": dict(entry)}
+
+    def get_history(self, eq_id, limit, offset):
+        with self._lock:
+            if eq_id not in self.items:
+                raise ApiError(404, f"Equipment {eq_id} not found")
+            newest_first = self.history[eq_id][::-1]
+        page = newest_first[offset:offset + limit]
+        return {
+            "equipmentId": eq_id,
+            "history": page,
+            "total": len(newest_first),
+            "limit": limit,
+            "offset": offset,
+            "hasMore": offset + len(page) < len(newest_first),
+        }
+
+
+def _int_param(query, name, default, maximum=None):
+    raw = query.get(name, [None])[0]
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ApiError(400, f"Query parameter '{name}' must be an integer") from None
+    if value < 0:
+        raise ApiError(400, f"Query parameter '{name}' must be >= 0")
+    return min(value, maximum) if maximum is not None else value
+
+
+class StandInServer:
+    """
+    Runs the stand-in API on a background thread.
+
+    latency_ms/jitter_ms add `latency_ms + uniform(0, jitter_ms)` to every
+    response; error_rate is the probability of answering 500. Both draw from
+    one random.Random(seed), so a given seed and request order always
+    produce the same delays and failures.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=None):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.store = EquipmentStore()
+        self.stats = {"requests": 0, "connections": 0, "in_flight": 0, "peak_in_flight": 0}
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    def start(self):
+        ready = threading.Event()
+
+        def _run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=1024))
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+            self._server.close()
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=_run, name='stand-in-server', daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    async def _handle(self, reader, writer):
+        self.stats["connections"] += 1
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                request_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+                method, target, version = request_line.split(' ', 2)
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length') or 0)
+                body = await reader.readexactly(length) if length else b''
+
+                self.stats["requests"] += 1
+                self.stats["in_flight"] += 1
+                self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+                try:
+                    status, payload = await self._respond(method, target, body)
+                finally:
+                    self.stats["in_flight"] -= 1
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                data = json.dumps(payload, separators=(',', ':')).encode()
+                writer.write(
+                    f'HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n'
+                    f'Content-Type: application/json\r\n'
+                    f'Content-Length: {len(data)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # stop() cancels the connections still open; ending the handler normally, rather than
+            # re-raising, keeps asyncio's stream callback from logging every shutdown as an error
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method, target, body):
+        delay = self.latency_ms + (self.random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        fail = self.error_rate and self.random.random() < self.error_rate
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if fail:
+            return 500, {"success": False, "error": "Injected failure"}
+        try:
+            return self._route(method, target, body)
+        except ApiError as e:
+            return e.status, {"success": False, "error": e.message}
+
+    def _route(self, method, target, body):
+        url = urlsplit(target)
+        path = url.path
+
+        if path.rstrip('/') == '/api/equipment':
+            if method == 'GET':
+                items = self.store.list()
+                return 200, {"success": True, "count": len(items), "data": items}
+            if method == 'POST':
+                return 201, {"success": True, "data": self.store.create(self._json(body))}
+            raise ApiError(405, f"Method {method} not allowed")
+
+        match = _STATUS_PATH.match(path)
+        if match:
+            if method != 'POST':
+                raise ApiError(405, f"Method {method} not allowed")
+            return 200, {"success": True, "data": self.store.update_status(int(match.group(1)), self._json(body))}
+
+        match = _HISTORY_PATH.match(path)
+        if match:
+            if method != 'GET':
+                raise ApiError(405, f"Method {method} not allowed")
+            query = parse_qs(url.query)
+            limit = _int_param(query, 'limit', DEFAULT_LIMIT, MAX_LIMIT)
+            offset = _int_param(query, 'offset', 0)
+            return 200, {"success": True, "data": self.store.get_history(int(match.group(1)), limit, offset)}
+
+        raise ApiError(404, f"Route {method} {path} not found")
+
+    @staticmethod
+    def _json(body):
+        try:
+            return json.loads(body or b'null')
+        except ValueError:
+            raise ApiError(400, "Request body is not valid JSON") from None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = StandInServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    server.start()
+    print(f'Stand-in Equipment API listening on {server.url}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
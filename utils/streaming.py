@@ -0,0 +1,131 @@
+import codecs
+import json
+
+_WHITESPACE = ' \t\n\r'
+_decoder = json.JSONDecoder()
+
+
+class JsonArrayStream:
+    """
+    Incremental reader for a JSON object whose `array_key` member is a large array.
+
+        stream = JsonArrayStream(response.iter_content(65536), 'data')
+        for item in stream:
+            ...
+        stream.envelope  # every other top-level member, e.g. success/count
+
+    Items are decoded one at a time as bytes arrive, so memory is bounded by
+    one item plus one chunk regardless of the array length. `envelope` is
+    complete once iteration has finished.
+    """
+
+    def __init__(self, chunks, array_key='data'):
+        self.array_key = array_key
+        self.envelope = {}
+        self.count = 0
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        if self._eof:
+            raise ValueError('Unexpected end of JSON stream')
+        self._buf = self._buf[self._pos:]
+        self._pos = 0
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            self._buf += self._text.decode(b'', final=True)
+        else:
+            self._buf += self._text.decode(chunk)
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            self._fill()
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f'Expected {char!r} at stream offset {self._pos}, got {self._buf[self._pos]!r}')
+        self._pos += 1
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                self._fill()
+                continue
+            # a number at the end of the buffer may continue in the next chunk
+            if end == len(self._buf) and not self._eof:
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+    def __iter__(self):
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == self.array_key and self._peek() == '[':
+                self._pos += 1
+                if self._peek() == ']':
+                    self._pos += 1
+                else:
+                    while True:
+                        yield self._value()
+                        self.count += 1
+                        if self._peek() == ']':
+                            self._pos += 1
+                            break
+                        self._expect(',')
+            else:
+                self.envelope[key] = self._value()
+            if self._peek() == '}':
+                self._pos += 1
+                return
+            self._expect(',')
+
+
+class IdSet:
+    """
+    Membership set for positive integer ids backed by a bitmap: one bit per
+    possible id instead of a ~60 byte set entry, so uniqueness checks over
+    millions of items stay a few hundred KB. The bitmap grows with the largest
+    id, so it stops at `max_bytes` (4 MiB, ids below 2**25); larger, negative
+    or non-integer ids go to a plain set instead.
+    """
+
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        self._bits = bytearray()
+        self._max_bytes = max_bytes
+        self._sparse = set()
+
+    def add(self, value):
+        """
+        Adds `value`; returns False if it was already present
+        """
+        if not isinstance(value, int) or value < 0 or value >= self._max_bytes * 8:
+            if value in self._sparse:
+                return False
+            self._sparse.add(value)
+            return True
+        byte, bit = divmod(value, 8)
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(min(max(byte + 1 - len(self._bits), len(self._bits)),
+                                        self._max_bytes - len(self._bits))))
+        mask = 1 << bit
+        if self._bits[byte] & mask:
+            return False
+        self._bits[byte] |= mask
+        return True
@@ -0,0 +1,196 @@
+"""
+Per-phase timing of HTTP requests: DNS, TCP connect, TLS handshake,
+time to first byte and body download.
+
+TimedHTTPAdapter mounts urllib3 connection classes that time each phase of
+the request currently being measured on their thread:
+
+    with measure() as timing:
+        response = session.request(...)
+    timing.phases()   # {'dns': 0.4, 'connect': 1.2, 'tls': 9.8, 'ttfb': 35.1, 'body': 2.0}
+
+dns/connect/tls are only taken when the request opened a new connection;
+on a reused keep-alive connection they stay None. ttfb runs from the request
+being written to the response headers being parsed; body from there until
+the response content has been read (None for stream=True).
+"""
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import _set_socket_options, allowed_gai_family
+from urllib3.util.timeout import _DEFAULT_TIMEOUT
+
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'body')
+
+_local = threading.local()
+
+
+def _since(start):
+    return (time.perf_counter() - start) * 1000
+
+
+@dataclass
+class RequestTiming:
+    """
+    Phase durations of one request in ms; None for a phase that did not happen
+    """
+    dns: float = None
+    connect: float = None
+    tls: float = None
+    ttfb: float = None
+    body: float = None
+    total: float = 0.0
+    # ms spent waiting for the client-side limiter (utils.limiter) before sending; not part of total
+    queued: float = 0.0
+    _sent_at: float = field(default=None, repr=False, compare=False)
+    _headers_at: float = field(default=None, repr=False, compare=False)
+
+    @property
+    def reused(self):
+        """
+        True if the request went over an already open keep-alive connection
+        """
+        return self.connect is None
+
+    def phases(self):
+        return {phase: getattr(self, phase) for phase in PHASES if getattr(self, phase) is not None}
+
+
+@contextmanager
+def measure():
+    """
+    Times the phases of the requests made on this thread inside the block
+    """
+    timing = RequestTiming()
+    previous = getattr(_local, 'timing', None)
+    _local.timing = timing
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing.total = _since(start)
+        _local.timing = previous
+
+
+def current():
+    """
+    The RequestTiming being measured on this thread, if any
+    """
+    return getattr(_local, 'timing', None)
+
+
+def _connect(address, timeout, source_address, socket_options, timing):
+    """
+    urllib3.util.connection.create_connection with name resolution and the
+    TCP handshake timed separately
+    """
+    host, port = address
+    if host.startswith('['):
+        host = host.strip('[]')
+    start = time.perf_counter()
+    addresses = socket.getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM)
+    timing.dns = _since(start)
+
+    err = None
+    start = time.perf_counter()
+    for af, socktype, proto, _, sockaddr in addresses:
+        sock = None
+        try:
+            sock = socket.socket(af, socktype, proto)
+            _set_socket_options(sock, socket_options)
+            if timeout is not _DEFAULT_TIMEOUT:
+                sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(sockaddr)
+            timing.connect = _since(start)
+            return sock
+        except OSError as e:
+            err = e
+            if sock is not None:
+                sock.close()
+    raise err if err is not None else OSError('getaddrinfo returns an empty list')
+
+
+class _TimedConnectionMixin:
+
+    def _new_conn(self):
+        timing = current()
+        if timing is None:
+            return super()._new_conn()
+        try:
+            sock = _connect((self._dns_host, self.port), self.timeout, self.source_address,
+                            self.socket_options, timing)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f'Connection to {self.host} timed out. (connect timeout={self.timeout})') from e
+        except OSError as e:
+            raise NewConnectionError(self, f'Failed to establish a new connection: {e}') from e
+        sys.audit('http.client.connect', self, self.host, self.port)
+        return sock
+
+    def request(self, *args, **kwargs):
+        super().request(*args, **kwargs)
+        timing = current()
+        if timing is not None:
+            timing._sent_at = time.perf_counter()  # pylint: disable=protected-access
+
+    def getresponse(self):
+        response = super().getresponse()
+        timing = current()
+        if timing is not None and timing._sent_at is not None:  # pylint: disable=protected-access
+            timing._headers_at = time.perf_counter()  # pylint: disable=protected-access
+            timing.ttfb = (timing._headers_at - timing._sent_at) * 1000  # pylint: disable=protected-access
+        return response
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+
+    def connect(self):
+        timing = current()
+        start = time.perf_counter()
+        super().connect()
+        if timing is not None and timing.connect is not None:
+            timing.tls = max(_since(start) - timing.dns - timing.connect, 0.0)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connection pools time every phase of a measured request
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool,
+                                                   'https': TimedHTTPSConnectionPool}
+
+
+def finish(timing, streamed=False):
+    """
+    Completes `timing` once the response content has been read
+    """
+    if timing._headers_at is not None and not streamed:  # pylint: disable=protected-access
+        timing.body = _since(timing._headers_at)  # pylint: disable=protected-access
+    return timing
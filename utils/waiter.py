@@ -0,0 +1,42 @@
+import random
+import time
+from dataclasses import dataclass
+
+from utils.metrics import consistency
+
+@dataclass
+class WaitResult:
+    ok: bool
+    value: object
+    attempts: int
+    elapsed_ms: float
+
+def wait_until(probe, predicate, timeout=5.0, initial_delay=0.05, max_delay=1.0, factor=2.0, jitter=0.5,
+               name=None):
+    """
+    Calls `probe()` until `predicate(value)` holds or `timeout` seconds have passed.
+
+    Sleeps between attempts grow exponentially from `initial_delay` up to
+    `max_delay`, each shortened by a random fraction up to `jitter`, and never
+    overrun the deadline. When `name` is given the time to convergence is
+    recorded in the time-to-consistency metrics. Returns a WaitResult; the
+    caller decides how to fail.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    delay = initial_delay
+    attempts = 0
+    while True:
+        value = probe()
+        attempts += 1
+        ok = predicate(value)
+        now = time.monotonic()
+        if ok or now >= deadline:
+            break
+        time.sleep(min(delay * (1 - jitter * random.random()), deadline - now))
+        delay = min(delay * factor, max_delay)
+
+    elapsed_ms = (time.monotonic() - start) * 1000
+    if ok and name:
+        consistency.observe(name, elapsed_ms)
+    return WaitResult(ok, value, attempts, elapsed_ms)